@@ -0,0 +1,193 @@
+"""
+Asynchroniczne tworzenie pull requestow na bitbuckecie
+
+Pull requesty dla wielu repozytoriow wysylane sa jednoczesnie, z limitem
+rownoczesnych zapytan. Zapytania wykonuje wspolny BitbucketClient (pula polaczen,
+ponawianie, wspolny limit zapytan z ratelimit.py), uruchamiany na puli watkow petli
+asyncio, wiec pauza po 429 dotyczy wszystkich zadan i pozostalych zapytan do API.
+Wszystkie wywolania create_pull_requests wykonywane sa na jednej, dlugo zyjacej petli
+asyncio w osobnym watku, a klient ma wlasna pule watkow, wiec pojedynczy pull request
+nie tworzy nowej petli ani nowej puli.
+
+Definiuje funkcje create_pull_requests z ktorej korzysta gitaction.py i resolver.py
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+import bitbucketclient
+from credentials import BitbucketCredentials
+
+DEFAULT_CONCURRENCY = 8
+
+_clients: Dict[Tuple[str, str, str], "AsyncBitbucketClient"] = {}
+_clients_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+@dataclass
+class PullRequest:
+    """
+    Klasa przechowujaca dane pull requesta do utworzenia
+
+    Atrybuty
+    ----------
+    workspace : str
+        workspace bitbucketa
+    project : str
+        repozytorium na bitbuckecie
+    json : Dict
+        tresc pull requesta z gitaction.create_pr_json
+    """
+
+    workspace: str
+    project: str
+    json: Dict
+
+    @property
+    def path(self) -> str:
+        """
+        Zwraca sciezke API do tworzenia pull requestow w repozytorium
+        """
+        return f"/repositories/{self.workspace}/{self.project}/pullrequests"
+
+
+class AsyncBitbucketClient:
+    """
+    Asynchroniczna nakladka na BitbucketClient z limitem rownoczesnych zapytan
+
+    Atrybuty
+    ----------
+    client : BitbucketClient
+        klient wykonujacy zapytania
+    concurrency : int
+        domyslna maksymalna liczba jednoczesnych zapytan
+    executor : ThreadPoolExecutor
+        pula watkow klienta o rozmiarze concurrency
+    """
+
+    def __init__(self, client: bitbucketclient.BitbucketClient,
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                           thread_name_prefix="bitbucket")
+
+    async def create_pull_requests(self, batch: List[PullRequest],
+                                   concurrency: Optional[int] = None) -> List[requests.Response]:
+        """
+        Tworzy wszystkie pull requesty, najwyzej concurrency jednoczesnie. Zapytania
+        wykonuje pula watkow klienta, a gdy concurrency jest od niej wieksze, osobna pula
+
+        Parameters
+        ----------
+        batch : List[PullRequest]
+            pull requesty do utworzenia
+        concurrency : Optional[int]
+            maksymalna liczba jednoczesnych zapytan, domyslnie concurrency klienta
+        Returns
+        -------
+        List[requests.Response]
+            odpowiedzi w kolejnosci pull requestow
+        """
+        concurrency = max(1, concurrency or self.concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create(pull_request: PullRequest,
+                         executor: ThreadPoolExecutor) -> requests.Response:
+            async with semaphore:
+                return await self.create_pull_request(pull_request, executor)
+
+        if concurrency <= self.concurrency:
+            return list(await asyncio.gather(*(create(pr, self.executor) for pr in batch)))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(await asyncio.gather(*(create(pr, executor) for pr in batch)))
+
+    async def create_pull_request(self, pull_request: PullRequest,
+                                  executor: Optional[ThreadPoolExecutor] = None
+                                  ) -> requests.Response:
+        """
+        Tworzy jeden pull request
+
+        Parameters
+        ----------
+        pull_request : PullRequest
+            pull request do utworzenia
+        executor : Optional[ThreadPoolExecutor]
+            pula watkow wykonujaca zapytania
+        Returns
+        -------
+        requests.Response
+            odpowiedz bitbucketa
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, lambda: self.client.post(pull_request.path, json=pull_request.json))
+
+
+def get_client(credentials: BitbucketCredentials) -> AsyncBitbucketClient:
+    """
+    Zwraca wspolnego klienta dla credentiali, tworzy go przy pierwszym wywolaniu
+
+    Parameters
+    ----------
+    credentials : BitbucketCredentials
+        credentiale do bitbucketa
+    Returns
+    -------
+    AsyncBitbucketClient
+        wspolny klient
+    """
+    client = bitbucketclient.get_client(credentials)
+    key = (credentials.username, credentials.appkey, client.base_url)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = AsyncBitbucketClient(client)
+        return _clients[key]
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Zwraca wspolna petle asyncio dzialajaca w osobnym watku, tworzy ja przy pierwszym
+    wywolaniu
+
+    Returns
+    -------
+    asyncio.AbstractEventLoop
+        dzialajaca petla
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="asyncbitbucket",
+                             daemon=True).start()
+        return _loop
+
+
+def create_pull_requests(batch: List[PullRequest], credentials: BitbucketCredentials,
+                         concurrency: int = DEFAULT_CONCURRENCY) -> List[requests.Response]:
+    """
+    Synchronicznie tworzy wszystkie pull requesty przez AsyncBitbucketClient na wspolnej
+    petli z get_loop. Moze byc wywolywana jednoczesnie z wielu watkow
+
+    Parameters
+    ----------
+    batch : List[PullRequest]
+        pull requesty do utworzenia
+    credentials : BitbucketCredentials
+        credentiale do bitbucketa
+    concurrency : int
+        maksymalna liczba jednoczesnych zapytan
+    Returns
+    -------
+    List[requests.Response]
+        odpowiedzi w kolejnosci pull requestow
+    """
+    coroutine = get_client(credentials).create_pull_requests(batch, concurrency)
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop()).result()
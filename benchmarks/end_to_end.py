@@ -0,0 +1,228 @@
+"""
+Benchmark calego przebiegu resolver.py
+
+Tworzy N syntetycznych repozytoriow z lokalnym bare origin (liczba plikow, ich rozmiar
+i czesc plikow z dopasowaniem sa konfigurowalne), uruchamia lokalny serwer udajacy API
+bitbucketa i wykonuje resolver.execute_script z sekcja BITBUCKET, czyli pelny przebieg:
+wyszukanie, zamiane, commit, push do origin oraz pull requesty.
+
+Raportowany jest czas calkowity, sumaryczny czas kazdego etapu potoku, liczba procesow
+gita, zapytania do API, szczytowe RSS oraz dane z getrusage (przelaczenia kontekstu,
+operacje blokowe) jako przyblizenie liczby wywolan systemowych. Wynik dopisywany jest
+do pliku JSONL (domyslnie benchmarks/results.jsonl) i porownywany z ostatnim wynikiem
+o tych samych parametrach. Gdy czas wzrosl bardziej niz --max-regression, skrypt
+konczy sie kodem 1.
+
+np. python benchmarks/end_to_end.py --repos 50 --files 20 --match-density 0.3 -j 4
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bitbucketclient  # noqa: E402
+import resolver  # noqa: E402
+from benchmarks.fixtures import MATCH, ProcessCounter, create_repositories  # noqa: E402
+from tests.stubserver import BitbucketStub  # noqa: E402
+
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results.jsonl")
+PARAMETERS = ("repos", "files", "file_size", "match_density", "jobs", "git_backend",
+              "search_backend")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repos", type=int, default=50, help='Number of repositories')
+    parser.add_argument("--files", type=int, default=20, help='Files per repository')
+    parser.add_argument("--file-size", type=int, default=4096, help='Approximate file size')
+    parser.add_argument("--match-density", type=float, default=0.3,
+                        help='Fraction of files containing the searched string')
+    parser.add_argument("-j", "--jobs", type=int, default=4,
+                        help='Value passed to resolver.py -j')
+    parser.add_argument("--git-backend", default="cli", help='git_backend property')
+    parser.add_argument("--search-backend", default="python", help='search_backend property')
+    parser.add_argument("--results", default=RESULTS_FILE,
+                        help='JSONL file where results are appended')
+    parser.add_argument("--label", default=None,
+                        help='Name of the measured version, default is the current commit')
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help='Allowed wall time increase against the previous result')
+    return parser.parse_args()
+
+
+def write_config(directory: str, arguments: argparse.Namespace) -> str:
+    """
+    Zapisuje konfiguracje resolver.py oraz plik z credentialami dla serwera testowego
+
+    Parameters
+    ----------
+    directory : str
+        katalog na pliki
+    arguments : argparse.Namespace
+        parametry benchmarku
+    Returns
+    -------
+    str
+        adres pliku z konfiguracja
+    """
+    credentials_file = os.path.join(directory, "credentials")
+    with open(credentials_file, "w") as file:
+        file.write("[CREDENTIALS]\nappkey=benchmark\nusername=benchmark\n")
+    config_file = os.path.join(directory, "config.txt")
+    with open(config_file, "w") as file:
+        file.write(f"[PROPERTIES]\ncommit_message=benchmark\nstr_to_find={MATCH}\n"
+                   f"str_to_repl=junit\nmaster=master\nextensions=gradle\n"
+                   f"git_backend={arguments.git_backend}\n"
+                   f"search_backend={arguments.search_backend}\n"
+                   f"[BITBUCKET]\nbranch=benchmark\nworkspace=benchmark\n"
+                   f"bitbucket_credentials={credentials_file}\n")
+    return config_file
+
+
+def time_stages(totals: Dict[str, float]):
+    """
+    Podmienia etapy resolver.REPO_STAGES na wersje sumujace czas wykonania
+
+    Parameters
+    ----------
+    totals : Dict[str, float]
+        nazwa etapu => suma czasow w sekundach
+    """
+    lock = threading.Lock()
+
+    def timed(name, function):
+        def stage(job, context):
+            start = time.perf_counter()
+            try:
+                return function(job, context)
+            finally:
+                with lock:
+                    totals[name] += time.perf_counter() - start
+        return stage
+
+    resolver.REPO_STAGES = tuple((name, timed(name, function))
+                                 for name, function in resolver.REPO_STAGES)
+
+
+def current_label() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(arguments: argparse.Namespace) -> Dict:
+    """
+    Tworzy repozytoria i wykonuje resolver.execute_script
+
+    Parameters
+    ----------
+    arguments : argparse.Namespace
+        parametry benchmarku
+    Returns
+    -------
+    Dict
+        rekord z wynikami
+    """
+    counter = ProcessCounter()
+    stages: Dict[str, float] = defaultdict(float)
+    with tempfile.TemporaryDirectory() as directory:
+        create_repositories(directory, arguments.repos, arguments.files, arguments.file_size,
+                            arguments.match_density)
+        config_file = write_config(directory, arguments)
+        stub = BitbucketStub([(f"{{user{number}}}", f"User {number}")
+                              for number in range(10)]).start()
+        bitbucketclient.API_URL = stub.url
+        counter.install()
+        time_stages(stages)
+        cwd, argv = os.getcwd(), sys.argv
+        os.chdir(os.path.join(directory, "work"))
+        sys.argv = ["resolver.py", "-p", config_file, "-j", str(arguments.jobs)]
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = resolver.execute_script()
+        finally:
+            wall = time.perf_counter() - start
+            os.chdir(cwd)
+            sys.argv = argv
+            stub.stop()
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    statuses: Dict[str, int] = defaultdict(int)
+    for result in results:
+        statuses[result.status] += 1
+    return {
+        "label": arguments.label or current_label(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": {name: getattr(arguments, name) for name in PARAMETERS},
+        "wall": round(wall, 3),
+        "stages": {name: round(seconds, 3) for name, seconds in stages.items()},
+        "statuses": dict(statuses),
+        "subprocesses": counter.count,
+        "api_calls": len(stub.requests),
+        "pull_requests": len(stub.pull_requests),
+        "peak_rss_kb": after.ru_maxrss,
+        "children_peak_rss_kb": children.ru_maxrss,
+        "context_switches": (after.ru_nvcsw - before.ru_nvcsw
+                             + after.ru_nivcsw - before.ru_nivcsw),
+        "block_io": (after.ru_inblock - before.ru_inblock
+                     + after.ru_oublock - before.ru_oublock),
+    }
+
+
+def previous_result(filename: str, parameters: Dict) -> Optional[Dict]:
+    """
+    Zwraca ostatni zapisany wynik o tych samych parametrach
+
+    Parameters
+    ----------
+    filename : str
+        plik z wynikami
+    parameters : Dict
+        parametry benchmarku
+    Returns
+    -------
+    Optional[Dict]
+        rekord z wynikami lub None
+    """
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as file:
+        records: List[Dict] = [json.loads(line) for line in file if line.strip()]
+    matching = [record for record in records if record.get("parameters") == parameters]
+    return matching[-1] if matching else None
+
+
+def main():
+    arguments = parse_args()
+    record = run(arguments)
+    previous = previous_result(arguments.results, record["parameters"])
+    with open(arguments.results, "a") as file:
+        file.write(json.dumps(record) + "\n")
+    print(json.dumps(record, indent=2))
+    if previous is not None:
+        change = (record["wall"] - previous["wall"]) / previous["wall"]
+        print(f"wall time {previous['wall']}s ({previous['label']}) -> "
+              f"{record['wall']}s ({record['label']}): {change:+.1%}")
+        if change > arguments.max_regression:
+            print(f"Regression above {arguments.max_regression:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
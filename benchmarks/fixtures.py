@@ -0,0 +1,73 @@
+"""
+Wspolne elementy benchmarkow: syntetyczne repozytoria z bare origin oraz licznik
+procesow gita tworzonych przez GitPython
+"""
+import random
+from typing import List
+
+import git.cmd
+
+from repofixtures import create_origin
+
+MATCH = "useJUnitPlatform"
+FILLER = "dependencies { implementation 'org.example:library:1.0' }\n"
+
+
+class ProcessCounter:
+    """
+    Zamiennik git.cmd.safer_popen liczacy procesy tworzone przez GitPython
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.popen = git.cmd.safer_popen
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self.popen(*args, **kwargs)
+
+    def install(self):
+        git.cmd.safer_popen = self
+
+
+def create_repositories(directory: str, count: int, files: int = 1, file_size: int = 0,
+                        match_density: float = 1.0, seed: int = 0) -> List[str]:
+    """
+    Tworzy repozytoria z bare origin i jednym commitem na masterze. Kazde repozytorium
+    ma files plikow .gradle o rozmiarze okolo file_size bajtow, a ciag MATCH zawiera
+    czesc plikow okreslona przez match_density
+
+    Parameters
+    ----------
+    directory : str
+        katalog na repozytoria, robocze tworzone sa w directory/work,
+        bare origin w directory/origins
+    count : int
+        liczba repozytoriow
+    files : int
+        liczba plikow w repozytorium
+    file_size : int
+        przyblizony rozmiar pliku w bajtach
+    match_density : float
+        czesc plikow zawierajacych MATCH, od 0 do 1
+    seed : int
+        ziarno losowania plikow z MATCH
+    Returns
+    -------
+    List[str]
+        sciezki do repozytoriow roboczych
+    """
+    generator = random.Random(seed)
+    filler = FILLER * max(1, file_size // len(FILLER))
+    paths = []
+    for number in range(count):
+        contents = {}
+        for index in range(files):
+            match = f"test {{ {MATCH}() }}\n" if generator.random() < match_density else ""
+            contents[f"module{index}.gradle"] = filler + match
+        repo, origin = create_origin(directory, f"repo{number}", contents,
+                                     ("benchmark", "benchmark@example.com"))
+        repo.close()
+        origin.close()
+        paths.append(repo.working_dir)
+    return paths
@@ -0,0 +1,74 @@
+"""
+Benchmark backendow gitowych z gitbackend.py
+
+Tworzy N lokalnych repozytoriow z bare origin, po czym dla kazdego backendu wykonuje
+w kazdym repozytorium operacje etapow resolver.py: checkout do mastera, utworzenie
+brancha, zmiane pliku, add z commitem oraz push. Liczy procesy gita utworzone przez
+GitPython i mierzy czas.
+
+np. python benchmarks/git_backend.py --repos 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+from git import Repo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gitbackend  # noqa: E402
+from benchmarks.fixtures import ProcessCounter, create_repositories  # noqa: E402
+
+COUNTER = ProcessCounter()
+
+
+def run_backend(paths: List[str], backend: str) -> Tuple[int, float]:
+    """
+    Wykonuje operacje gitowe resolver.py w kazdym repozytorium
+
+    Parameters
+    ----------
+    paths : List[str]
+        sciezki do repozytoriow roboczych
+    backend : str
+        cli lub native
+    Returns
+    -------
+    Tuple[int, float]
+        liczba procesow gita i czas w sekundach
+    """
+    COUNTER.count = 0
+    start = time.perf_counter()
+    for path in paths:
+        repo = gitbackend.open_repo(path, backend)
+        gitbackend.prepare_branch(repo, backend, False, True, False, "master", backend)
+        changed = os.path.join(path, "module0.gradle")
+        with open(changed, "w") as file:
+            file.write(f"junit() {backend}\n")
+        gitbackend.commit_files(repo, backend, [changed], "benchmark")
+        gitbackend.push_branch(repo)
+        repo.close()
+    return COUNTER.count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repos", type=int, default=100, help='Number of repositories')
+    arguments = parser.parse_args()
+    COUNTER.install()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = create_repositories(directory, arguments.repos)
+        print(f"{'backend':<8}  {'repos':>5}  {'processes':>9}  {'per repo':>8}  seconds")
+        for backend in gitbackend.GIT_BACKENDS:
+            for path in paths:
+                Repo(path).git.checkout("master")
+            processes, seconds = run_backend(paths, backend)
+            print(f"{backend:<8}  {len(paths):>5}  {processes:>9}  "
+                  f"{processes / len(paths):>8.1f}  {seconds:.2f}")
+
+
+if __name__ == '__main__':
+    main()
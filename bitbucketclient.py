@@ -0,0 +1,237 @@
+"""
+Wspolny klient API bitbucketa
+
+Wszystkie zapytania do bitbucketa (gitaction.py, uidsread.py, resolver.py) przechodza
+przez jeden obiekt BitbucketClient na credentiale. Klient trzyma requests.Session
+z pula polaczen (keep-alive), wiec polaczenie TCP+TLS i naglowek autoryzacji nie
+sa tworzone przy kazdym zapytaniu. Zapytania maja timeout, a odpowiedzi 502/503/504
+zapytan idempotentnych (GET) sa powtarzane z wykladniczym opoznieniem. Zapytania POST
+(np. tworzenie pull requesta) sa powtarzane tylko gdy nie udalo sie nawiazac polaczenia,
+bo serwer mogl juz wykonac zapytanie, na ktore odpowiedzial bledem.
+
+Wszystkie zapytania dla jednego uzytkownika przechodza przez wspolny
+ratelimit.TokenBucket, ktory rozklada je w czasie zgodnie z godzinnym limitem
+bitbucketa. Odpowiedz 429 wstrzymuje wszystkie watki na czas z Retry-After, po czym
+zapytanie jest powtarzane. Funkcja configure_rate_limit ustawia limit oraz katalog,
+w ktorym zapisywany jest pozostaly budzet, a close_rate_limits zapisuje go na koniec
+uruchomienia.
+
+Adres API mozna zmienic zmienna srodowiskowa BITBUCKET_API_URL, np. na lokalny
+serwer testowy.
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+import metrics
+import ratelimit
+from credentials import BitbucketCredentials
+
+API_URL = os.environ.get("BITBUCKET_API_URL", "https://api.bitbucket.org/2.0")
+TIMEOUT = 30
+RETRIES = 5
+BACKOFF = 0.5
+POOL_SIZE = 16
+RETRY_STATUSES = (502, 503, 504)
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_FILE = "ratelimit-{}.json"
+
+_clients: Dict[Tuple[str, str, str], "BitbucketClient"] = {}
+_limiters: Dict[str, ratelimit.TokenBucket] = {}
+_rate_limit = ratelimit.DEFAULT_LIMIT
+_rate_limit_directory: Optional[str] = None
+_clients_lock = threading.Lock()
+
+
+class BitbucketClient:
+    """
+    Klient API bitbucketa z pula polaczen, timeoutami i ponawianiem zapytan
+
+    Atrybuty
+    ----------
+    base_url : str
+        adres API bitbucketa
+    timeout : float
+        timeout pojedynczego zapytania w sekundach
+    session : requests.Session
+        sesja z pula polaczen i autoryzacja
+    limiter : TokenBucket
+        limit zapytan, wspolny dla klientow tego samego uzytkownika
+    """
+
+    def __init__(self, credentials: BitbucketCredentials, base_url: str = API_URL,
+                 timeout: float = TIMEOUT, retries: int = RETRIES, backoff: float = BACKOFF,
+                 pool_size: int = POOL_SIZE, limiter: Optional[ratelimit.TokenBucket] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limiter = limiter or ratelimit.TokenBucket()
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(credentials.username, credentials.appkey)
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        """
+        Zwraca pelny adres dla sciezki API. Pelne adresy (np. linki next) sa zwracane bez zmian
+
+        Parameters
+        ----------
+        path : str
+            sciezka wzgledem adresu API lub pelny adres
+        Returns
+        -------
+        str
+            pelny adres zapytania
+        """
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """
+        Wykonuje zapytanie GET
+
+        Parameters
+        ----------
+        path : str
+            sciezka wzgledem adresu API lub pelny adres
+        Returns
+        -------
+        requests.Response
+            odpowiedz serwera
+        """
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        """
+        Wykonuje zapytanie POST
+
+        Parameters
+        ----------
+        path : str
+            sciezka wzgledem adresu API lub pelny adres
+        Returns
+        -------
+        requests.Response
+            odpowiedz serwera
+        """
+        return self.request("POST", path, **kwargs)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Wykonuje zapytanie przez wspolna sesje z domyslnym timeoutem. Kazde zapytanie
+        czeka na token limitu, a odpowiedz 429 jest powtarzana po pauzie
+
+        Parameters
+        ----------
+        method : str
+            metoda HTTP
+        path : str
+            sciezka wzgledem adresu API lub pelny adres
+        Returns
+        -------
+        requests.Response
+            odpowiedz serwera
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for _ in range(RATE_LIMIT_RETRIES):
+            self.limiter.acquire()
+            with metrics.METRICS.timer("api_request", method=method):
+                response = self.session.request(method, self.url(path), **kwargs)
+            metrics.METRICS.increment("api_calls", method=method,
+                                      status=str(response.status_code))
+            self.limiter.update(response.status_code, response.headers)
+            if response.status_code != 429:
+                break
+        return response
+
+    def close(self):
+        """
+        Zamyka polaczenia z puli
+        """
+        self.session.close()
+
+
+def get_client(credentials: BitbucketCredentials, base_url: str = None) -> BitbucketClient:
+    """
+    Zwraca wspolnego klienta dla credentiali, tworzy go przy pierwszym wywolaniu
+
+    Parameters
+    ----------
+    credentials : BitbucketCredentials
+        credentiale do bitbucketa
+    base_url : str
+        adres API bitbucketa, domyslnie API_URL
+    Returns
+    -------
+    BitbucketClient
+        wspolny klient
+    """
+    base_url = base_url or API_URL
+    key = (credentials.username, credentials.appkey, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = BitbucketClient(credentials, base_url,
+                                                     limiter=get_limiter(credentials))
+        return client
+
+
+def get_limiter(credentials: BitbucketCredentials) -> ratelimit.TokenBucket:
+    """
+    Zwraca wspolny limit zapytan dla uzytkownika, wywolywana pod _clients_lock
+
+    Parameters
+    ----------
+    credentials : BitbucketCredentials
+        credentiale do bitbucketa
+    Returns
+    -------
+    TokenBucket
+        limit zapytan uzytkownika
+    """
+    limiter = _limiters.get(credentials.username)
+    if limiter is None:
+        state_file = None
+        if _rate_limit_directory:
+            state_file = os.path.join(_rate_limit_directory,
+                                      RATE_LIMIT_FILE.format(credentials.username))
+        limiter = _limiters[credentials.username] = ratelimit.TokenBucket(
+            _rate_limit, state_file=state_file)
+    return limiter
+
+
+def configure_rate_limit(directory: Optional[str], limit: int = ratelimit.DEFAULT_LIMIT):
+    """
+    Ustawia limit zapytan na godzine oraz katalog z zapisanym budzetem dla limitow
+    tworzonych po wywolaniu funkcji
+
+    Parameters
+    ----------
+    directory : Optional[str]
+        katalog na pliki ze stanem limitu, None wylacza zapis
+    limit : int
+        liczba zapytan na godzine
+    """
+    global _rate_limit, _rate_limit_directory
+    with _clients_lock:
+        _rate_limit, _rate_limit_directory = limit, directory
+
+
+def close_rate_limits():
+    """
+    Zapisuje stan wszystkich limitow zapytan, wywolywana na koniec uruchomienia
+    """
+    with _clients_lock:
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        limiter.close()
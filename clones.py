@@ -0,0 +1,102 @@
+"""
+Tryb pracy na repozytoriach, ktore nie sa sklonowane lokalnie
+
+Dla kazdego adresu z listy tworzony jest klon:
+- plytki (--depth 1) i czesciowy (--filter=blob:none), wiec pobierany jest tylko
+  ostatni commit mastera bez zawartosci plikow,
+- z rzadkim checkoutem (sparse-checkout) ograniczonym do plikow o podanych
+  rozszerzeniach, wiec pobierane i zapisywane na dysku sa tylko te pliki.
+Pozostale pliki zostaja w indeksie, dlatego commit zawiera cale drzewo, a push
+na origin dziala jak z pelnego klonu. Klon jest usuwany po przetworzeniu repozytorium.
+
+Definiuje funkcje z ktorych korzysta resolver.py
+"""
+import os
+import shutil
+import sys
+from typing import Dict, Iterable, List
+
+from git import Git
+
+import inventory
+
+
+def read_remote_urls(filename: str) -> Dict[str, str]:
+    """
+    Wczytuje liste adresow repozytoriow (jeden na linie, # rozpoczyna komentarz).
+    Zwraca blad gdy dwa adresy daja te sama nazwe repozytorium
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku z lista adresow
+    Returns
+    -------
+    Dict[str, str]
+        nazwa repozytorium => adres
+    """
+    urls = {}
+    for url in inventory.read_list_file(filename):
+        name = remote_name(url)
+        if name in urls:
+            print(f"Repositories {urls[name]} and {url} have the same name {name}")
+            sys.exit(1)
+        urls[name] = url
+    return urls
+
+
+def remote_name(url: str) -> str:
+    """
+    Zwraca nazwe repozytorium z adresu, np. repo dla git@bitbucket.org:workspace/repo.git
+
+    Parameters
+    ----------
+    url : str
+        adres repozytorium
+    Returns
+    -------
+    str
+        ostatni element adresu bez .git
+    """
+    name = url.rstrip("/").replace(":", "/").rsplit("/", 1)[-1]
+    return name[:-len(".git")] if name.endswith(".git") else name
+
+
+def clone_repository(url: str, path: str, master: str, extensions: Iterable[str]):
+    """
+    Tworzy plytki, czesciowy klon galezi master z rzadkim checkoutem plikow
+    o podanych rozszerzeniach
+
+    Parameters
+    ----------
+    url : str
+        adres repozytorium
+    path : str
+        katalog klonu, nie moze istniec
+    master : str
+        nazwa galezi master
+    extensions : Iterable[str]
+        rozszerzenia plikow pobieranych do drzewa roboczego
+    """
+    Git().clone("--depth", "1", "--filter=blob:none", "--no-checkout",
+                "--branch", master, url, path)
+    git = Git(path)
+    git.sparse_checkout("set", "--no-cone", *sparse_patterns(extensions))
+    git.checkout(master)
+
+
+def sparse_patterns(extensions: Iterable[str]) -> List[str]:
+    return [f"*.{ext}" for ext in extensions]
+
+
+def remove_clone(path: str):
+    """
+    Usuwa klon, brak katalogu nie jest bledem
+
+    Parameters
+    ----------
+    path : str
+        katalog klonu
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
@@ -18,8 +18,8 @@ from typing import List, Dict, Tuple
 
 import requests
 from git import Repo
-from requests.auth import HTTPBasicAuth
 
+import asyncbitbucket
 import credentials
 import uidsread
 
@@ -54,7 +54,8 @@ def make_action():
 def create_pr_request(json: Dict, workspace: str, project: str,
                       cred: credentials.BitbucketCredentials):
     """
-    Metoda tworzaca pull requesta na bitbuckecie
+    Metoda tworzaca pull requesta na bitbuckecie. Synchroniczna nakladka na
+    asyncbitbucket.create_pull_requests dla jednego pull requesta
 
     Parameters
     ----------
@@ -68,16 +69,32 @@ def create_pr_request(json: Dict, workspace: str, project: str,
         credentiale dla bitbucketa
     Returns
     -------
-    ClassWithFlags
-        klasa z wartoscami logicznymi
+    bool
+        True gdy pull request zostal utworzony
+    """
+    pull_request = asyncbitbucket.PullRequest(workspace, project, json)
+    request = asyncbitbucket.create_pull_requests([pull_request], cred)[0]
+    return report_pr_response(request)
+
+
+def report_pr_response(request: requests.Response) -> bool:
+    """
+    Wypisuje wynik tworzenia pull requesta
+
+    Parameters
+    ----------
+    request : requests.Response
+        odpowiedz bitbucketa
+    Returns
+    -------
+    bool
+        True gdy pull request zostal utworzony
     """
-    api_endpoint = f"https://api.bitbucket.org/2.0/repositories/{workspace}/{project}/pullrequests"
-    request = requests.post(url=api_endpoint, json=json,
-                            auth=HTTPBasicAuth(cred.username, cred.appkey))
     if request.status_code == 201:
         print("pull request created successfully")
-    else:
-        print("cant create pr!", request.content)
+        return True
+    print("cant create pr!", request.content)
+    return False
 
 
 def execute_git_action(arg: argparse.Namespace, repo: Repo, branch: str):
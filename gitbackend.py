@@ -0,0 +1,339 @@
+"""
+Sposoby wykonywania operacji gitowych na repozytorium
+
+Backend cli wywoluje osobny proces gita dla kazdej operacji (stash, checkout, pull,
+checkout -b, add, commit, push). Backend native wykonuje lokalne operacje przez
+obiekty GitPython bez tworzenia procesow:
+- checkout do mastera jest pomijany gdy repozytorium juz jest na masterze,
+- nowy branch tworzony jest przez zapis referencji i HEAD (wskazuje na ten sam
+  commit, wiec drzewo robocze sie nie zmienia),
+- add i commit wykonywane sa przez repo.index. Repozytorium otwierane jest z baza
+  obiektow GitDB z pakietu gitdb, ktora czyta luzne obiekty i paczki oraz zapisuje
+  obiekty w pythonie, bez procesow git hash-object i git cat-file --batch.
+Procesu wymagaja tylko stash, pull i push. Dla checkoutu, brancha, zmiany pliku, commita
+i pusha (benchmarks/git_backend.py) backend cli uruchamia 5 procesow na repozytorium,
+a native 1 (push).
+
+repo.index.add nie uruchamia filtrow clean/smudge (np. git-lfs), nie normalizuje
+konca linii (core.autocrlf, atrybuty text i eol) i nie podpisuje commitow
+(commit.gpgsign). Dlatego gdy konfiguracja gita lub pliki .gitattributes wlaczaja
+ktoras z tych funkcji, add i commit wykonywane sa przez proces gita, tak jak w cli.
+
+Zamiast zmieniac drzewo robocze uzytkownika (stash, checkout, pull) zmiany moga byc
+wykonywane w tymczasowym worktree (create_worktree), tworzonym z pobranego mastera
+z origin dla nowej galezi i usuwanym po wyslaniu zmian (remove_worktree).
+
+fetch i operacje na worktree zmieniaja wspolne referencje i pliki .lock repozytorium,
+dlatego wykonywane sa pod blokada repository_lock (flock na pliku w katalogu .git),
+ktora szereguje je miedzy watkami i rownoleglymi uruchomieniami resolvera.
+
+Definiuje funkcje z ktorych korzysta resolver.py
+"""
+import contextlib
+import fcntl
+import os
+from typing import Iterable, Iterator, List
+
+from git import Repo, GitCommandError, GitDB
+
+GIT_BACKENDS = ("cli", "native")
+DEFAULT_FETCH_TIMEOUT = 300
+CONVERSION_ATTRIBUTES = ("filter", "text", "eol", "crlf", "ident", "working-tree-encoding")
+LOCK_FILE = "resolver.lock"
+
+
+def open_repo(path: str, backend: str) -> Repo:
+    """
+    Tworzy instancje repozytorium z baza obiektow odpowiednia dla backendu
+
+    Parameters
+    ----------
+    path : str
+        sciezka do repozytorium
+    backend : str
+        cli lub native
+    Returns
+    -------
+    Repo
+        instancja repozytorium
+    """
+    if backend == "native":
+        return Repo(path, odbt=GitDB)
+    return Repo(path)
+
+
+def prepare_branch(repo: Repo, backend: str, stash: bool, checkout_master: bool, pull: bool,
+                   master: str, branch: str, fetched: bool = False):
+    """
+    Wykonuje stash, checkout do mastera, pull, oraz tworzenie nowej galezi w zaleznosci
+    od podanych wartosci logicznych. Gdy zmiany zostaly juz pobrane przez fetch, pull
+    zastepowany jest przez fast-forward do galezi sledzonej
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    backend : str
+        cli lub native
+    stash : bool
+        zrob stash przed zmianami
+    checkout_master : bool
+        zmien branch na master
+    pull : bool
+        zrob pull przed zmianami
+    master : str
+        nazwa galezi master
+    branch : str
+        nazwa brancha do utworzenia i checkout
+    fetched : bool
+        zmiany z origin zostaly pobrane wczesniej przez fetch
+    """
+    if stash:
+        repo.git.stash('save')
+    if checkout_master and (backend == "cli" or not is_on_branch(repo, master)):
+        repo.git.checkout(master)
+    if pull and fetched:
+        repo.git.merge('--ff-only', '@{upstream}')
+    elif pull:
+        repo.git.pull()
+    if branch:
+        if backend == "cli":
+            repo.git.checkout('-b', branch)
+        else:
+            create_and_checkout_branch(repo, branch)
+
+
+@contextlib.contextmanager
+def repository_lock(repo: Repo) -> Iterator[None]:
+    """
+    Blokuje repozytorium na czas operacji zmieniajacych wspolne referencje (fetch,
+    worktree). Blokada obejmuje wszystkie worktree repozytorium i inne procesy
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium lub jego worktree
+    """
+    with open(os.path.join(repo.common_dir, LOCK_FILE), "a") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def fetch(repo: Repo, timeout: int = DEFAULT_FETCH_TIMEOUT):
+    """
+    Pobiera zmiany z origin bez zmieniania drzewa roboczego. Proces gita przekraczajacy
+    timeout jest przerywany i zglaszany jest blad
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    timeout : int
+        maksymalny czas w sekundach, 0 wylacza limit
+    """
+    with repository_lock(repo):
+        repo.git.fetch('origin', kill_after_timeout=timeout or None)
+
+
+def is_on_branch(repo: Repo, branch: str) -> bool:
+    """
+    Sprawdza czytajac HEAD, czy repozytorium jest na podanej galezi
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    branch : str
+        nazwa galezi
+    Returns
+    -------
+    bool
+        True gdy HEAD wskazuje na galaz
+    """
+    return not repo.head.is_detached and repo.head.reference.name == branch
+
+
+def create_and_checkout_branch(repo: Repo, branch: str):
+    """
+    Odpowiednik git checkout -b bez tworzenia procesu. Gdy galaz juz istnieje
+    zglaszany jest blad, tak jak w git checkout -b
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    branch : str
+        nazwa brancha do utworzenia
+    """
+    if branch in repo.heads:
+        raise GitCommandError(['git', 'checkout', '-b', branch], 128,
+                              f"fatal: a branch named '{branch}' already exists")
+    repo.head.reference = repo.create_head(branch)
+
+
+def commit_files(repo: Repo, backend: str, files: List[str], message: str):
+    """
+    Dodaje pliki do indeksu i tworzy commita
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    backend : str
+        cli lub native, native przechodzi na cli gdy wymaga tego needs_cli
+    files : List[str]
+        zmienione pliki
+    message : str
+        wiadomosc commita
+    """
+    if backend == "cli" or needs_cli(repo, files):
+        repo.git.add(files)
+        repo.git.commit('-m', message)
+    else:
+        repo.index.add(files)
+        repo.index.commit(message)
+
+
+def needs_cli(repo: Repo, files: Iterable[str]) -> bool:
+    """
+    Sprawdza bez tworzenia procesu, czy add i commit musza byc wykonane przez proces gita:
+    wlaczone jest podpisywanie commitow lub core.autocrlf, albo plik atrybutow
+    (.gitattributes w katalogach zmienionych plikow, info/attributes, core.attributesFile)
+    ustawia filtr lub konwersje konca linii. Sprawdzenie jest zachowawcze, atrybut
+    ustawiony dla dowolnego wzorca wystarczy
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    files : Iterable[str]
+        zmienione pliki
+    Returns
+    -------
+    bool
+        True gdy backend native nie zapisalby plikow i commita tak jak git
+    """
+    config = repo.config_reader()
+    if config.get_value("commit", "gpgsign", False) not in (False, 0) \
+            or config.get_value("core", "autocrlf", False) not in (False, 0):
+        return True
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    global_attributes = config.get_value("core", "attributesFile",
+                                         os.path.join(config_home, "git", "attributes"))
+    paths = {os.path.join(repo.common_dir, "info", "attributes"),
+             os.path.expanduser(str(global_attributes))}
+    root = os.path.abspath(repo.working_dir)
+    for file in files:
+        directory = os.path.dirname(os.path.abspath(os.path.join(root, file)))
+        while directory.startswith(root):
+            paths.add(os.path.join(directory, ".gitattributes"))
+            if directory == root:
+                break
+            directory = os.path.dirname(directory)
+    return any(sets_conversion(path) for path in paths)
+
+
+def sets_conversion(path: str) -> bool:
+    """
+    Sprawdza czy plik atrybutow ustawia (nie tylko wylacza) ktorys z CONVERSION_ATTRIBUTES
+
+    Parameters
+    ----------
+    path : str
+        adres pliku atrybutow, brak pliku nie jest bledem
+    Returns
+    -------
+    bool
+        True gdy ktorys wzorzec ustawia filtr lub konwersje
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            lines = file.readlines()
+    except OSError:
+        return False
+    for line in lines:
+        if line.lstrip().startswith("#"):
+            continue
+        for attribute in line.split()[1:]:
+            if not attribute.startswith(("-", "!")) \
+                    and attribute.split("=", 1)[0] in CONVERSION_ATTRIBUTES:
+                return True
+    return False
+
+
+def push_branch(repo: Repo, atomic: bool = False):
+    """
+    Wysyla obecny branch na origin
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    atomic : bool
+        push z --atomic, origin przyjmuje wszystkie referencje albo zadnej
+    """
+    if atomic:
+        repo.git.push('--atomic', 'origin', 'HEAD')
+    else:
+        repo.git.push('origin', 'HEAD')
+
+
+def create_worktree(repo: Repo, path: str, branch: str, master: str, fetched: bool = False):
+    """
+    Pobiera master z origin i tworzy z niego worktree z nowa galezia. Drzewo robocze
+    repozytorium nie jest zmieniane. Gdy galaz juz istnieje zglaszany jest blad
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    path : str
+        katalog worktree, nie moze istniec
+    branch : str
+        nazwa brancha do utworzenia
+    master : str
+        nazwa galezi master
+    fetched : bool
+        zmiany z origin zostaly pobrane wczesniej przez fetch
+    """
+    with repository_lock(repo):
+        if not fetched:
+            repo.git.fetch('origin', master)
+        repo.git.worktree('prune')
+        repo.git.worktree('add', '-b', branch, path, f'origin/{master}')
+
+
+def attach_worktree(repo: Repo, path: str, branch: str):
+    """
+    Tworzy worktree dla istniejacej galezi, np. przy wznowieniu przerwanego uruchomienia
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    path : str
+        katalog worktree, nie moze istniec
+    branch : str
+        nazwa istniejacego brancha
+    """
+    with repository_lock(repo):
+        repo.git.worktree('prune')
+        repo.git.worktree('add', path, branch)
+
+
+def remove_worktree(repo: Repo, path: str):
+    """
+    Usuwa worktree razem z katalogiem, galaz zostaje w repozytorium
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium z ktorego utworzono worktree
+    path : str
+        katalog worktree
+    """
+    with repository_lock(repo):
+        repo.git.worktree('remove', '--force', path)
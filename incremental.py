@@ -0,0 +1,105 @@
+"""
+Commity na ktorych repozytoria zostaly przetworzone
+
+Dla kazdego klucza uruchomienia (tabela zamian i rozszerzenia) zapisywany jest commit
+na ktorym w repozytorium nie znaleziono zadnego wystapienia. Przy kolejnym uruchomieniu
+z incremental=yes resolver.py przeszukuje tylko pliki zmienione od tego commita. Stan
+przechowywany jest w pliku JSON w katalogu .resolver-cache, zapis laczy wpisy z pliku
+z nowymi, wiec rownolegle uruchomienia nie nadpisuja sobie wynikow.
+
+Definiuje klase ProcessedCommits z ktorej korzysta resolver.py
+"""
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+PROCESSED_FILE = "processed.json"
+
+
+class ProcessedCommits:
+    """
+    Commity przetworzonych repozytoriow dla jednego klucza, bezpieczne dla wielu watkow
+
+    Atrybuty
+    ----------
+    filename : str
+        adres pliku ze stanem
+    key : str
+        klucz uruchomienia
+    commits : Dict[str, str]
+        repozytorium => commit wczytany z pliku lub zapisany w tym uruchomieniu
+    recorded : Dict[str, str]
+        repozytorium => commit zapisany w tym uruchomieniu
+    """
+
+    def __init__(self, directory: str, key: str):
+        self.filename = os.path.join(directory, PROCESSED_FILE)
+        self.key = key
+        self.commits: Dict[str, str] = dict(self.load().get(key, {}))
+        self.recorded: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, str]]:
+        """
+        Wczytuje stan z pliku, brak pliku lub uszkodzony plik daja pusty stan
+
+        Returns
+        -------
+        Dict[str, Dict[str, str]]
+            klucz => repozytorium => commit
+        """
+        try:
+            with open(self.filename) as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def get(self, project: str) -> Optional[str]:
+        """
+        Zwraca commit na ktorym repozytorium zostalo przetworzone
+
+        Parameters
+        ----------
+        project : str
+            nazwa katalogu z repozytorium
+        Returns
+        -------
+        Optional[str]
+            sha commita lub None gdy repozytorium nie bylo przetworzone
+        """
+        with self.lock:
+            return self.commits.get(project)
+
+    def record(self, project: str, commit: str):
+        """
+        Zapamietuje commit na ktorym repozytorium zostalo przetworzone
+
+        Parameters
+        ----------
+        project : str
+            nazwa katalogu z repozytorium
+        commit : str
+            sha commita
+        """
+        with self.lock:
+            self.commits[project] = commit
+            self.recorded[project] = commit
+
+    def save(self):
+        """
+        Dopisuje commity zapamietane w tym uruchomieniu do pliku, zapis jest atomowy
+        """
+        with self.lock:
+            if not self.recorded:
+                return
+            state = self.load()
+            state.setdefault(self.key, {}).update(self.recorded)
+            directory = os.path.dirname(self.filename)
+            os.makedirs(directory, exist_ok=True)
+            descriptor, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w") as file:
+                json.dump(state, file)
+            os.replace(temp, self.filename)
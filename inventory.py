@@ -0,0 +1,152 @@
+"""
+Wybor repozytoriow do przetworzenia przez resolver.py
+
+Repozytoria moga byc:
+- podkatalogami obecnego katalogu (domyslnie, jak wczesniej),
+- wyszukane rekurencyjnie: katalog zawierajacy .git jest repozytorium i nie jest
+  przeszukiwany glebiej, a poddrzewa przeszukiwane sa rownolegle,
+- podane w pliku z lista repozytoriow (jedna sciezka wzgledem obecnego katalogu na
+  linie, # rozpoczyna komentarz), wtedy katalogi nie sa w ogole przeszukiwane.
+Liste mozna zawezic wzorcami include i exclude (fnmatch na sciezce wzglednej,
+np. payments/* lub */legacy-*).
+
+Definiuje funkcje list_repositories z ktorej korzysta resolver.py
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from typing import Iterator, List, Optional, Sequence
+
+
+def list_repositories(root: str, recursive: bool = False, include: Sequence[str] = (),
+                      exclude: Sequence[str] = (), repositories_file: Optional[str] = None,
+                      ignored: Sequence[str] = (), workers: int = 1) -> List[str]:
+    """
+    Zwraca posortowane sciezki repozytoriow wzgledem root
+
+    Parameters
+    ----------
+    root : str
+        katalog z repozytoriami
+    recursive : bool
+        szukaj repozytoriow rekurencyjnie zamiast brac podkatalogi root
+    include : Sequence[str]
+        wzorce sciezek, gdy podane zwracane sa tylko pasujace repozytoria
+    exclude : Sequence[str]
+        wzorce sciezek pomijanych repozytoriow
+    repositories_file : Optional[str]
+        plik z lista repozytoriow, zastepuje przeszukiwanie katalogow
+    ignored : Sequence[str]
+        nazwy katalogow pomijanych w root (np. katalog z cache)
+    workers : int
+        liczba watkow przeszukujacych poddrzewa przy recursive
+    Returns
+    -------
+    List[str]
+        sciezki repozytoriow wzgledem root
+    """
+    if repositories_file:
+        projects = read_repositories_file(repositories_file)
+    else:
+        top = [entry.name for entry in os.scandir(root)
+               if entry.is_dir() and entry.name not in ignored]
+        if recursive:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                found = executor.map(lambda name: list(find_repositories(root, name)),
+                                     [name for name in top if not name.startswith(".")])
+                projects = [project for projects in found for project in projects]
+        else:
+            projects = top
+    return sorted(project for project in projects if matches(project, include, exclude))
+
+
+def find_repositories(root: str, relative: str) -> Iterator[str]:
+    """
+    Przeszukuje katalog rekurencyjnie i zwraca repozytoria, nie wchodzac do ich wnetrza.
+    Katalogi ukryte i dowiazania symboliczne do katalogow sa pomijane
+
+    Parameters
+    ----------
+    root : str
+        katalog z repozytoriami
+    relative : str
+        przeszukiwany katalog wzgledem root
+    Returns
+    -------
+    Iterator[str]
+        sciezki repozytoriow wzgledem root
+    """
+    path = os.path.join(root, relative)
+    if os.path.exists(os.path.join(path, ".git")):
+        yield relative
+        return
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return
+    for entry in entries:
+        if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+            yield from find_repositories(root, os.path.join(relative, entry.name))
+
+
+def matches(project: str, include: Sequence[str], exclude: Sequence[str]) -> bool:
+    """
+    Sprawdza czy sciezka repozytorium pasuje do wzorcow include i nie pasuje do exclude
+
+    Parameters
+    ----------
+    project : str
+        sciezka repozytorium wzgledem katalogu z repozytoriami
+    include : Sequence[str]
+        wzorce wymagane, puste oznacza wszystkie repozytoria
+    exclude : Sequence[str]
+        wzorce pomijane
+    Returns
+    -------
+    bool
+        True gdy repozytorium ma byc przetworzone
+    """
+    path = project.replace(os.sep, "/")
+    if include and not any(fnmatch(path, pattern) for pattern in include):
+        return False
+    return not any(fnmatch(path, pattern) for pattern in exclude)
+
+
+def read_repositories_file(filename: str) -> List[str]:
+    """
+    Wczytuje liste repozytoriow, zwraca blad gdy plik nie istnieje
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku z lista repozytoriow
+    Returns
+    -------
+    List[str]
+        sciezki repozytoriow
+    """
+    return [os.path.normpath(line) for line in read_list_file(filename)]
+
+
+def read_list_file(filename: str) -> List[str]:
+    """
+    Wczytuje niepuste linie pliku bez komentarzy (# do konca linii),
+    zwraca blad gdy plik nie istnieje
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku z lista
+    Returns
+    -------
+    List[str]
+        wartosci z kolejnych linii
+    """
+    try:
+        with open(filename) as file:
+            lines = [line.split("#", 1)[0].strip() for line in file]
+    except OSError as error:
+        print(f"Can't read repositories file {filename} ", error)
+        sys.exit(1)
+    return [line for line in lines if line]
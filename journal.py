@@ -0,0 +1,130 @@
+"""
+Dziennik uruchomienia resolver.py pozwalajacy wznowic przerwane uruchomienie
+
+Dziennik jest plikiem JSONL w katalogu .resolver-cache, osobnym dla kazdych ustawien
+uruchomienia (nazwa pliku zawiera skrot klucza uruchomienia). Pierwszy rekord opisuje
+uruchomienie (tabela zamian, wiadomosc commita, branch), kolejne zapisywane sa po
+kazdym zakonczonym etapie repozytorium. resolver.py --resume wczytuje dziennik
+i pomija etapy juz zakonczone, wiec ponownie wykonywane sa tylko etapy ktore sie
+nie udaly lub nie zostaly rozpoczete. Otwarty dziennik jest zablokowany (flock),
+wiec drugie uruchomienie z tymi samymi ustawieniami konczy sie bledem zamiast
+nadpisywac dziennik pierwszego.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Dict
+
+JOURNAL_FILE = "journal-{}.jsonl"
+
+
+def journal_filename(directory: str, run_key: str) -> str:
+    """
+    Zwraca adres dziennika dla ustawien uruchomienia
+
+    Parameters
+    ----------
+    directory : str
+        katalog z dziennikami
+    run_key : str
+        identyfikator ustawien uruchomienia
+    Returns
+    -------
+    str
+        adres pliku dziennika
+    """
+    digest = hashlib.sha1(run_key.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(directory, JOURNAL_FILE.format(digest))
+
+
+class Journal:
+    """
+    Dziennik zakonczonych etapow repozytoriow, dopisywany po kazdym etapie
+
+    Atrybuty
+    ----------
+    filename : str
+        adres pliku z dziennikiem
+    run_key : str
+        identyfikator ustawien uruchomienia
+    entries : Dict[str, Dict[str, Dict]]
+        projekt => etap => rekord etapu wczytany przy wznowieniu
+    """
+
+    def __init__(self, filename: str, run_key: str, resume: bool = False):
+        self.filename = filename
+        self.run_key = run_key
+        self.entries: Dict[str, Dict[str, Dict]] = {}
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        self.file = open(filename, "a")
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.file.close()
+            print(f"Journal {filename} is used by another run with the same settings")
+            sys.exit(1)
+        if resume and self.file.tell() > 0:
+            self.load()
+        else:
+            self.file.truncate(0)
+            self.write({"run": run_key})
+
+    def load(self):
+        """
+        Wczytuje rekordy z dziennika, zwraca blad gdy dziennik dotyczy innych ustawien
+        """
+        try:
+            with open(self.filename) as file:
+                records = [json.loads(line) for line in file if line.strip()]
+        except (OSError, ValueError) as error:
+            print(f"Can't read journal {self.filename} ", error)
+            sys.exit(1)
+        if not records or records[0].get("run") != self.run_key:
+            print(f"Journal {self.filename} was written for different replacements, "
+                  f"commit message or branch, run without --resume")
+            sys.exit(1)
+        for record in records[1:]:
+            self.entries.setdefault(record["project"], {})[record["stage"]] = record
+
+    def completed(self, project: str) -> Dict[str, Dict]:
+        """
+        Zwraca zakonczone etapy projektu
+
+        Parameters
+        ----------
+        project : str
+            nazwa katalogu z repozytorium
+        Returns
+        -------
+        Dict[str, Dict]
+            etap => rekord etapu
+        """
+        return dict(self.entries.get(project, {}))
+
+    def record(self, project: str, stage: str, **data):
+        """
+        Dopisuje rekord zakonczonego etapu
+
+        Parameters
+        ----------
+        project : str
+            nazwa katalogu z repozytorium
+        stage : str
+            nazwa etapu
+        """
+        self.write(dict(project=project, stage=stage, **data))
+
+    def write(self, record: Dict):
+        with self.lock:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def close(self):
+        """
+        Zamyka plik dziennika i zwalnia jego blokade
+        """
+        self.file.close()
@@ -0,0 +1,49 @@
+"""
+Zapis i odczyt manifestu zmian tworzonego przez resolver.py --plan
+
+Manifest jest plikiem JSONL z jednym rekordem na repozytorium. Rekord zawiera
+nazwe projektu, klucz tabeli zamian, pliki do zmiany z liczba wystapien, liczbe
+bajtow zmienianych plikow, pominiete pliki oraz czasy poszczegolnych etapow.
+resolver.py --apply wykonuje dokladnie zmiany z manifestu bez ponownego
+przeszukiwania repozytoriow.
+"""
+import json
+import sys
+from typing import Dict, List
+
+
+def write_manifest(filename: str, records: List[Dict]):
+    """
+    Zapisuje rekordy do pliku JSONL
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku z manifestem
+    records : List[Dict]
+        rekordy dla repozytoriow
+    """
+    with open(filename, "w") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_manifest(filename: str) -> List[Dict]:
+    """
+    Wczytuje rekordy z pliku JSONL, zwraca blad gdy plik nie istnieje lub jest niepoprawny
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku z manifestem
+    Returns
+    -------
+    List[Dict]
+        rekordy dla repozytoriow
+    """
+    try:
+        with open(filename) as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except (OSError, ValueError) as error:
+        print(f"Can't read manifest {filename} ", error)
+        sys.exit(1)
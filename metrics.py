@@ -0,0 +1,159 @@
+"""
+Pomiary czasu i liczniki dla resolver.py
+
+Timery (context manager timer) sumuja czas i liczbe wykonan etapow, np. etapow potoku,
+operacji gitowych czy zapytan do API bitbucketa. Liczniki zliczaja pliki, bajty
+i zapytania. Pomiary moga miec etykiety (np. stage="push") i sa eksportowane na koniec
+uruchomienia jako JSON lub w formacie tekstowym Prometheusa.
+
+Wspolny rejestr METRICS jest uzywany przez resolver.py i bitbucketclient.py
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+PREFIX = "resolver"
+EXPORT_FORMATS = ("json", "prometheus")
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Metrics:
+    """
+    Rejestr timerow i licznikow, bezpieczny dla watkow
+
+    Atrybuty
+    ----------
+    timers : Dict[Key, List[float]]
+        (nazwa, etykiety) => [liczba wykonan, suma czasow w sekundach]
+    counters : Dict[Key, float]
+        (nazwa, etykiety) => wartosc licznika
+    """
+
+    def __init__(self):
+        self.timers: Dict[Key, List[float]] = {}
+        self.counters: Dict[Key, float] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name: str, **labels: str):
+        """
+        Mierzy czas wykonania bloku, rowniez gdy blok zakonczy sie wyjatkiem
+
+        Parameters
+        ----------
+        name : str
+            nazwa timera
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            key = make_key(name, labels)
+            with self.lock:
+                timer = self.timers.setdefault(key, [0, 0.0])
+                timer[0] += 1
+                timer[1] += elapsed
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        """
+        Zwieksza licznik o podana wartosc
+
+        Parameters
+        ----------
+        name : str
+            nazwa licznika
+        value : float
+            wartosc o ktora zwiekszany jest licznik
+        """
+        key = make_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        """
+        Usuwa wszystkie pomiary
+        """
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def to_json(self) -> str:
+        """
+        Zwraca pomiary jako JSON
+
+        Returns
+        -------
+        str
+            obiekt z listami timers i counters
+        """
+        with self.lock:
+            timers = [{"name": name, "labels": dict(labels), "count": count,
+                       "seconds": round(seconds, 6)}
+                      for (name, labels), (count, seconds) in sorted(self.timers.items())]
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+        return json.dumps({"timers": timers, "counters": counters}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Zwraca pomiary w formacie tekstowym Prometheusa. Timer to para
+        <nazwa>_seconds_sum i <nazwa>_seconds_count, licznik to <nazwa>_total
+
+        Returns
+        -------
+        str
+            pomiary w formacie Prometheusa
+        """
+        lines = []
+        with self.lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+        for name in sorted({name for (name, _), _ in timers}):
+            metric = f"{PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for (timer_name, labels), (count, seconds) in timers:
+                if timer_name == name:
+                    lines.append(f"{metric}_sum{format_labels(labels)} {seconds:.6f}")
+                    lines.append(f"{metric}_count{format_labels(labels)} {count}")
+        for name in sorted({name for (name, _), _ in counters}):
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in counters:
+                if counter_name == name:
+                    lines.append(f"{metric}{format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename: str, export_format: str = "json"):
+        """
+        Zapisuje pomiary do pliku
+
+        Parameters
+        ----------
+        filename : str
+            adres pliku
+        export_format : str
+            json lub prometheus
+        """
+        content = self.to_prometheus() if export_format == "prometheus" else self.to_json()
+        with open(filename, "w") as file:
+            file.write(content)
+
+
+def make_key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in labels)
+    return "{" + ",".join(f'{label}="{value}"'
+                          for (label, _), value in zip(labels, escaped)) + "}"
+
+
+METRICS = Metrics()
@@ -0,0 +1,113 @@
+"""
+Potok etapow przetwarzajacy elementy na watkach
+
+Kazdy etap ma wlasna liczbe watkow, a etapy polaczone sa kolejkami o ograniczonym
+rozmiarze. Gdy kolejny etap nie nadaza, kolejka sie zapelnia i poprzedni etap czeka
+(backpressure), wiec np. przepisywanie plikow kolejnych repozytoriow odbywa sie
+rownolegle z pushami i tworzeniem pull requestow dla wczesniejszych.
+
+Definiuje klase Stage oraz funkcje run_pipeline z ktorej korzysta resolver.py
+"""
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+DEFAULT_QUEUE_SIZE = 4
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    Klasa opisujaca jeden etap potoku
+
+    Atrybuty
+    ----------
+    name : str
+        nazwa etapu
+    function : Callable[[Any], bool]
+        funkcja przetwarzajaca element, zwraca False gdy element konczy przetwarzanie
+        na tym etapie
+    workers : int
+        liczba watkow etapu
+    """
+
+    name: str
+    function: Callable[[Any], bool]
+    workers: int = 1
+
+
+def run_pipeline(items: Iterable[Any], stages: List[Stage],
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 on_done: Optional[Callable[[Any], None]] = None):
+    """
+    Przepuszcza elementy przez kolejne etapy. Funkcja on_done wywolywana jest dla kazdego
+    elementu, ktory przeszedl wszystkie etapy lub zakonczyl sie wczesniej. Wyjatek
+    z etapu lub z on_done konczy przetwarzanie elementu i jest rzucany ponownie
+    po zakonczeniu potoku
+
+    Parameters
+    ----------
+    items : Iterable[Any]
+        elementy do przetworzenia
+    stages : List[Stage]
+        etapy potoku w kolejnosci
+    queue_size : int
+        maksymalna liczba elementow czekajacych przed kazdym etapem
+    on_done : Optional[Callable[[Any], None]]
+        funkcja wywolywana dla zakonczonych elementow
+    """
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    remaining = [max(1, stage.workers) for stage in stages]
+    lock = threading.Lock()
+    errors: List[BaseException] = []
+
+    def finish(item: Any):
+        if on_done is None:
+            return
+        try:
+            on_done(item)
+        except BaseException as error:
+            with lock:
+                errors.append(error)
+
+    def worker(index: int):
+        stage = stages[index]
+        while True:
+            item = queues[index].get()
+            if item is _DONE:
+                break
+            try:
+                proceed = stage.function(item)
+            except BaseException as error:
+                with lock:
+                    errors.append(error)
+                proceed = False
+            if proceed and index + 1 < len(stages):
+                queues[index + 1].put(item)
+            else:
+                finish(item)
+        with lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last and index + 1 < len(stages):
+            for _ in range(max(1, stages[index + 1].workers)):
+                queues[index + 1].put(_DONE)
+
+    threads = [threading.Thread(target=worker, args=(index,), name=f"{stage.name}-{number}")
+               for index, stage in enumerate(stages)
+               for number in range(max(1, stage.workers))]
+    for thread in threads:
+        thread.start()
+    try:
+        for item in items:
+            queues[0].put(item)
+    finally:
+        for _ in range(max(1, stages[0].workers)):
+            queues[0].put(_DONE)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
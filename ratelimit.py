@@ -0,0 +1,189 @@
+"""
+Ograniczanie liczby zapytan do API bitbucketa
+
+Bitbucket Cloud ogranicza liczbe zapytan na godzine dla uzytkownika. TokenBucket
+rozdziela dostepny budzet: kazde zapytanie zabiera jeden token, a tokeny odnawiaja
+sie rowno w ciagu okna (domyslnie godziny). Gdy tokenow brakuje, zapytanie czeka
+zamiast konczyc sie bledem 429. Budzet jest poprawiany na podstawie naglowkow
+X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset oraz Retry-After.
+
+Stan (pozostale tokeny i pauza) moze byc zapisywany w pliku, dzieki czemu kolejne
+uruchomienie nie przekroczy limitu zuzytego przez poprzednie. Plik zapisywany jest
+przy pauzie, najwyzej raz na SAVE_INTERVAL sekund oraz przy close, a nie po kazdej
+odpowiedzi.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Mapping, Optional
+
+DEFAULT_LIMIT = 1000
+DEFAULT_WINDOW = 3600
+DEFAULT_RETRY_AFTER = 60
+SAVE_INTERVAL = 60
+
+
+class TokenBucket:
+    """
+    Wspolny limit zapytan z odnawianiem tokenow i zapisem stanu
+
+    Atrybuty
+    ----------
+    capacity : float
+        maksymalna liczba tokenow, czyli zapytan w oknie
+    window : float
+        czas w sekundach, w ktorym odnawia sie caly budzet
+    tokens : float
+        obecnie dostepne tokeny
+    paused_until : float
+        czas (time.time) do ktorego zapytania sa wstrzymane
+    state_file : Optional[str]
+        plik ze stanem, None wylacza zapis
+    saved : float
+        czas (time.time) ostatniego zapisu stanu
+    dirty : bool
+        stan zmienil sie od ostatniego zapisu
+    """
+
+    def __init__(self, capacity: float = DEFAULT_LIMIT, window: float = DEFAULT_WINDOW,
+                 state_file: Optional[str] = None):
+        self.capacity = float(capacity)
+        self.window = float(window)
+        self.tokens = self.capacity
+        self.updated = time.time()
+        self.paused_until = 0.0
+        self.state_file = state_file
+        self.saved = 0.0
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.window
+
+    def refill(self, now: float):
+        """
+        Dodaje tokeny odnowione od ostatniej aktualizacji
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Zabiera jeden token, czekajac az bedzie dostepny i minie pauza
+        """
+        while True:
+            with self.lock:
+                now = time.time()
+                self.refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def update(self, status_code: int, headers: Mapping[str, str]):
+        """
+        Poprawia budzet na podstawie odpowiedzi bitbucketa. Stan zapisywany jest gdy
+        odpowiedz wstrzymuje zapytania lub od ostatniego zapisu minelo SAVE_INTERVAL sekund
+
+        Parameters
+        ----------
+        status_code : int
+            status odpowiedzi
+        headers : Mapping[str, str]
+            naglowki odpowiedzi
+        """
+        with self.lock:
+            now = time.time()
+            self.refill(now)
+            limit = headers.get("X-RateLimit-Limit")
+            if limit is not None and limit.isdigit() and int(limit) > 0:
+                self.capacity = float(limit)
+                self.tokens = min(self.tokens, self.capacity)
+            remaining = headers.get("X-RateLimit-Remaining")
+            if remaining is not None and remaining.isdigit():
+                self.tokens = min(self.tokens, float(remaining))
+            pause = rate_limit_pause(status_code, headers, now)
+            if pause:
+                self.paused_until = max(self.paused_until, now + pause)
+            self.dirty = True
+            if pause or now - self.saved >= SAVE_INTERVAL:
+                self.save()
+
+    def close(self):
+        """
+        Zapisuje stan zmieniony od ostatniego zapisu, wywolywana na koniec uruchomienia
+        """
+        with self.lock:
+            if self.dirty:
+                self.save()
+
+    def load(self):
+        """
+        Wczytuje stan z pliku, uwzgledniajac tokeny odnowione od zapisu
+        """
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file) as file:
+                state = json.load(file)
+            tokens, updated = float(state["tokens"]), float(state["updated"])
+            paused_until = float(state.get("paused_until", 0))
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        self.tokens = min(self.capacity, tokens)
+        self.updated = min(updated, time.time())
+        self.paused_until = paused_until
+        self.refill(time.time())
+
+    def save(self):
+        """
+        Zapisuje stan do pliku, zapis jest atomowy. Wywolywana pod self.lock
+        """
+        self.saved, self.dirty = time.time(), False
+        if not self.state_file:
+            return
+        directory = os.path.dirname(self.state_file) or "."
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(descriptor, "w") as file:
+            json.dump({"tokens": self.tokens, "updated": self.updated,
+                       "paused_until": self.paused_until}, file)
+        os.replace(temp, self.state_file)
+
+
+def rate_limit_pause(status_code: int, headers: Mapping[str, str],
+                     now: Optional[float] = None) -> float:
+    """
+    Zwraca liczbe sekund, na ktora nalezy wstrzymac zapytania wedlug naglowkow odpowiedzi
+
+    Parameters
+    ----------
+    status_code : int
+        status odpowiedzi
+    headers : Mapping[str, str]
+        naglowki odpowiedzi
+    now : Optional[float]
+        obecny czas, domyslnie time.time()
+    Returns
+    -------
+    float
+        czas pauzy w sekundach, 0 gdy nie trzeba czekac
+    """
+    now = time.time() if now is None else now
+    retry_after = headers.get("Retry-After")
+    if retry_after is not None and retry_after.isdigit():
+        return float(retry_after)
+    if headers.get("X-RateLimit-Remaining") == "0":
+        reset = headers.get("X-RateLimit-Reset")
+        if reset is not None and reset.isdigit():
+            return max(0.0, int(reset) - now)
+    if status_code == 429:
+        return DEFAULT_RETRY_AFTER
+    return 0.0
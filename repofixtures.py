@@ -0,0 +1,92 @@
+"""
+Repozytoria gitowe tworzone w testach i benchmarkach
+
+Definiuje funkcje create_repository (repozytorium z jednym commitem) oraz create_origin
+(repozytorium robocze z bare origin), z ktorych korzystaja testy w katalogu tests
+i benchmarks/fixtures.py. Modul lezy poza oboma katalogami, zeby benchmarki nie zalezaly
+od testow
+"""
+import os
+from typing import Dict, Tuple
+
+from git import Repo
+
+AUTHOR = ("test", "test@example.com")
+
+
+def create_repository(path: str, files: Dict[str, str], author: Tuple[str, str] = AUTHOR,
+                      message: str = "init") -> Repo:
+    """
+    Tworzy repozytorium na galezi master z ustawionym autorem i jednym commitem
+    z podanymi plikami
+
+    Parameters
+    ----------
+    path : str
+        katalog repozytorium
+    files : Dict[str, str]
+        sciezka wzgledem repozytorium => zawartosc pliku
+    author : Tuple[str, str]
+        user.name i user.email repozytorium
+    message : str
+        wiadomosc commita
+    Returns
+    -------
+    Repo
+        instancja repozytorium
+    """
+    repo = Repo.init(path, initial_branch="master")
+    set_author(repo, author)
+    for name, content in files.items():
+        filename = os.path.join(path, name)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w") as file:
+            file.write(content)
+    repo.git.add(".")
+    repo.git.commit("-m", message)
+    return repo
+
+
+def create_origin(directory: str, name: str, files: Dict[str, str],
+                  author: Tuple[str, str] = AUTHOR) -> Tuple[Repo, Repo]:
+    """
+    Tworzy repozytorium robocze directory/work/<name> z jednym commitem oraz jego bare
+    klon directory/origins/<name>, ustawiony w repozytorium roboczym jako origin
+
+    Parameters
+    ----------
+    directory : str
+        katalog na repozytoria
+    name : str
+        nazwa repozytorium
+    files : Dict[str, str]
+        sciezka wzgledem repozytorium => zawartosc pliku
+    author : Tuple[str, str]
+        user.name i user.email repozytorium roboczego
+    Returns
+    -------
+    Tuple[Repo, Repo]
+        repozytorium robocze i bare origin
+    """
+    work = create_repository(os.path.join(directory, "work", name), files, author)
+    origin = Repo.clone_from(work.working_dir, os.path.join(directory, "origins", name),
+                             bare=True)
+    work.create_remote("origin", origin.working_dir)
+    work.git.fetch("origin")
+    return work, origin
+
+
+def set_author(repo: Repo, author: Tuple[str, str] = AUTHOR):
+    """
+    Ustawia user.name i user.email w konfiguracji repozytorium
+
+    Parameters
+    ----------
+    repo : Repo
+        instancja repozytorium
+    author : Tuple[str, str]
+        user.name i user.email
+    """
+    with repo.config_writer() as config:
+        config.set_value("user", "name", author[0])
+        config.set_value("user", "email", author[1])
@@ -8,6 +8,32 @@ wystawienie pull requesta ze zmianami, dodanie do niego reviowerow, itp.
 
 Skrypt nalezy wykonac w katalogu z repozytoriami gitowymi oraz argumentem -p
 np. resolver.py -p repo-config.txt
+Repozytoria przechodza przez potok etapow: discovery (akcje gitowe i wyszukanie plikow),
+rewrite (zamiana ciagow znakow), commit, push oraz pr (pull request). Etapy polaczone sa
+kolejkami o ograniczonym rozmiarze, wiec przepisywanie plikow kolejnych repozytoriow
+odbywa sie rownolegle z pushami i pull requestami dla wczesniejszych. Wyjscie kazdego
+repozytorium wypisywane jest w calosci po jego zakonczeniu.
+Opcja -j/--jobs N ustawia domyslna liczbe watkow kazdego etapu,
+np. resolver.py -p repo-config.txt -j 8
+Na koniec wypisywana jest tabela z wynikiem dla kazdego repozytorium.
+Opcja --no-cache wylacza cache przeszukiwania plikow.
+Zakonczone etapy kazdego repozytorium zapisywane sa w dzienniku
+.resolver-cache/journal-<klucz>.jsonl, osobnym dla kazdych ustawien uruchomienia.
+Opcja --resume wznawia przerwane uruchomienie: etapy zakonczone wedlug dziennika sa
+pomijane (bez ponownego checkout, tworzenia brancha czy pull requesta), a powtarzane
+sa tylko etapy nieudane lub nierozpoczete.
+Przy two_phase=yes przetwarzanie odbywa sie w dwoch fazach. W pierwszej zmiany sa
+commitowane lokalnie we wszystkich repozytoriach i walidowane poleceniem validate_command,
+bez zadnych zmian na origin. W drugiej zwalidowane repozytoria sa wysylane jednoczesnie
+(git push --atomic), a pull requesty tworzone sa zbiorczo na koniec.
+Opcja --plan manifest.jsonl wyszukuje tylko dopasowania, bez zmian w plikach i bez akcji
+gitowych, i zapisuje manifest zmian (jeden rekord JSON na repozytorium). Opcja
+--apply manifest.jsonl wykonuje zmiany z manifestu bez ponownego przeszukiwania.
+
+Opcja --metrics plik zapisuje na koniec czasy etapow (potoku, operacji gitowych, zapytan
+do API) oraz liczniki plikow, bajtow i zapytan, jako JSON lub w formacie Prometheusa
+(--metrics-format prometheus). Opcja --profile plik uruchamia skrypt pod cProfile
+(rowniez watki potoku), zapisuje statystyki do pliku i wypisuje najdrozsze funkcje.
 
 Przykadowa zawartosc pliku configowego:
 
@@ -24,14 +50,106 @@ workspace=piotrmucha1997
 
 sekcja PROPERTIES => wymagana sekcja z ogolnymi ustawieniami
 commit_message => wiadomosc commita, oraz tytul pull requesta (wymagane)
-str_to_find => ciag znakow ktory zostanie zastopiony we wszystkich repozytoriach (wymagane)
-str_to_repl => string do zastapienia (wymagane)
+str_to_find => ciag znakow ktory zostanie zastopiony we wszystkich repozytoriach (wymagane,
+               chyba ze podano sekcje REPLACEMENTS lub replacements_file)
+str_to_repl => string do zastapienia (wymagane gdy podano str_to_find)
+replacements_file => plik z tabela zamian (opcjonalne). Plik json z obiektem
+                     {"ciag": "zamiana"} lub plik tsv z liniami ciag<TAB>zamiana
 master => branch master w repozytoriach (wymagane)
 checkout_to_master_before_work => skrypt zmienia branch na master we
                                  wszystkich repozytoriach (opcjonalne) przyjmuje wartosci yes/no
 extenions => rozszerzenia zmienianych plików oddzielone spacją (wymagane)
 stash_before_work => zrob stash przed zmianami (opcjonalne) przyjmuje wartosci yes/no
 pull_before_work => zrob pull przed zmianami (opcjonalne) przyjmuje wartosci yes/no
+prefetch => pobieraj zmiany z origin w osobnym etapie fetch przed etapem discovery
+            (opcjonalne) przyjmuje wartosci yes/no. git fetch wykonywany jest rownolegle
+            dla wielu repozytoriow, a pull_before_work i use_worktree uzywaja pobranych
+            zmian (pull zastepowany jest przez fast-forward do galezi sledzonej).
+            Repozytoria dla ktorych fetch sie nie udal sa raportowane i pomijane
+fetch_jobs => liczba watkow etapu fetch (opcjonalne), domyslnie wartosc opcji -j/--jobs
+fetch_timeout => maksymalny czas git fetch dla jednego repozytorium w sekundach
+                 (opcjonalne), domyslnie 300, 0 wylacza limit
+ignored_dirs => katalogi oddzielone spacja, ktore nie sa przeszukiwane (opcjonalne).
+                Domyslnie build node_modules. Katalogi ukryte (np. .git) sa zawsze pomijane
+search_backend => sposob wyszukiwania plikow (opcjonalne) przyjmuje wartosci python/git.
+                  python (domyslnie) przechodzi drzewo katalogow, git uzywa git grep
+                  i przeszukuje tylko pliki sledzone przez gita
+scan_threads => liczba watkow przetwarzajacych pliki w jednym repozytorium (opcjonalne),
+                domyslnie 1
+scan_processes => liczba procesow dla plikow wiekszych niz 8MB (opcjonalne),
+                  domyslnie 0 czyli bez puli procesow
+encoding => kodowanie plikow (opcjonalne), domyslnie utf-8. Zmienione pliki zapisywane
+            sa w tym samym kodowaniu i z tymi samymi znakami konca linii. Dla kodowan
+            wielobajtowych (utf-16, utf-32) search_backend=git nie jest uzywany
+max_file_size => pliki wieksze niz podana liczba bajtow sa pomijane (opcjonalne),
+                 domyslnie brak limitu. Pliki binarne oraz pliki w innym kodowaniu
+                 rowniez sa pomijane i raportowane w podsumowaniu
+cache_max_entries => maksymalna liczba wpisow w cache przeszukiwania (opcjonalne).
+                     Cache zapisywany jest w katalogu .resolver-cache, opcja --no-cache
+                     go wylacza
+git_backend => sposob wykonywania operacji gitowych (opcjonalne) przyjmuje wartosci
+               cli/native. cli (domyslnie) uruchamia proces gita dla kazdej operacji,
+               native tworzy branch, add i commit przez GitPython bez procesow,
+               procesu wymagaja tylko stash, pull i push. native nie uruchamia filtrow
+               (np. git-lfs), normalizacji konca linii (core.autocrlf, atrybuty text/eol)
+               ani podpisywania commitow (commit.gpgsign), dlatego gdy repozytorium ich
+               uzywa, add i commit wykonywane sa jak w cli
+use_worktree => wykonuj zmiany w tymczasowym git worktree (opcjonalne) przyjmuje
+                wartosci yes/no. Przy yes drzewo robocze repozytorium nie jest zmieniane
+                (stash_before_work, checkout_to_master_before_work i pull_before_work
+                sa pomijane): master jest pobierany z origin, nowa galaz tworzona jest
+                w worktree, a worktree usuwany po wyslaniu zmian. Wymaga branch
+                w sekcji BITBUCKET
+match_mode => tryb dopasowania (opcjonalne) przyjmuje wartosci literal/word/regex.
+              literal (domyslnie) - dokladny ciag znakow, word - ciag znakow jako cale
+              slowo (identyfikator), regex - wyrazenie regularne, w zamianie mozna
+              uzywac odwolan do grup np. \\1
+discovery_jobs, rewrite_jobs, commit_jobs, push_jobs => liczba watkow poszczegolnych
+                  etapow potoku (opcjonalne), domyslnie wartosc opcji -j/--jobs
+pipeline_queue_size => maksymalna liczba repozytoriow czekajacych przed kazdym etapem
+                       (opcjonalne), domyslnie 4
+two_phase => przetwarzanie w dwoch fazach (opcjonalne) przyjmuje wartosci yes/no.
+             Faza pierwsza: commit i walidacja, faza druga: push i pull requesty
+validate_command => polecenie powloki uruchamiane w kazdym repozytorium po commicie
+                    w fazie pierwszej, np. ./gradlew build (opcjonalne). Kod wyjscia
+                    rozny od 0 oznacza status invalid
+validate_timeout => maksymalny czas validate_command dla jednego repozytorium w sekundach
+                    (opcjonalne), domyslnie 1800, 0 wylacza limit. Przekroczenie czasu
+                    oznacza status invalid
+validate_jobs => liczba watkow etapu validate (opcjonalne), domyslnie wartosc opcji -j/--jobs
+validation_gate => kiedy wykonac faze druga (opcjonalne) przyjmuje wartosci all/each.
+                   all (domyslnie) - tylko gdy faza pierwsza powiodla sie we wszystkich
+                   repozytoriach, inaczej nic nie jest wysylane, each - wysylane sa
+                   wszystkie repozytoria ktore przeszly walidacje
+recursive_discovery => szukaj repozytoriow rekurencyjnie (opcjonalne) przyjmuje wartosci
+                       yes/no. Domyslnie repozytoriami sa podkatalogi obecnego katalogu,
+                       przy yes katalog z .git jest repozytorium i nie jest przeszukiwany
+                       glebiej, a poddrzewa przeszukiwane sa rownolegle
+include_repos => wzorce sciezek repozytoriow oddzielone spacja, np. payments/* (opcjonalne).
+                 Gdy podane, przetwarzane sa tylko pasujace repozytoria
+exclude_repos => wzorce sciezek pomijanych repozytoriow oddzielone spacja (opcjonalne)
+repositories_file => plik z lista repozytoriow, jedna sciezka na linie (opcjonalne).
+                     Zastepuje przeszukiwanie katalogow, wzorce nadal sa stosowane
+remote_repositories => plik z adresami repozytoriow, jeden adres na linie (opcjonalne).
+                       Repozytoria nie musza byc sklonowane lokalnie: kazde jest klonowane
+                       plytko (--depth 1 --filter=blob:none) z rzadkim checkoutem plikow
+                       o podanych rozszerzeniach, przetwarzane i usuwane. Nazwa
+                       repozytorium to ostatni element adresu, wzorce include_repos
+                       i exclude_repos nadal sa stosowane. Nie dziala z --plan i --apply
+clone_jobs => liczba watkow klonujacych repozytoria z remote_repositories (opcjonalne),
+              domyslnie wartosc opcji -j/--jobs
+clone_directory => katalog w ktorym tworzony jest tymczasowy katalog na klony
+                   (opcjonalne), domyslnie katalog tymczasowy systemu
+incremental => przeszukuj tylko pliki zmienione od poprzedniego uruchomienia (opcjonalne)
+               przyjmuje wartosci yes/no. Dla kazdego repozytorium zapisywany jest
+               w katalogu .resolver-cache commit, na ktorym nie znaleziono zadnego
+               wystapienia (osobno dla kazdej tabeli zamian i rozszerzen), a kolejne
+               uruchomienie przeszukuje tylko pliki z git diff --name-only <commit> HEAD.
+               Repozytoria ze zmianami sa przeszukiwane w calosci, dopoki zmiany nie trafia
+               do mastera. Gdy commit nie jest juz przodkiem HEAD, przeszukiwane sa
+               wszystkie pliki
+sekcja REPLACEMENTS => opcjonalna sekcja z tabela zamian w formacie ciag=zamiana.
+                      Wszystkie zamiany wykonywane sa w jednym przebiegu i jednym commicie
 sekcja BITBUCKET => opcjonalna sekcja z definicjami do wystawienia pull requesta
 bitbucket-credentials => adres do pliku z credentialami do bitbucketa, domyslnie
 skrypt szuka pliku w folderze home
@@ -43,25 +161,62 @@ workspace => workspace z bitbucketa (wymagane)
 reviewers => list revierow podana jako uidy oddzielone spacja, albo plik json. Domyslnie
             dodawani sa wszyscy rewierzy z workspace (opcjonalne)
 branch => branch na ktorym nastepuja zmiany i wystawiany jest pull request (wyamgane)
+members_cache_ttl => czas w sekundach przez ktory lista czlonkow workspace jest trzymana
+                     w katalogu .resolver-cache (opcjonalne), domyslnie 0 czyli bez cache.
+                     Niezaleznie od tego lista jest pobierana najwyzej raz na uruchomienie
+pr_concurrency => liczba watkow etapu pr, czyli maksymalna liczba jednoczesnie
+                  tworzonych pull requestow (opcjonalne), domyslnie 8
+rate_limit => limit zapytan do API bitbucketa na godzine (opcjonalne), domyslnie 1000.
+              Zapytania sa rozkladane w czasie zamiast konczyc sie bledem 429, a pozostaly
+              budzet zapisywany jest w katalogu .resolver-cache dla kolejnych uruchomien
 prtitle => opcjonalny tytul pull requesta
 
 
 """
 import argparse
+import codecs
 import configparser
-import glob
+import io
+import cProfile
+import json
 import os
+import pstats
+import re
+import shutil
+import signal
+import subprocess
 import sys
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
-
-from git import Repo, NoSuchPathError, InvalidGitRepositoryError
-
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from git import Repo, NoSuchPathError, InvalidGitRepositoryError, GitCommandError
+
+import asyncbitbucket
+import bitbucketclient
+import clones
 import credentials
 import gitaction
+import gitbackend
+import incremental
+import inventory
+import journal
+import manifest
+import metrics
+import pipeline
+import ratelimit
+import rewriter
+import scancache
+import scanner
 import uidsread
 from gitaction import process_reviewers_arg
 
+DEFAULT_VALIDATE_TIMEOUT = 1800
+
 
 @dataclass
 class ClassWithFlags:
@@ -83,6 +238,263 @@ class ClassWithFlags:
     pull_before_work: bool
 
 
+@dataclass
+class ScanOptions:
+    """
+    Klasa przechowujaca ustawienia wyszukiwania i zamiany w plikach
+
+    Atrybuty
+    ----------
+    ignored_dirs : Sequence[str]
+        katalogi ktore nie sa przeszukiwane
+    search_backend : str
+        python - przechodzenie katalogow, git - git grep po plikach sledzonych
+    threads : int
+        liczba watkow przetwarzajacych pliki w jednym repozytorium
+    processes : int
+        liczba procesow dla duzych plikow, 0 wylacza pule procesow
+    encoding : str
+        kodowanie plikow
+    max_file_size : int
+        pliki wieksze niz podana liczba bajtow sa pomijane, 0 wylacza limit
+    """
+
+    ignored_dirs: Sequence[str] = scanner.DEFAULT_IGNORED_DIRS
+    search_backend: str = "python"
+    threads: int = 1
+    processes: int = 0
+    encoding: str = rewriter.DEFAULT_ENCODING
+    max_file_size: int = 0
+
+
+@dataclass
+class InventoryOptions:
+    """
+    Klasa przechowujaca ustawienia wyboru repozytoriow
+
+    Atrybuty
+    ----------
+    recursive : bool
+        szukaj repozytoriow rekurencyjnie
+    include : Sequence[str]
+        wzorce sciezek przetwarzanych repozytoriow
+    exclude : Sequence[str]
+        wzorce sciezek pomijanych repozytoriow
+    repositories_file : Optional[str]
+        plik z lista repozytoriow
+    """
+
+    recursive: bool = False
+    include: Sequence[str] = ()
+    exclude: Sequence[str] = ()
+    repositories_file: Optional[str] = None
+
+
+@dataclass
+class RunContext:
+    """
+    Klasa przechowujaca ustawienia wspolne dla wszystkich repozytoriow w jednym uruchomieniu
+
+    Atrybuty
+    ----------
+    commit_message : str
+        wiadomosc commita
+    extensions : List[str]
+        rozszerzenia zmienianych plikow
+    master : str
+        nazwa galezi master
+    replacer : Replacer
+        skompilowana tabela zamian
+    flags : ClassWithFlags
+        flagi akcji gitowych
+    scan_options : ScanOptions
+        ustawienia wyszukiwania
+    bitbucket
+        propertiesy dla bitbucketa lub False
+    cache : Optional[ScanCache]
+        cache wynikow przeszukiwania, None wylacza cache
+    cache_directory : Optional[str]
+        katalog z cache uruchomienia (.resolver-cache)
+    bitbucket_settings : Optional[Tuple]
+        propertiesy bitbucketa wyliczone przy pierwszym pull requescie
+    git_backend : str
+        sposob wykonywania operacji gitowych, cli lub native
+    prefetch : bool
+        pobieraj zmiany z origin w etapie fetch przed etapem discovery
+    fetch_timeout : int
+        maksymalny czas git fetch w sekundach, 0 wylacza limit
+    two_phase : bool
+        commit i walidacja we wszystkich repozytoriach przed pushem
+    validate_command : Optional[str]
+        polecenie walidujace repozytorium po commicie w trybie two_phase
+    validate_timeout : int
+        maksymalny czas validate_command w sekundach, 0 wylacza limit
+    validation_gate : str
+        all lub each, kiedy wykonac faze druga trybu two_phase
+    run_journal : Optional[Journal]
+        dziennik zakonczonych etapow, None wylacza zapis
+    processed : Optional[ProcessedCommits]
+        commity poprzednich uruchomien przy incremental, None przeszukuje wszystkie pliki
+    clone_directory : Optional[str]
+        tymczasowy katalog na klony repozytoriow z remote_repositories, None gdy
+        repozytoria sa sklonowane lokalnie
+    worktree_directory : Optional[str]
+        tymczasowy katalog na worktree przy use_worktree, None gdy zmiany wykonywane
+        sa w drzewie roboczym repozytorium
+    lock : threading.Lock
+        blokada dla leniwie wyliczanych pol
+    """
+
+    commit_message: str
+    extensions: List[str]
+    master: str
+    replacer: rewriter.Replacer
+    flags: ClassWithFlags
+    scan_options: ScanOptions
+    bitbucket: object
+    cache: Optional[scancache.ScanCache] = None
+    cache_directory: Optional[str] = None
+    bitbucket_settings: Optional[Tuple] = None
+    git_backend: str = "cli"
+    prefetch: bool = False
+    fetch_timeout: int = gitbackend.DEFAULT_FETCH_TIMEOUT
+    two_phase: bool = False
+    validate_command: Optional[str] = None
+    validate_timeout: int = DEFAULT_VALIDATE_TIMEOUT
+    validation_gate: str = "all"
+    run_journal: Optional[journal.Journal] = None
+    processed: Optional[incremental.ProcessedCommits] = None
+    clone_directory: Optional[str] = None
+    worktree_directory: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class RepoResult:
+    """
+    Klasa przechowujaca wynik przetwarzania pojedynczego repozytorium
+
+    Atrybuty
+    ----------
+    project : str
+        nazwa katalogu z repozytorium
+    status : str
+        wynik przetwarzania: changed, no-match, skipped lub failed, a w trybie two_phase
+        rowniez committed (zmiany tylko lokalnie) lub invalid (walidacja nie powiodla sie)
+    matched : int
+        liczba zmienionych plikow
+    skipped : int
+        liczba pominietych plikow (binarne, za duze, w innym kodowaniu)
+    output : str
+        wyjscie zebrane podczas przetwarzania repozytorium
+    record : Optional[Dict]
+        rekord manifestu, tworzony w trybie --plan
+    pull_request : str
+        wynik tworzenia pull requesta: created, failed lub pusty gdy nie byl tworzony
+    """
+
+    project: str
+    status: str
+    matched: int = 0
+    skipped: int = 0
+    output: str = ""
+    record: Optional[Dict] = None
+    pull_request: str = ""
+
+
+@dataclass
+class RepoJob:
+    """
+    Klasa przechowujaca stan repozytorium przekazywany miedzy etapami potoku
+
+    Atrybuty
+    ----------
+    project : str
+        nazwa katalogu z repozytorium
+    abso : str
+        sciezka do repozytorium, przy use_worktree po etapie discovery sciezka do worktree
+    result : RepoResult
+        wynik przetwarzania, uzupelniany przez kolejne etapy
+    planned_files : Optional[List[str]]
+        pliki z manifestu, przy podaniu repozytorium nie jest przeszukiwane
+    repo : Optional[Repo]
+        instancja repozytorium, tworzona w etapie discovery
+    files : List[str]
+        pliki kandydatow do zmiany
+    changed : List[str]
+        zmienione pliki
+    completed : Dict[str, Dict]
+        etapy zakonczone w przerwanym uruchomieniu, wczytane z dziennika
+    url : Optional[str]
+        adres repozytorium klonowanego w etapie clone, None dla repozytoriow lokalnych
+    source : Optional[Repo]
+        instancja repozytorium z ktorego utworzono worktree, None bez use_worktree
+    base : Optional[str]
+        commit na ktorym repozytorium jest przetwarzane, zapisywany przy incremental
+    """
+
+    project: str
+    abso: str
+    result: RepoResult
+    planned_files: Optional[List[str]] = None
+    repo: Optional[Repo] = None
+    files: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    completed: Dict[str, Dict] = field(default_factory=dict)
+    url: Optional[str] = None
+    source: Optional[Repo] = None
+    base: Optional[str] = None
+
+
+@dataclass
+class PipelineOptions:
+    """
+    Klasa przechowujaca ustawienia potoku etapow
+
+    Atrybuty
+    ----------
+    workers : Dict[str, int]
+        nazwa etapu => liczba watkow etapu
+    queue_size : int
+        maksymalna liczba repozytoriow czekajacych przed kazdym etapem
+    """
+
+    workers: Dict[str, int]
+    queue_size: int = pipeline.DEFAULT_QUEUE_SIZE
+
+
+class ThreadOutput(io.TextIOBase):
+    """
+    Zastepuje sys.stdout podczas rownoleglego przetwarzania. Wyjscie watku ktory
+    wywolal capture jest buforowane, pozostale watki pisza do oryginalnego strumienia.
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    @contextmanager
+    def capture(self):
+        """
+        Buforuje wyjscie obecnego watku, zwraca bufor z zebranym tekstem
+        """
+        self.local.buffer = io.StringIO()
+        try:
+            yield self.local.buffer
+        finally:
+            self.local.buffer = None
+
+
 def parse_bool_arguments(bool_dict: dict) -> ClassWithFlags:
     """
     Metoda parsujaca konfigurajce na klase z wartoscami logicznymi
@@ -131,6 +543,27 @@ def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("-p", "--properties", type=str, required=True,
                         help='File with all properties')
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help='Number of repositories processed concurrently. Default is 1')
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f'Do not use the scan cache from {scancache.CACHE_DIRECTORY}')
+    parser.add_argument("--resume", action="store_true",
+                        help='Resume an interrupted run, skipping stages finished '
+                             f'according to {scancache.CACHE_DIRECTORY}/'
+                             f'{journal.JOURNAL_FILE.format("<key>")}')
+    parser.add_argument("--metrics", type=str, metavar="FILE",
+                        help='Write stage timings and counters to FILE at the end of the run')
+    parser.add_argument("--metrics-format", choices=metrics.EXPORT_FORMATS, default="json",
+                        help='Format of the --metrics file. Default is json')
+    parser.add_argument("--profile", type=str, metavar="FILE",
+                        help='Run under cProfile and write the statistics to FILE')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--plan", type=str, metavar="MANIFEST",
+                      help='Only find matches and write a JSONL manifest of changes, '
+                           'without any git or bitbucket actions')
+    mode.add_argument("--apply", type=str, metavar="MANIFEST",
+                      help='Apply changes from a manifest created with --plan '
+                           'without searching repositories again')
     return parser.parse_args()
 
 
@@ -168,15 +601,120 @@ def process_required_fields(properties: Dict[str, str]) -> Tuple:
     Returns
     -------
     Tuple
-        zwraca wiadomosc commita, string do znalezienia, string do zastapienia,
-        rozszerzenia plikow, galaz mastera
+        zwraca wiadomosc commita, rozszerzenia plikow, galaz mastera
     """
     commit_message = get_required_property("commit_message", properties)
-    str_to_find = get_required_property("str_to_find", properties)
-    str_to_repl = get_required_property("str_to_repl", properties)
     master = get_required_property("master", properties)
     extensions = get_required_property("extensions", properties).split()
-    return commit_message, str_to_find, str_to_repl, extensions, master
+    return commit_message, extensions, master
+
+
+def get_replacements(properties_file: str, properties: Dict[str, str]) -> Dict[str, str]:
+    """
+    Zbiera tabele zamian z str_to_find/str_to_repl, sekcji REPLACEMENTS oraz
+    pliku replacements_file. Zwraca blad gdy tabela jest pusta
+
+    Parameters
+    ----------
+    properties_file : str
+        adres pliku z konfiguracja
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    Returns
+    -------
+    Dict[str, str]
+        tabela zamian ciag do znalezienia => ciag do zastapienia
+    """
+    replacements = {}
+    if properties.get("str_to_find") is not None:
+        replacements[properties["str_to_find"]] = get_required_property("str_to_repl",
+                                                                       properties)
+    config = configparser.RawConfigParser()
+    config.optionxform = str
+    config.read(properties_file)
+    if config.has_section('REPLACEMENTS'):
+        replacements.update(config.items('REPLACEMENTS'))
+    if properties.get("replacements_file"):
+        replacements.update(read_replacements_file(properties["replacements_file"]))
+    if not replacements:
+        print("You should provide required property: str_to_find")
+        sys.exit(1)
+    if "" in replacements:
+        print("String to find can't be empty")
+        sys.exit(1)
+    return replacements
+
+
+def read_replacements_file(filename: str) -> Dict[str, str]:
+    """
+    Wczytuje tabele zamian z pliku json (obiekt) lub tsv (ciag<TAB>zamiana w kazdej linii)
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku z tabela zamian
+    Returns
+    -------
+    Dict[str, str]
+        tabela zamian ciag do znalezienia => ciag do zastapienia
+    """
+    try:
+        with open(filename, newline='') as file:
+            if filename.endswith('.json'):
+                replacements = json.load(file)
+                if not isinstance(replacements, dict):
+                    raise ValueError("expected json object")
+                return replacements
+            replacements = {}
+            for number, line in enumerate(file.read().splitlines(), 1):
+                if not line:
+                    continue
+                if line.count('\t') != 1:
+                    print(f"Line {number} in {filename} should have format: find<TAB>replace")
+                    sys.exit(1)
+                old_str, new_str = line.split('\t')
+                replacements[old_str] = new_str
+            return replacements
+    except (OSError, ValueError) as error:
+        print(f"Can't read replacements from {filename} ", error)
+        sys.exit(1)
+
+
+def create_run_context(properties_file: str, properties: Dict[str, str]) -> RunContext:
+    """
+    Waliduje konfiguracje i tworzy obiekt z ustawieniami wspolnymi dla calego
+    uruchomienia. Tabela zamian jest kompilowana tylko raz
+
+    Parameters
+    ----------
+    properties_file : str
+        adres pliku z konfiguracja
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    Returns
+    -------
+    RunContext
+        ustawienia uruchomienia
+    """
+    commit_message, extensions, master = process_required_fields(properties)
+    match_mode = properties.get("match_mode", "literal")
+    try:
+        replacer = rewriter.Replacer(get_replacements(properties_file, properties), match_mode)
+    except (ValueError, re.error) as error:
+        print(f"Can't compile replacements with match_mode={match_mode}: {error}")
+        sys.exit(1)
+    return RunContext(commit_message, extensions, master, replacer,
+                      parse_bool_arguments(properties), parse_scan_options(properties),
+                      has_bitbucket(properties_file),
+                      git_backend=get_git_backend(properties),
+                      prefetch=bool(parse_logical_arg("prefetch", properties)),
+                      fetch_timeout=get_int_property("fetch_timeout", properties,
+                                                     gitbackend.DEFAULT_FETCH_TIMEOUT),
+                      two_phase=bool(parse_logical_arg("two_phase", properties)),
+                      validate_command=properties.get("validate_command"),
+                      validate_timeout=get_int_property("validate_timeout", properties,
+                                                        DEFAULT_VALIDATE_TIMEOUT),
+                      validation_gate=get_validation_gate(properties))
 
 
 def get_required_property(prop: str, properties: Dict[str, str]):
@@ -221,36 +759,1053 @@ def has_bitbucket(file: str):
         return False
 
 
-def execute_script():
+def execute_script() -> List[RepoResult]:
     """
         Metoda wykonuje logike skryptu. Jego opis znajduje się na samej gorze skrytpu.
+
+        Returns
+        -------
+        List[RepoResult]
+            wyniki przetwarzania dla kazdego repozytorium
     """
     arguments = parse_args()
+    metrics.METRICS.reset()
+    if arguments.profile:
+        results = run_profiled(arguments.profile, lambda: run_script(arguments))
+    else:
+        results = run_script(arguments)
+    if arguments.metrics:
+        metrics.METRICS.export(arguments.metrics, arguments.metrics_format)
+    return results
+
+
+def run_profiled(filename: str, function: Callable[[], List[RepoResult]]) -> List[RepoResult]:
+    """
+    Wykonuje funkcje pod cProfile, razem z watkami uruchomionymi w jej trakcie.
+    Statystyki zapisywane sa do pliku, a najdrozsze funkcje wypisywane
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku ze statystykami (format pstats)
+    function : Callable[[], List[RepoResult]]
+        profilowana funkcja
+    Returns
+    -------
+    List[RepoResult]
+        wynik funkcji
+    """
+    profiles = [cProfile.Profile()]
+
+    def profile_thread(*_):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: profiler glowny obejmuje juz wszystkie watki, zdejmujemy
+            # hook zeby nie byl wywolywany przy kazdym wywolaniu funkcji w watku
+            sys.setprofile(None)
+            return
+        profiles.append(profile)
+
+    threading.setprofile(profile_thread)
+    profiles[0].enable()
+    try:
+        return function()
+    finally:
+        profiles[0].disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            profile.create_stats()
+            stats.add(profile)
+        stats.dump_stats(filename)
+        stats.sort_stats("cumulative").print_stats(20)
+
+
+def run_script(arguments: argparse.Namespace) -> List[RepoResult]:
+    """
+    Wykonuje skrypt dla sparsowanych argumentow
+
+    Parameters
+    ----------
+    arguments : Namespace
+        argumenty konsolowe
+    Returns
+    -------
+    List[RepoResult]
+        wyniki przetwarzania dla kazdego repozytorium
+    """
     current_directory = os.getcwd()
     properties = get_properties_dict(arguments.properties)
-    commit_message, str_to_find, str_to_repl, extensions, master = \
-        process_required_fields(properties)
-    bitbucket = has_bitbucket(arguments.properties)
-    for project in next(os.walk(current_directory))[1]:
-        abso = os.path.join(current_directory, project)
+    context = create_run_context(arguments.properties, properties)
+    remote_urls = {}
+    if properties.get("remote_repositories"):
+        if arguments.plan or arguments.apply:
+            print("Options --plan and --apply can't be used with remote_repositories")
+            sys.exit(1)
+        remote_urls = clones.read_remote_urls(properties["remote_repositories"])
+    if arguments.apply:
+        planned = read_planned_files(arguments.apply, current_directory, context)
+        projects = list(planned)
+    elif remote_urls:
+        planned = {}
+        options = parse_inventory_options(properties)
+        projects = [project for project in remote_urls
+                    if inventory.matches(project, options.include, options.exclude)]
+    else:
+        planned = {}
+        options = parse_inventory_options(properties)
+        projects = inventory.list_repositories(
+            current_directory, options.recursive, options.include, options.exclude,
+            options.repositories_file, ignored=(scancache.CACHE_DIRECTORY,),
+            workers=get_int_property("discovery_jobs", properties, arguments.jobs))
+    context.cache_directory = os.path.join(current_directory, scancache.CACHE_DIRECTORY)
+    if context.bitbucket:
+        bitbucketclient.configure_rate_limit(
+            context.cache_directory,
+            get_int_property("rate_limit", context.bitbucket, ratelimit.DEFAULT_LIMIT))
+    if parse_logical_arg("use_worktree", properties) and not arguments.plan:
+        if not context.bitbucket or not context.bitbucket.get("branch"):
+            print("Property use_worktree requires branch in section BITBUCKET")
+            sys.exit(1)
+        context.worktree_directory = tempfile.mkdtemp(prefix="resolver-worktrees-")
+    if remote_urls:
+        # swiezy klon jest juz na masterze, stash, checkout, pull i fetch nie sa potrzebne
+        context.flags = ClassWithFlags(False, False, False)
+        context.prefetch = False
+        context.clone_directory = tempfile.mkdtemp(prefix="resolver-clones-",
+                                                   dir=properties.get("clone_directory"))
+    if parse_logical_arg("incremental", properties) and not arguments.plan \
+            and not arguments.apply:
+        context.processed = incremental.ProcessedCommits(
+            context.cache_directory,
+            json.dumps([context.replacer.key, sorted(context.extensions)]))
+    # klony i worktree sa tymczasowe, wiec ich pliki nigdy nie trafilyby w cache
+    if not arguments.no_cache and not arguments.apply and not remote_urls \
+            and context.worktree_directory is None:
+        context.cache = scancache.ScanCache(
+            context.cache_directory,
+            get_int_property("cache_max_entries", properties, scancache.DEFAULT_MAX_ENTRIES))
+    try:
+        if arguments.plan:
+            results = process_repositories(
+                projects, lambda project: plan_repository(current_directory, project, context),
+                arguments.jobs)
+        else:
+            run_key = get_run_key(context)
+            context.run_journal = journal.Journal(
+                journal.journal_filename(context.cache_directory, run_key), run_key,
+                arguments.resume)
+            jobs = [create_repo_job(context.clone_directory or current_directory, project,
+                                    context, planned.get(project), remote_urls.get(project))
+                    for project in projects]
+            options = parse_pipeline_options(properties, context.bitbucket, arguments.jobs)
+            if context.two_phase:
+                results = process_repositories_two_phase(jobs, context, options)
+            else:
+                results = process_repositories_pipeline(jobs, context, options)
+            record_processed_commits(jobs, context)
+    finally:
+        if context.cache is not None:
+            context.cache.close()
+        if context.run_journal is not None:
+            context.run_journal.close()
+        if context.processed is not None:
+            context.processed.save()
+        bitbucketclient.close_rate_limits()
+        for directory in (context.clone_directory, context.worktree_directory):
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
+    if arguments.plan:
+        manifest.write_manifest(arguments.plan,
+                                [result.record for result in results if result.record])
+    print_summary(results)
+    if context.cache is not None:
+        print(context.cache.report())
+    return results
+
+
+def create_repo_job(current_directory: str, project: str, context: RunContext,
+                    planned_files: Optional[List[str]] = None,
+                    url: Optional[str] = None) -> RepoJob:
+    """
+    Tworzy stan przetwarzania repozytorium przed pierwszym etapem, z etapami
+    zakonczonymi wedlug dziennika. Klon z poprzedniego uruchomienia jest juz usuniety,
+    wiec repozytorium z adresu, ktore wymaga jeszcze etapow na repozytorium,
+    przetwarzane jest od poczatku. Przy use_worktree usuniety worktree jest tworzony
+    ponownie z galezi, ale niezacommitowane zmiany przepadly, wiec etap rewrite
+    jest powtarzany
+
+    Parameters
+    ----------
+    current_directory : str
+        katalog z repozytoriami
+    project : str
+        nazwa katalogu z repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    planned_files : Optional[List[str]]
+        pliki z manifestu, przy podaniu repozytorium nie jest przeszukiwane
+    url : Optional[str]
+        adres repozytorium klonowanego w etapie clone
+    Returns
+    -------
+    RepoJob
+        stan przetwarzania repozytorium
+    """
+    completed = context.run_journal.completed(project) if context.run_journal else {}
+    if url is not None and needs_repository(completed):
+        completed = {}
+    if context.worktree_directory is not None and "commit" not in completed:
+        completed.pop("rewrite", None)
+    return RepoJob(project, os.path.join(current_directory, project),
+                   RepoResult(project, "failed"), planned_files, completed=completed, url=url)
+
+
+def record_processed_commits(jobs: List[RepoJob], context: RunContext):
+    """
+    Zapamietuje commity repozytoriow bez wystapien (no-match), kolejne uruchomienie
+    z incremental przeszuka tylko pliki zmienione od tych commitow. Repozytoria ze zmianami
+    nie sa zapamietywane, bo pull request moze nie zostac zmergowany
+
+    Parameters
+    ----------
+    jobs : List[RepoJob]
+        przetworzone repozytoria
+    context : RunContext
+        ustawienia uruchomienia
+    """
+    if context.processed is None:
+        return
+    for job in jobs:
+        if job.base is not None and job.result.status == "no-match":
+            context.processed.record(job.project, job.base)
+
+
+def needs_repository(completed: Dict[str, Dict]) -> bool:
+    """
+    Sprawdza czy po etapach zakonczonych wedlug dziennika zostal do wykonania etap
+    wymagajacy repozytorium, czyli kazdy poza pr
+
+    Parameters
+    ----------
+    completed : Dict[str, Dict]
+        etapy zakonczone wedlug dziennika
+    Returns
+    -------
+    bool
+        True gdy repozytorium musi byc otwarte
+    """
+    for name, _ in REPO_STAGES:
+        if name not in completed:
+            return name != "pr"
+        if not completed[name]["proceed"]:
+            return False
+    return False
+
+
+def close_repository(job: RepoJob):
+    """
+    Zamyka procesy gita (np. git cat-file --batch) trzymane przez instancje repozytorium
+    oraz usuwa tymczasowy worktree i tymczasowy klon repozytorium z adresu
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    """
+    if job.repo is not None:
+        job.repo.close()
+    if job.source is not None:
         try:
-            repo = Repo(abso)
-        except (InvalidGitRepositoryError, NoSuchPathError) as error:
-            print(f"Cant create repository instance from {abso} ", error)
-            continue
-        execute_git_action(repo, parse_bool_arguments(properties), master,
-                           get_required_property("branch", bitbucket) if bitbucket else None)
-        matched_files = process_files(abso, extensions, str_to_find, str_to_repl)
-        if len(matched_files) > 0:
-            commit_add_push(repo, matched_files, commit_message)
-            process_bitbucket(bitbucket, commit_message, project)
+            gitbackend.remove_worktree(job.source, job.abso)
+        except GitCommandError as error:
+            print(f"Cant remove worktree {job.abso} ", error)
+        job.source.close()
+    if job.url is not None:
+        clones.remove_clone(job.abso)
+
+
+def get_run_key(context: RunContext) -> str:
+    """
+    Zwraca identyfikator ustawien uruchomienia zapisywany w dzienniku. Wznowienie jest
+    mozliwe tylko z tymi samymi zamianami, wiadomoscia commita i branchem
+
+    Parameters
+    ----------
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    str
+        identyfikator ustawien
+    """
+    branch = context.bitbucket.get("branch") if context.bitbucket else None
+    return json.dumps([context.replacer.identity, context.commit_message, branch])
+
+
+def run_stage(name: str, function: Callable[[RepoJob, RunContext], bool], job: RepoJob,
+              context: RunContext) -> bool:
+    """
+    Wykonuje jeden etap dla repozytorium, blad (gita, zapytania, pliku czy konfiguracji)
+    konczy przetwarzanie tego repozytorium ze statusem failed, pozostale sa przetwarzane.
+    Etap zakonczony w przerwanym uruchomieniu jest odtwarzany z dziennika, a nowo
+    zakonczony etap jest do dziennika zapisywany
+
+    Parameters
+    ----------
+    name : str
+        nazwa etapu
+    function : Callable[[RepoJob, RunContext], bool]
+        funkcja etapu
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    try:
+        if name in job.completed:
+            return resume_stage(name, job, context)
+        with metrics.METRICS.timer("stage", stage=name):
+            proceed = function(job, context)
+    except GitCommandError as error:
+        print(f"Git command failed in project {job.project} ", error)
+        job.result.status = "failed"
+        return False
+    except (Exception, SystemExit) as error:
+        print(f"Stage {name} failed in project {job.project} ", repr(error))
+        job.result.status = "failed"
+        return False
+    record_stage(name, proceed, job, context)
+    return proceed
+
+
+def record_stage(name: str, proceed: bool, job: RepoJob, context: RunContext):
+    """
+    Zapisuje zakonczony etap w dzienniku. Nieudany pull request i nieudana walidacja
+    nie sa zapisywane, wiec wznowienie je powtarza
+
+    Parameters
+    ----------
+    name : str
+        nazwa etapu
+    proceed : bool
+        czy repozytorium przeszlo do kolejnego etapu
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    """
+    result = job.result
+    if context.run_journal is None or result.pull_request == "failed" \
+            or result.status == "invalid":
+        return
+    context.run_journal.record(job.project, name, proceed=proceed, status=result.status,
+                               matched=result.matched, skipped=result.skipped,
+                               pull_request=result.pull_request,
+                               changed=[os.path.relpath(file, job.abso)
+                                        for file in job.changed])
+
+
+def resume_stage(name: str, job: RepoJob, context: RunContext) -> bool:
+    """
+    Odtwarza stan repozytorium po etapie zakonczonym w przerwanym uruchomieniu,
+    bez ponownego wykonywania akcji gitowych i zapytan do bitbucketa
+
+    Parameters
+    ----------
+    name : str
+        nazwa etapu
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    entry = job.completed[name]
+    print(f"Stage {name} already done in project {job.project}")
+    job.result.status = entry["status"]
+    job.result.matched = entry["matched"]
+    job.result.skipped = entry["skipped"]
+    job.result.pull_request = entry["pull_request"]
+    job.changed = [os.path.join(job.abso, file) for file in entry["changed"]]
+    if name == "discovery" and entry["proceed"] and needs_repository(job.completed):
+        if not open_repository(job, context):
+            return False
+        if context.worktree_directory is not None:
+            open_worktree(job, context, create=False)
+        if "rewrite" not in job.completed:
+            job.files = find_candidate_files(job, context)
+    return entry["proceed"]
+
+
+def open_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Tworzy instancje repozytorium, gdy katalog nie jest repozytorium ustawia status skipped
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium zostalo otwarte
+    """
+    try:
+        job.repo = gitbackend.open_repo(job.abso, context.git_backend)
+    except (InvalidGitRepositoryError, NoSuchPathError) as error:
+        print(f"Cant create repository instance from {job.abso} ", error)
+        job.result.status = "skipped"
+        return False
+    return True
+
+
+def find_candidate_files(job: RepoJob, context: RunContext) -> List[str]:
+    """
+    Zwraca pliki z manifestu lub wyszukane przez discover_files
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    List[str]
+        pliki kandydatow do zmiany
+    """
+    if job.planned_files is not None and job.source is not None:
+        return [os.path.join(job.abso, os.path.relpath(file, job.source.working_dir))
+                for file in job.planned_files]
+    if job.planned_files is not None:
+        return job.planned_files
+    if job.base is not None:
+        files = find_changed_files(job, context)
+        if files is not None:
+            return files
+    with metrics.METRICS.timer("discover_files"):
+        files = list(discover_files(job.abso, context.extensions, context.replacer,
+                                    context.scan_options))
+    metrics.METRICS.increment("files_discovered", len(files))
+    return files
+
+
+def clone_remote_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap clone: tworzy plytki klon repozytorium z job.url w katalogu tymczasowym
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    with metrics.METRICS.timer("git", operation="clone"):
+        clones.clone_repository(job.url, job.abso, context.master, context.extensions)
+    return True
+
+
+def fetch_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap fetch: otwiera repozytorium i pobiera zmiany z origin, bez zmieniania
+    drzewa roboczego
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    if not open_repository(job, context):
+        return False
+    with metrics.METRICS.timer("git", operation="fetch"):
+        gitbackend.fetch(job.repo, context.fetch_timeout)
+    return True
+
+
+def find_changed_files(job: RepoJob, context: RunContext) -> Optional[List[str]]:
+    """
+    Zwraca pliki zmienione od commita, na ktorym repozytorium przetworzono w poprzednim
+    uruchomieniu. Zwraca None, gdy nalezy przeszukac wszystkie pliki: repozytorium nie
+    bylo przetworzone lub zapamietany commit nie jest przodkiem HEAD
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    Optional[List[str]]
+        pliki kandydatow do zmiany lub None
+    """
+    since = context.processed.get(job.project)
+    if since is None:
+        return None
+    with metrics.METRICS.timer("discover_files", mode="incremental"):
+        files = scanner.git_changed_files(job.abso, since, context.extensions,
+                                          context.scan_options.ignored_dirs)
+    if files is None:
+        print(f"Commit {since} is not an ancestor of HEAD in project {job.project}, "
+              f"scanning all files")
+        return None
+    print(f"Scanning {len(files)} files changed since {since}")
+    metrics.METRICS.increment("files_discovered", len(files))
+    return files
+
+
+def discover_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap discovery: otwiera repozytorium, wykonuje akcje gitowe przed zmianami
+    i wyszukuje pliki kandydatow
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    bitbucket = context.bitbucket
+    if job.repo is None and not open_repository(job, context):
+        return False
+    with metrics.METRICS.timer("git", operation="prepare"):
+        if context.worktree_directory is not None:
+            open_worktree(job, context, create=True)
         else:
-            print(f"Files with str not found in project {project}")
+            execute_git_action(job.repo, context.flags, context.master,
+                               get_required_property("branch", bitbucket) if bitbucket
+                               else None, context.git_backend, context.prefetch)
+    if context.processed is not None:
+        job.base = job.repo.head.commit.hexsha
+    job.files = find_candidate_files(job, context)
+    return True
+
+
+def open_worktree(job: RepoJob, context: RunContext, create: bool):
+    """
+    Tworzy tymczasowy worktree repozytorium i przelacza na niego job.abso oraz job.repo
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium z otwartym repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    create : bool
+        True tworzy galaz z pobranego mastera, False uzywa galezi istniejacej
+        (wznowienie przerwanego uruchomienia)
+    """
+    branch = context.bitbucket["branch"]
+    path = os.path.join(context.worktree_directory, job.project)
+    if create:
+        gitbackend.create_worktree(job.repo, path, branch, context.master, context.prefetch)
+    else:
+        gitbackend.attach_worktree(job.repo, path, branch)
+    job.source, job.abso = job.repo, path
+    job.repo = gitbackend.open_repo(path, context.git_backend)
+
+
+def rewrite_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap scan/rewrite: zastepuje ciagi znakow w znalezionych plikach
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    rewrite_result = process_files(job.abso, context.extensions, context.replacer,
+                                   context.scan_options, context.cache, job.files)
+    metrics.METRICS.increment("files_scanned", rewrite_result.scanned)
+    metrics.METRICS.increment("bytes_scanned", rewrite_result.bytes_read)
+    metrics.METRICS.increment("files_changed", len(rewrite_result.changed))
+    metrics.METRICS.increment("files_skipped", len(rewrite_result.skipped))
+    metrics.METRICS.increment("occurrences", sum(rewrite_result.occurrences.values()))
+    for file, reason in rewrite_result.skipped.items():
+        print(f"Skipped {os.path.relpath(file, job.abso)}: {reason}")
+    job.changed = rewrite_result.changed
+    job.result.skipped = len(rewrite_result.skipped)
+    job.result.matched = len(job.changed)
+    if len(job.changed) == 0:
+        print(f"Files with str not found in project {job.project}")
+        job.result.status = "no-match"
+        return False
+    return True
+
+
+def commit_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap commit: dodaje zmienione pliki i tworzy commita
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    gitbackend.commit_files(job.repo, context.git_backend, job.changed, context.commit_message)
+    job.result.status = "committed"
+    return True
+
+
+def validate_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap validate: uruchamia validate_command w repozytorium, kod wyjscia rozny od 0
+    ustawia status invalid i wypisuje koniec wyjscia polecenia. Polecenie przekraczajace
+    validate_timeout jest przerywane razem z uruchomionymi procesami i rowniez daje
+    status invalid
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy walidacja sie powiodla
+    """
+    with metrics.METRICS.timer("validate"), \
+            subprocess.Popen(context.validate_command, shell=True, cwd=job.abso,
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                             start_new_session=True) as process:
+        try:
+            stdout, _ = process.communicate(timeout=context.validate_timeout or None)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.communicate()
+            print(f"Validation timed out in project {job.project} "
+                  f"after {context.validate_timeout} seconds")
+            job.result.status = "invalid"
+            return False
+    if process.returncode != 0:
+        print(f"Validation failed in project {job.project} "
+              f"with exit code {process.returncode}")
+        if stdout:
+            print("\n".join(stdout.splitlines()[-20:]))
+        job.result.status = "invalid"
+        return False
+    return True
+
+
+def push_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap push: wysyla obecny branch na origin
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        True gdy repozytorium przechodzi do kolejnego etapu
+    """
+    gitbackend.push_branch(job.repo, atomic=context.two_phase)
+    job.result.status = "changed"
+    return bool(context.bitbucket)
+
+
+def pull_request_repository(job: RepoJob, context: RunContext) -> bool:
+    """
+    Etap PR: wystawia pull requesta na bitbuckecie
+
+    Parameters
+    ----------
+    job : RepoJob
+        stan przetwarzania repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    bool
+        zawsze False, to ostatni etap
+    """
+    process_bitbucket(context, job)
+    return False
+
+
+VALIDATION_GATES = ("all", "each")
+
+REPO_STAGES = (("discovery", discover_repository), ("rewrite", rewrite_repository),
+               ("commit", commit_repository), ("push", push_repository),
+               ("pr", pull_request_repository))
+
+
+def get_repo_stages(context: RunContext) -> Tuple:
+    """
+    Zwraca etapy przetwarzania repozytorium, z etapem clone przed REPO_STAGES
+    gdy repozytoria sa klonowane z remote_repositories lub z etapem fetch przy prefetch
+
+    Parameters
+    ----------
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    Tuple
+        pary nazwa etapu, funkcja etapu
+    """
+    if context.clone_directory is not None:
+        return (("clone", clone_remote_repository),) + REPO_STAGES
+    if context.prefetch:
+        return (("fetch", fetch_repository),) + REPO_STAGES
+    return REPO_STAGES
+
+
+def plan_repository(current_directory: str, project: str, context: RunContext) -> RepoResult:
+    """
+    Wyszukuje dopasowania w repozytorium bez zmieniania plikow oraz bez akcji
+    gitowych i bitbucketowych. Tworzy rekord manifestu z plikami do zmiany,
+    liczba wystapien, liczba bajtow oraz czasami etapow
+
+    Parameters
+    ----------
+    current_directory : str
+        katalog z repozytoriami
+    project : str
+        nazwa katalogu z repozytorium
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    RepoResult
+        wynik z rekordem manifestu
+    """
+    abso = os.path.join(current_directory, project)
+    try:
+        Repo(abso)
+    except (InvalidGitRepositoryError, NoSuchPathError) as error:
+        print(f"Cant create repository instance from {abso} ", error)
+        return RepoResult(project, "skipped")
+    started = time.perf_counter()
+    files = list(discover_files(abso, context.extensions, context.replacer,
+                                context.scan_options))
+    discovered = time.perf_counter()
+    rewrite_result = process_files(abso, context.extensions, context.replacer,
+                                   context.scan_options, context.cache, files, dry_run=True)
+    scanned = time.perf_counter()
+    record = {
+        "project": project,
+        "key": context.replacer.identity,
+        "files": {os.path.relpath(file, abso): count
+                  for file, count in rewrite_result.occurrences.items()},
+        "occurrences": sum(rewrite_result.occurrences.values()),
+        "bytes": sum(os.path.getsize(file) for file in rewrite_result.changed),
+        "skipped": {os.path.relpath(file, abso): reason
+                    for file, reason in rewrite_result.skipped.items()},
+        "timings": {"discovery": round(discovered - started, 6),
+                    "scan": round(scanned - discovered, 6)},
+    }
+    status = "planned" if rewrite_result.changed else "no-match"
+    return RepoResult(project, status, len(rewrite_result.changed),
+                      len(rewrite_result.skipped), record=record)
+
+
+def read_planned_files(filename: str, current_directory: str,
+                       context: RunContext) -> Dict[str, List[str]]:
+    """
+    Wczytuje manifest i zwraca pliki do zmiany dla kazdego repozytorium.
+    Zwraca blad, gdy manifest zostal utworzony dla innej tabeli zamian
+
+    Parameters
+    ----------
+    filename : str
+        adres pliku z manifestem
+    current_directory : str
+        katalog z repozytoriami
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    Dict[str, List[str]]
+        projekt => adresy plikow do zmiany, tylko dla projektow z dopasowaniami
+    """
+    planned = {}
+    for record in manifest.read_manifest(filename):
+        if record.get("key") != context.replacer.identity:
+            print(f"Manifest {filename} was created for different replacements "
+                  f"or match_mode (project {record.get('project')})")
+            sys.exit(1)
+        if record["files"]:
+            abso = os.path.join(current_directory, record["project"])
+            planned[record["project"]] = [os.path.join(abso, file) for file in record["files"]]
+    return planned
+
+
+def process_repositories(projects: List[str], process: Callable[[str], RepoResult],
+                         jobs: int = 1) -> List[RepoResult]:
+    """
+    Przetwarza repozytoria podana funkcja, dla jobs wiekszego niz 1 na puli watkow
+
+    Parameters
+    ----------
+    projects : List[str]
+        lista katalogow z repozytoriami
+    process : Callable[[str], RepoResult]
+        funkcja przetwarzajaca jedno repozytorium
+    jobs : int
+        maksymalna liczba jednoczesnie przetwarzanych repozytoriow
+    Returns
+    -------
+    List[RepoResult]
+        wyniki w kolejnosci podanych repozytoriow
+    """
+    if jobs > 1:
+        return process_repositories_parallel(projects, process, jobs)
+    return [process(project) for project in projects]
+
+
+def process_repositories_parallel(projects: List[str], process: Callable[[str], RepoResult],
+                                  jobs: int) -> List[RepoResult]:
+    """
+    Przetwarza repozytoria na puli watkow o rozmiarze jobs. Wyjscie kazdego
+    repozytorium jest buforowane i wypisywane w calosci po jego zakonczeniu.
+
+    Parameters
+    ----------
+    projects : List[str]
+        lista katalogow z repozytoriami
+    process : Callable[[str], RepoResult]
+        funkcja przetwarzajaca jedno repozytorium
+    jobs : int
+        maksymalna liczba jednoczesnie przetwarzanych repozytoriow
+    Returns
+    -------
+    List[RepoResult]
+        wyniki w kolejnosci podanych repozytoriow
+    """
+    output = ThreadOutput(sys.stdout)
+    lock = threading.Lock()
+
+    def worker(project: str) -> RepoResult:
+        with output.capture() as buffer:
+            result = process(project)
+        result.output = buffer.getvalue()
+        with lock:
+            output.stream.write(f"=== {project} ===\n{result.output}")
+            output.stream.flush()
+        return result
+
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(worker, projects))
+    finally:
+        sys.stdout = output.stream
+
+
+def process_repositories_pipeline(jobs: List[RepoJob], context: RunContext,
+                                  options: PipelineOptions,
+                                  stages: Optional[Sequence[Tuple[str, Callable]]] = None,
+                                  keep_open: Optional[Callable[[RepoJob], bool]] = None
+                                  ) -> List[RepoResult]:
+    """
+    Przetwarza repozytoria potokiem etapow, domyslnie z get_repo_stages. Kazdy etap ma
+    wlasna liczbe watkow, a miedzy etapami sa kolejki o rozmiarze options.queue_size.
+    Wyjscie repozytorium jest buforowane i wypisywane w calosci po jego zakonczeniu.
+
+    Parameters
+    ----------
+    jobs : List[RepoJob]
+        repozytoria do przetworzenia
+    context : RunContext
+        ustawienia uruchomienia
+    options : PipelineOptions
+        ustawienia potoku
+    stages : Optional[Sequence[Tuple[str, Callable]]]
+        pary nazwa etapu, funkcja etapu
+    keep_open : Optional[Callable[[RepoJob], bool]]
+        repozytoria dla ktorych zwraca True nie sa zamykane po ostatnim etapie
+    Returns
+    -------
+    List[RepoResult]
+        wyniki w kolejnosci podanych repozytoriow
+    """
+    output = ThreadOutput(sys.stdout)
+    lock = threading.Lock()
+    printed = {job.project: len(job.result.output) for job in jobs}
+
+    def stage_function(name: str, function: Callable[[RepoJob, RunContext], bool]):
+        def stage(job: RepoJob) -> bool:
+            with output.capture() as buffer:
+                try:
+                    return run_stage(name, function, job, context)
+                finally:
+                    job.result.output += buffer.getvalue()
+        return stage
+
+    def done(job: RepoJob):
+        if keep_open is None or not keep_open(job):
+            close_repository(job)
+        with lock:
+            output.stream.write(f"=== {job.project} ===\n"
+                                f"{job.result.output[printed[job.project]:]}")
+            output.stream.flush()
+
+    pipeline_stages = [pipeline.Stage(name, stage_function(name, function),
+                                      options.workers[name])
+                       for name, function in stages or get_repo_stages(context)]
+    sys.stdout = output
+    try:
+        pipeline.run_pipeline(jobs, pipeline_stages, options.queue_size, done)
+    finally:
+        sys.stdout = output.stream
+    return [job.result for job in jobs]
+
 
+def process_repositories_two_phase(jobs: List[RepoJob], context: RunContext,
+                                   options: PipelineOptions) -> List[RepoResult]:
+    """
+    Przetwarza repozytoria w dwoch fazach. W pierwszej wykonywane sa etapy do commita
+    oraz walidacja, bez zmian na origin, a repozytoria zostaja otwarte. W drugiej
+    wysylane sa zacommitowane repozytoria, a na koniec pull requesty tworzone sa
+    zbiorczo. Przy validation_gate=all druga faza jest pomijana, gdy pierwsza
+    nie powiodla sie w ktorymkolwiek repozytorium
+
+    Parameters
+    ----------
+    jobs : List[RepoJob]
+        repozytoria do przetworzenia
+    context : RunContext
+        ustawienia uruchomienia
+    options : PipelineOptions
+        ustawienia potoku
+    Returns
+    -------
+    List[RepoResult]
+        wyniki w kolejnosci podanych repozytoriow
+    """
+    stages = get_repo_stages(context)
+    split = [name for name, _ in stages].index("push")
+    phase_one = stages[:split]
+    if context.validate_command:
+        phase_one += (("validate", validate_repository),)
+    print("Phase one: commit and validate")
+    process_repositories_pipeline(jobs, context, options, phase_one, is_committed)
+    committed = [job for job in jobs if is_committed(job)]
+    failed = [job.project for job in jobs if job.result.status in ("failed", "invalid")]
+    if failed and context.validation_gate == "all":
+        print(f"Phase one failed in {len(failed)} repositories ({' '.join(failed)}), "
+              f"nothing was pushed")
+        for job in committed:
+            close_repository(job)
+        return [job.result for job in jobs]
+    print(f"Phase two: push {len(committed)} repositories")
+    process_repositories_pipeline(committed, context, options, stages[split:split + 1])
+    create_pull_requests(committed, context, options.workers["pr"])
+    return [job.result for job in jobs]
+
+
+def is_committed(job: RepoJob) -> bool:
+    return job.result.status == "committed"
+
+
+def create_pull_requests(jobs: List[RepoJob], context: RunContext, concurrency: int):
+    """
+    Tworzy pull requesty dla wyslanych repozytoriow jednym zbiorczym wywolaniem
+    asyncbitbucket.create_pull_requests. Pull requesty utworzone w przerwanym
+    uruchomieniu sa odtwarzane z dziennika
 
-def process_files(abso: str, extensions: List[str], str_to_find: str, str_to_repl: str):
+    Parameters
+    ----------
+    jobs : List[RepoJob]
+        repozytoria po fazie drugiej
+    context : RunContext
+        ustawienia uruchomienia z propertiesami dla bitbucketa
+    concurrency : int
+        maksymalna liczba jednoczesnie tworzonych pull requestow
+    """
+    jobs = [job for job in jobs if job.result.status == "changed"]
+    if not context.bitbucket or not jobs:
+        return
+    for job in jobs:
+        if "pr" in job.completed:
+            resume_stage("pr", job, context)
+    jobs = [job for job in jobs if "pr" not in job.completed]
+    if not jobs:
+        return
+    reviewers_list, bitbucket_credentials, pr_title, workspace, branch \
+        = get_bitbucket_settings(context)
+    json = gitaction.create_pr_json(branch, reviewers_list, pr_title)
+    batch = [asyncbitbucket.PullRequest(workspace, os.path.basename(job.project), json)
+             for job in jobs]
+    with metrics.METRICS.timer("create_pull_requests"):
+        responses = asyncbitbucket.create_pull_requests(batch, bitbucket_credentials,
+                                                        concurrency)
+    for job, response in zip(jobs, responses):
+        print(f"=== {job.project} ===")
+        created = gitaction.report_pr_response(response)
+        job.result.pull_request = "created" if created else "failed"
+        metrics.METRICS.increment("pull_requests", status=job.result.pull_request)
+        record_stage("pr", False, job, context)
+
+
+def print_summary(results: List[RepoResult]):
+    """
+    Wypisuje tabele z podsumowaniem przetwarzania repozytoriow
+
+    Parameters
+    ----------
+    results : List[RepoResult]
+        wyniki przetwarzania repozytoriow
+    """
+    width = max([len("project")] + [len(result.project) for result in results])
+    print(f"{'project':<{width}}  {'status':<8}  {'files':>5}  {'skipped':>7}  pr")
+    for result in results:
+        print(f"{result.project:<{width}}  {result.status:<8}  {result.matched:>5}  "
+              f"{result.skipped:>7}  {result.pull_request or '-'}")
+
+
+def process_files(abso: str, extensions: List[str], replacer: rewriter.Replacer,
+                  options: ScanOptions = ScanOptions(),
+                  cache: Optional[scancache.ScanCache] = None,
+                  files: Optional[Iterable[str]] = None,
+                  dry_run: bool = False) -> rewriter.RewriteResult:
     """
-    Wyszukuje pliki o podanych rozszerzeniach i zastepuje ciag znakow
+    Wyszukuje pliki o podanych rozszerzeniach i zastepuje ciagi znakow
 
     Parameters
     ----------
@@ -258,125 +1813,307 @@ def process_files(abso: str, extensions: List[str], str_to_find: str, str_to_rep
         sciezka do repozytorium
     extensions : List[str]
         lista rozszerzen plikow ktorych szukamy
-    str_to_find : str
+    replacer : Replacer
+        tabela zamian
+    options : ScanOptions
+        ustawienia wyszukiwania
+    cache : Optional[ScanCache]
+        cache wynikow przeszukiwania, None wylacza cache
+    files : Optional[Iterable[str]]
+        pliki do przetworzenia, domyslnie wyszukiwane przez discover_files
+    dry_run : bool
+        tylko policz wystapienia, bez zapisywania plikow
+    Returns
+    -------
+    RewriteResult
+        Zwraca posortowana liste zmienionych plikow oraz pominiete pliki
+    """
+    if files is None:
+        files = discover_files(abso, extensions, replacer, options)
+    return rewriter.rewrite_files(files, replacer, threads=options.threads,
+                                  processes=options.processes, cache=cache,
+                                  encoding=options.encoding,
+                                  max_file_size=options.max_file_size, dry_run=dry_run)
+
+
+def discover_files(abso: str, extensions: List[str], replacer: rewriter.Replacer,
+                   options: ScanOptions = ScanOptions()) -> Iterable[str]:
+    """
+    Zwraca pliki kandydatow do zmiany, w zaleznosci od search_backend
+
+    Parameters
+    ----------
+    abso : str
+        sciezka do repozytorium
+    extensions : List[str]
         lista rozszerzen plikow ktorych szukamy
-    str_to_repl: str
-        string ktorym zastepujemy stary
+    replacer : Replacer
+        tabela zamian
+    options : ScanOptions
+        ustawienia wyszukiwania
     Returns
     -------
-    List[str]
-        Zwraca liste zmienionych plikow
+    Iterable[str]
+        pliki do przeszukania
     """
-    files = get_files_with_extension(abso, extensions)
-    matched_files = find_files_with_str(files, str_to_find)
-    modify_all_files(matched_files, str_to_find, str_to_repl)
-    return matched_files
+    if options.search_backend == "git" and not rewriter.is_wide_encoding(options.encoding):
+        try:
+            return scanner.git_candidate_files(abso, extensions, replacer.patterns,
+                                               replacer.mode, options.ignored_dirs)
+        except GitCommandError as error:
+            print(f"git grep failed in {abso}, falling back to python search ", error)
+    return scanner.walk_files_with_extension(abso, extensions, options.ignored_dirs)
 
 
-def process_bitbucket(bitbucket, commit_message: str, project: str):
+def process_bitbucket(context: RunContext, job: RepoJob):
     """
         Tworzy pull requesta w zaleznosci czy user skonfigurowal propertiesy dla bitbucketa.
+        Zapytanie wysylane jest przez asyncbitbucket na wspolnej petli asyncio.
+        Wynik zapisywany jest w RepoResult repozytorium.
 
         Parameters
         ----------
-        bitbucket
-            properitesy dla bitbucketa
-        commit_message : str
-            wiadomosc commita
-        project : str
-            projekt bitbucketowy
+        context : RunContext
+            ustawienia uruchomienia z propertiesami dla bitbucketa
+        job : RepoJob
+            stan przetwarzania repozytorium, nazwa katalogu (ostatni element sciezki)
+            to projekt bitbucketowy
         """
-    if bitbucket:
+    if context.bitbucket:
         reviewers_list, bitbucket_credentials, pr_title, workspace, branch \
-            = process_bitbucket_properties(bitbucket, commit_message)
+            = get_bitbucket_settings(context)
         json = gitaction.create_pr_json(branch, reviewers_list, pr_title)
-        gitaction.create_pr_request(json, workspace, project, bitbucket_credentials)
+        with metrics.METRICS.timer("create_pr_request"):
+            created = gitaction.create_pr_request(json, workspace,
+                                                  os.path.basename(job.project),
+                                                  bitbucket_credentials)
+        job.result.pull_request = "created" if created else "failed"
+        metrics.METRICS.increment("pull_requests", status=job.result.pull_request)
 
 
-def commit_add_push(repo: Repo, add: List[str], commit: str):
+def get_bitbucket_settings(context: RunContext) -> Tuple:
     """
-    Wykonuje gitowe polecenia add, commit, i push dla obecnego brancza
+    Zwraca propertiesy bitbucketa przetworzone przez process_bitbucket_properties.
+    Sa one wyliczane raz na uruchomienie, przy pierwszym pull requescie, dzieki czemu
+    credentiale sa czytane raz, a lista czlonkow workspace pobierana jest raz
 
     Parameters
     ----------
-    repo : Repo
-        obiekt repozytorium
-    add : List[str]
-        pliki do wykonania komendy add
-    commit : str
-        wiadomosc commita
+    context : RunContext
+        ustawienia uruchomienia
+    Returns
+    -------
+    Tuple
+        Tuple zwracany przez process_bitbucket_properties
     """
-    repo.git.add(add)
-    repo.git.commit('-m', commit)
-    repo.git.push('origin', 'HEAD')
+    with context.lock:
+        if context.bitbucket_settings is None:
+            context.bitbucket_settings = process_bitbucket_properties(
+                context.bitbucket, context.commit_message, context.cache_directory)
+        return context.bitbucket_settings
 
 
-def modify_all_files(files: List[str], old_str: str, new_str: str):
+def get_files_with_extension(abso: str, extensions: List[str],
+                             ignored_dirs: List[str] = scanner.DEFAULT_IGNORED_DIRS) -> List[str]:
     """
-    Zastepuje wszystkie wystapeinia starego stringa nowym stringiem
+    Zwraca pliki z danym rozszerzeniem
 
     Parameters
     ----------
-    files : List[str]
-        lista plikow do zmiany
-    old_str : str
-        ciag znakow do zmiany
-    new_str : str
-        na co zmienic ciag znakow
+    abso : str
+        adres gdzie szukamy plikow
+    extensions : List[str]
+        Lista rozszerzen
+    ignored_dirs : List[str]
+        katalogi ktore nie sa przeszukiwane
+    Returns
+    -------
+    List[str]
+        Lista plikow z podanymi rozszerzeniami
     """
-    for file in files:
-        with open(file) as file1:
-            new_content = file1.read().replace(old_str, new_str)
+    return list(scanner.walk_files_with_extension(abso, extensions, ignored_dirs))
 
-        with open(file, "w") as file2:
-            file2.write(new_content)
 
+def parse_scan_options(properties: Dict[str, str]) -> ScanOptions:
+    """
+    Metoda parsujaca konfiguracje na ustawienia wyszukiwania
 
-def find_files_with_str(files: List[str], string_to_find: str) -> List[str]:
+    Parameters
+    ----------
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    Returns
+    -------
+    ScanOptions
+        ustawienia wyszukiwania
+    """
+    encoding = properties.get("encoding", rewriter.DEFAULT_ENCODING)
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        print(f"Unknown encoding: {encoding}")
+        sys.exit(1)
+    return ScanOptions(get_ignored_dirs(properties), get_search_backend(properties),
+                       get_int_property("scan_threads", properties, 1),
+                       get_int_property("scan_processes", properties, 0), encoding,
+                       get_int_property("max_file_size", properties, 0))
+
+
+def get_int_property(prop: str, properties: Dict[str, str], default: int) -> int:
     """
-    Znajduje i zwraca liste plikow z danym ciagiem znakow
+    Pobiera nieujemna liczbe calkowita ze slownika, zwraca blad gdy nie jest liczba
 
     Parameters
     ----------
-    files : List[str]
-        lista plikow do przeszukania
-    string_to_find : str
-        ciag znakow do znalezienia
+    prop : str
+        properties do sprawdzenia
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    default : int
+        wartosc gdy properties nie zostal podany
     Returns
     -------
-    List[str]
-        Zwraca liste plikow z danym ciageim znakow
+    int
+        wartosc propertiesa
+    """
+    value = properties.get(prop)
+    if value is None:
+        return default
+    if not value.isdigit():
+        print(f"Property {prop} should be a non-negative number, got: {value}")
+        sys.exit(1)
+    return int(value)
+
+
+def parse_inventory_options(properties: Dict[str, str]) -> InventoryOptions:
+    """
+    Metoda parsujaca konfiguracje na ustawienia wyboru repozytoriow
+
+    Parameters
+    ----------
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    Returns
+    -------
+    InventoryOptions
+        ustawienia wyboru repozytoriow
     """
-    files_with_str = []
-    for file in files:
-        with open(file) as open_file:
-            if string_to_find in open_file.read():
-                files_with_str.append(file)
-    return files_with_str
+    return InventoryOptions(bool(parse_logical_arg("recursive_discovery", properties)),
+                            properties.get("include_repos", "").split(),
+                            properties.get("exclude_repos", "").split(),
+                            properties.get("repositories_file"))
 
 
-def get_files_with_extension(abso: str, extensions: List[str]) -> List[str]:
+def parse_pipeline_options(properties: Dict[str, str], bitbucket, jobs: int) -> PipelineOptions:
     """
-    Zwraca pliki z danym rozszerzeniem
+    Metoda parsujaca konfiguracje na ustawienia potoku etapow
 
     Parameters
     ----------
-    abso : str
-        adres gdzie szukamy plikow
-    extensions : List[str]
-        Lista rozszerzen
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    bitbucket
+        propertiesy dla bitbucketa lub False
+    jobs : int
+        domyslna liczba watkow etapu z opcji -j/--jobs
+    Returns
+    -------
+    PipelineOptions
+        ustawienia potoku
+    """
+    workers = {name: get_int_property(f"{name}_jobs", properties, jobs)
+               for name in ["clone", "fetch"] + [name for name, _ in REPO_STAGES] + ["validate"]
+               if name != "pr"}
+    workers["pr"] = get_int_property("pr_concurrency", bitbucket or {},
+                                     asyncbitbucket.DEFAULT_CONCURRENCY)
+    return PipelineOptions(workers, get_int_property("pipeline_queue_size", properties,
+                                                     pipeline.DEFAULT_QUEUE_SIZE))
+
+
+def get_git_backend(properties: Dict[str, str]) -> str:
+    """
+    Pobiera sposob wykonywania operacji gitowych z konfiguracji, zwraca blad gdy jest nieznany
+
+    Parameters
+    ----------
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    Returns
+    -------
+    str
+        cli lub native
+    """
+    git_backend = properties.get("git_backend", "cli")
+    if git_backend not in gitbackend.GIT_BACKENDS:
+        print(f"Unknown git_backend: {git_backend}. "
+              f"Available: {' '.join(gitbackend.GIT_BACKENDS)}")
+        sys.exit(1)
+    return git_backend
+
+
+def get_validation_gate(properties: Dict[str, str]) -> str:
+    """
+    Pobiera validation_gate z konfiguracji, zwraca blad gdy jest nieznany
+
+    Parameters
+    ----------
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    Returns
+    -------
+    str
+        all lub each
+    """
+    validation_gate = properties.get("validation_gate", "all")
+    if validation_gate not in VALIDATION_GATES:
+        print(f"Unknown validation_gate: {validation_gate}. "
+              f"Available: {' '.join(VALIDATION_GATES)}")
+        sys.exit(1)
+    return validation_gate
+
+
+def get_search_backend(properties: Dict[str, str]) -> str:
+    """
+    Pobiera sposob wyszukiwania plikow z konfiguracji, zwraca blad gdy jest nieznany
+
+    Parameters
+    ----------
+    properties : Dict[str, str]
+        slownik z konfiguracja
+    Returns
+    -------
+    str
+        python lub git
+    """
+    search_backend = properties.get("search_backend", "python")
+    if search_backend not in scanner.SEARCH_BACKENDS:
+        print(f"Unknown search_backend: {search_backend}. "
+              f"Available: {' '.join(scanner.SEARCH_BACKENDS)}")
+        sys.exit(1)
+    return search_backend
+
+
+def get_ignored_dirs(properties: Dict[str, str]) -> List[str]:
+    """
+    Pobiera liste ignorowanych katalogow z konfiguracji, lub zwraca domyslna
+
+    Parameters
+    ----------
+    properties : Dict[str, str]
+        slownik z konfiguracja
     Returns
     -------
     List[str]
-        Lista plikow z podanymi rozszerzeniami
+        nazwy katalogow ktore nie sa przeszukiwane
     """
-    files = []
-    for ext in extensions:
-        files += glob.glob(f"{abso}/**/*.{ext}", recursive=True)
-    return files
+    ignored_dirs = properties.get("ignored_dirs")
+    if ignored_dirs is None:
+        return list(scanner.DEFAULT_IGNORED_DIRS)
+    return ignored_dirs.split()
 
 
-def execute_git_action(repo: Repo, arguments: ClassWithFlags, master: str, branch: str):
+def execute_git_action(repo: Repo, arguments: ClassWithFlags, master: str, branch: str,
+                       backend: str = "cli", fetched: bool = False):
     """
     Wykonuje stash, checkout do mastera, pull, oraz tworzenie nowej galezi w zaleznosci
     od podanych wartosci logicznych
@@ -391,18 +2128,19 @@ def execute_git_action(repo: Repo, arguments: ClassWithFlags, master: str, branc
         nazwa galezi master
     branch : str
         nazwa brancha do utworzenia i checkout
+    backend : str
+        sposob wykonywania operacji gitowych, cli lub native
+    fetched : bool
+        zmiany z origin zostaly pobrane w etapie fetch, pull wykonywany jest
+        jako fast-forward
     """
-    if arguments.stash_before_work:
-        repo.git.stash('save')
-    if arguments.checkout_to_master_before_work:
-        repo.git.checkout(master)
-    if arguments.pull_before_work:
-        repo.git.pull()
-    if branch:
-        repo.git.checkout('-b', branch)
+    gitbackend.prepare_branch(repo, backend, arguments.stash_before_work,
+                              arguments.checkout_to_master_before_work,
+                              arguments.pull_before_work, master, branch, fetched)
 
 
-def process_bitbucket_properties(properties: dict, commit_message: str) -> Tuple:
+def process_bitbucket_properties(properties: dict, commit_message: str,
+                                 cache_directory: Optional[str] = None) -> Tuple:
     """
     Pobiera wymagana propertiesty Bitbukceta, jesli nie ma wymaganych pobiera domyslne.
     Dla listy revieroww pobiera wszystkich z projektu gdy nie dostarczymy.
@@ -414,6 +2152,8 @@ def process_bitbucket_properties(properties: dict, commit_message: str) -> Tuple
         slownik z propertiesami
     commit_message : str
         wiadomosc commita, jest zwracana gdy nie ma argumentu z nazwa pull requesta
+    cache_directory : Optional[str]
+        katalog dla cache czlonkow workspace, uzywany gdy members_cache_ttl > 0
     Returns
     -------
     Tuple
@@ -430,8 +2170,13 @@ def process_bitbucket_properties(properties: dict, commit_message: str) -> Tuple
     if properties.get("reviewers"):
         reviewers_list = process_reviewers_arg(properties.get("reviewers").split())
     else:
-        reviewers_map = uidsread.get_users_for_given_workspace \
-            (bitbucket_workspace, bitbucket_credentials)
+        ttl = get_int_property("members_cache_ttl", properties, 0)
+        if ttl and cache_directory:
+            reviewers_map = uidsread.get_users_for_given_workspace_cached(
+                bitbucket_workspace, bitbucket_credentials, cache_directory, ttl)
+        else:
+            reviewers_map = uidsread.get_users_for_given_workspace \
+                (bitbucket_workspace, bitbucket_credentials)
         reviewers_list = uidsread.map_users_to_json_array(*reviewers_map)
 
     pr_title = properties.get("prtitle") if properties.get("prtitle") else commit_message
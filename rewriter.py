@@ -0,0 +1,472 @@
+"""
+Silnik zamiany ciagow znakow w plikach w jednym przebiegu
+
+Wszystkie zamiany z tabeli wyszukiwane sa jednym wyrazeniem regularnym kompilowanym
+raz na cale uruchomienie, wiec plik jest przeszukiwany i zapisywany raz niezaleznie
+od liczby zamian. Dostepne sa trzy tryby dopasowania:
+literal - ciagi znakow (alternatywa od najdluzszego ciagu),
+word - ciagi znakow wystepujace jako cale slowa (identyfikatory),
+regex - wyrazenia regularne, zamiana moze zawierac odwolania do grup (np. \\1).
+
+Kazdy plik czytany jest tylko raz, porcjami o stalym rozmiarze. Dopasowania
+na granicy porcji sa obslugiwane przez przeniesienie koncowki bufora do kolejnej
+porcji (w trybie regex plik przetwarzany jest w calosci, bo dlugosc dopasowania
+nie jest ograniczona). Plik tymczasowy tworzony jest dopiero przy pierwszym
+dopasowaniu, a po zakonczeniu zapisu atomowo podmienia oryginal. Pliki bez
+dopasowania nie sa modyfikowane (nie zmienia sie rowniez ich mtime).
+
+Pliki moga byc przetwarzane rownolegle na puli watkow, a duze pliki opcjonalnie
+na puli procesow. Lista zmienionych plikow jest zawsze posortowana, dzieki czemu
+zawartosc commita nie zalezy od kolejnosci przetwarzania. Opcjonalny ScanCache
+pozwala pominac pliki, ktore nie zmienily sie i nie zawieraly szukanego ciagu znakow.
+
+Pliki binarne (bajt NUL w pierwszym bloku, chyba ze kodowanie jest wielobajtowe jak
+utf-16/utf-32 lub plik zaczyna sie od BOM), pliki wieksze niz max_file_size oraz
+pliki ktore nie sa zapisane w podanym kodowaniu sa pomijane i zwracane jako pominiete,
+zamiast przerywac cale uruchomienie.
+
+Definiuje funkcje rewrite_files z ktorej korzysta skrypt resolver.py
+"""
+import codecs
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, TextIO
+
+from scancache import ScanCache
+
+CHUNK_SIZE = 1024 * 1024
+LARGE_FILE_SIZE = 8 * 1024 * 1024
+SNIFF_SIZE = 8192
+DEFAULT_ENCODING = "utf-8"
+MATCH_MODES = ("literal", "word", "regex")
+UNICODE_BOMS = (codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE,
+                codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+GROUP_REFERENCE = re.compile(r"\\\\|\\g<(\d+)>|\\([1-9][0-9]?)")
+
+
+class Replacer:
+    """
+    Zamienia wszystkie wzorce z tabeli zamian w jednym przebiegu
+
+    Atrybuty
+    ----------
+    replacements : Dict[str, str]
+        tabela zamian wzorzec => ciag do zastapienia
+    mode : str
+        tryb dopasowania: literal, word lub regex
+    pattern : re.Pattern
+        skompilowana alternatywa wszystkich wzorcow
+    overlap : Optional[int]
+        liczba znakow przenoszonych miedzy porcjami pliku, None gdy plik
+        musi byc przetworzony w calosci
+    context : int
+        liczba juz przetworzonych znakow przenoszonych dla sprawdzenia granicy slowa
+    key : str
+        klucz opisujacy szukane wzorce, uzywany przez cache
+    identity : str
+        klucz opisujacy wzorce razem z ciagami do zastapienia, uzywany przez manifest
+        i dziennik uruchomienia
+    """
+
+    def __init__(self, replacements: Dict[str, str], mode: str = "literal"):
+        if not replacements or "" in replacements:
+            raise ValueError("String to find can't be empty")
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {mode}")
+        self.replacements = dict(replacements)
+        self.mode = mode
+        self.key = json.dumps([mode] + sorted(self.replacements))
+        self.identity = json.dumps([mode] + sorted(self.replacements.items()))
+        self.templates = {}
+        if mode == "regex":
+            self.pattern = self.compile_regex()
+            self.overlap = None
+            self.context = 0
+            return
+        ordered = sorted(self.replacements, key=len, reverse=True)
+        alternation = "|".join(re.escape(old_str) for old_str in ordered)
+        if mode == "word":
+            self.pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+            self.overlap = len(ordered[0])
+            self.context = 1
+        else:
+            self.pattern = re.compile(alternation)
+            self.overlap = len(ordered[0]) - 1
+            self.context = 0
+
+    def compile_regex(self) -> re.Pattern:
+        """
+        Laczy wyrazenia regularne w jedna alternatywe. Kazde wyrazenie jest w nazwanej
+        grupie, a numery grup w zamianach sa przesuwane tak, aby wskazywaly
+        na grupy tego wyrazenia w polaczonym wzorcu
+
+        Returns
+        -------
+        re.Pattern
+            skompilowana alternatywa wyrazen
+        """
+        alternatives = []
+        offset = 0
+        for index, (regex, template) in enumerate(self.replacements.items()):
+            groups = re.compile(regex).groups
+            offset += 1
+            alternatives.append(f"(?P<_r{index}>{regex})")
+            self.templates[f"_r{index}"] = shift_group_references(template, offset)
+            offset += groups
+        return re.compile("|".join(alternatives))
+
+    @property
+    def patterns(self) -> List[str]:
+        """
+        Zwraca liste wzorcow do znalezienia
+        """
+        return list(self.replacements)
+
+    def substitute(self, match: re.Match) -> str:
+        """
+        Zwraca zamiane dla dopasowania
+
+        Parameters
+        ----------
+        match : re.Match
+            dopasowanie
+        Returns
+        -------
+        str
+            tekst ktory zastepuje dopasowanie
+        """
+        if self.mode == "regex":
+            return match.expand(self.templates[match.lastgroup])
+        return self.replacements[match.group()]
+
+    def replace(self, buffer: str, start: int, final: bool) -> Tuple[str, int, int]:
+        """
+        Zamienia wystapienia w buforze od pozycji start (znaki przed nia sa juz
+        przetworzone i sluza tylko jako kontekst). Gdy bufor nie jest ostatni,
+        koncowka w ktorej moze zaczynac sie niepelne dopasowanie nie jest przetwarzana
+
+        Parameters
+        ----------
+        buffer : str
+            bufor do przetworzenia
+        start : int
+            pozycja od ktorej zaczyna sie nieprzetworzona czesc bufora
+        final : bool
+            czy jest to ostatni bufor w pliku
+        Returns
+        -------
+        Tuple[str, int, int]
+            przetworzona czesc bufora, pozycja od ktorej bufor nie zostal przetworzony,
+            liczba zamian
+        """
+        if final:
+            limit = len(buffer)
+        elif self.overlap is None:
+            return "", start, 0
+        else:
+            limit = max(start, len(buffer) - self.overlap)
+        parts = []
+        position = start
+        count = 0
+        for match in self.pattern.finditer(buffer, start):
+            if match.start() >= limit:
+                break
+            parts.append(buffer[position:match.start()])
+            parts.append(self.substitute(match))
+            position = match.end()
+            count += 1
+        rest = max(position, limit)
+        parts.append(buffer[position:rest])
+        return "".join(parts), rest, count
+
+
+def shift_group_references(template: str, offset: int) -> str:
+    """
+    Przesuwa numery grup (\\1, \\g<1>) w zamianie o podana wartosc. Odwolanie do calego
+    dopasowania (\\g<0>) wskazuje na grupe o numerze offset
+
+    Parameters
+    ----------
+    template : str
+        zamiana z odwolaniami do grup
+    offset : int
+        numer grupy obejmujacej cale wyrazenie
+    Returns
+    -------
+    str
+        zamiana z przesunietymi numerami grup
+    """
+    def shift(match: re.Match) -> str:
+        number = match.group(1) or match.group(2)
+        if number is None:
+            return match.group()
+        return f"\\g<{int(number) + offset}>"
+
+    return GROUP_REFERENCE.sub(shift, template)
+
+
+@dataclass
+class RewriteResult:
+    """
+    Klasa przechowujaca wynik przetwarzania plikow
+
+    Atrybuty
+    ----------
+    changed : List[str]
+        posortowana lista zmienionych plikow
+    skipped : Dict[str, str]
+        pominiete pliki => powod pominiecia
+    occurrences : Dict[str, int]
+        zmienione pliki => liczba zamienionych wystapien
+    scanned : int
+        liczba przeczytanych plikow (bez pominietych przez cache)
+    bytes_read : int
+        suma rozmiarow przeczytanych plikow
+    """
+
+    changed: List[str] = field(default_factory=list)
+    skipped: Dict[str, str] = field(default_factory=dict)
+    occurrences: Dict[str, int] = field(default_factory=dict)
+    scanned: int = 0
+    bytes_read: int = 0
+
+
+class SkippedFile(Exception):
+    """
+    Wyjatek oznaczajacy, ze plik nie moze zostac przetworzony (np. jest binarny
+    lub nie jest zapisany w podanym kodowaniu)
+    """
+
+
+def rewrite_files(files: Iterable[str], replacer: Replacer,
+                  chunk_size: int = CHUNK_SIZE, threads: int = 1,
+                  processes: int = 0, cache: Optional[ScanCache] = None,
+                  encoding: str = DEFAULT_ENCODING, max_file_size: int = 0,
+                  dry_run: bool = False) -> RewriteResult:
+    """
+    Zastepuje ciagi znakow we wszystkich plikach, zwraca liste zmienionych
+    oraz pominietych plikow
+
+    Parameters
+    ----------
+    files : Iterable[str]
+        pliki do przeszukania
+    replacer : Replacer
+        tabela zamian
+    chunk_size : int
+        rozmiar porcji czytanej z pliku
+    threads : int
+        liczba watkow czytajacych pliki
+    processes : int
+        liczba procesow dla plikow wiekszych niz LARGE_FILE_SIZE, 0 wylacza pule procesow
+    cache : Optional[ScanCache]
+        cache wynikow przeszukiwania, None wylacza cache
+    encoding : str
+        kodowanie plikow
+    max_file_size : int
+        pliki wieksze niz podana liczba bajtow sa pomijane, 0 wylacza limit
+    dry_run : bool
+        tylko policz wystapienia, bez zapisywania plikow
+    Returns
+    -------
+    RewriteResult
+        zmienione (lub do zmiany przy dry_run) i pominiete pliki
+    """
+    process_pool = ProcessPoolExecutor(processes) if processes > 0 else None
+
+    def rewrite(file: str) -> Tuple[str, int, Optional[str], Optional[int]]:
+        stat = os.stat(file)
+        if max_file_size and stat.st_size > max_file_size:
+            return file, 0, f"larger than {max_file_size} bytes", None
+        if cache is not None and cache.is_known_miss(file, replacer.key, stat):
+            return file, 0, None, None
+        try:
+            if process_pool is not None and stat.st_size >= LARGE_FILE_SIZE:
+                count = process_pool.submit(rewrite_file, file, replacer, chunk_size,
+                                            encoding, dry_run).result()
+            else:
+                count = rewrite_file(file, replacer, chunk_size, encoding, dry_run)
+        except SkippedFile as error:
+            return file, 0, str(error), stat.st_size
+        if cache is not None and not count:
+            cache.store(file, replacer.key, stat, False)
+        return file, count, None, stat.st_size
+
+    try:
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(rewrite, files))
+        else:
+            results = [rewrite(file) for file in files]
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+    results.sort()
+    return RewriteResult([file for file, count, _, _ in results if count],
+                         {file: reason for file, _, reason, _ in results if reason},
+                         {file: count for file, count, _, _ in results if count},
+                         sum(1 for _, _, _, size in results if size is not None),
+                         sum(size for _, _, _, size in results if size is not None))
+
+
+def rewrite_file(path: str, replacer: Replacer, chunk_size: int = CHUNK_SIZE,
+                 encoding: str = DEFAULT_ENCODING, dry_run: bool = False) -> int:
+    """
+    Czyta plik porcjami i strumieniowo zapisuje zamieniona zawartosc do pliku
+    tymczasowego, ktory na koniec zastepuje oryginal. Plik zapisywany jest w tym
+    samym kodowaniu i z tymi samymi znakami konca linii
+
+    Parameters
+    ----------
+    path : str
+        adres pliku
+    replacer : Replacer
+        tabela zamian
+    chunk_size : int
+        rozmiar porcji czytanej z pliku
+    encoding : str
+        kodowanie pliku
+    dry_run : bool
+        tylko policz wystapienia, bez zapisywania pliku
+    Returns
+    -------
+    int
+        liczba zamienionych wystapien, 0 gdy plik nie zostal zmieniony
+
+    Raises
+    ------
+    SkippedFile
+        gdy plik jest binarny lub nie moze zostac zdekodowany/zakodowany
+    """
+    read_size = -1 if replacer.overlap is None else chunk_size
+    count = 0
+    emitted = 0
+    carry = ""
+    start = 0
+    target = None
+    tmp_path = None
+    try:
+        with open(path, "rb") as raw:
+            if is_binary(raw.peek(SNIFF_SIZE)[:SNIFF_SIZE], encoding):
+                raise SkippedFile("binary file")
+            source = io.TextIOWrapper(raw, encoding=encoding, newline='')
+            while True:
+                chunk = source.read(read_size)
+                final = not chunk
+                buffer = carry + chunk
+                out, rest, found = replacer.replace(buffer, start, final)
+                start = min(replacer.context, rest)
+                carry = buffer[rest - start:]
+                if found and target is None and not dry_run:
+                    target, tmp_path = open_temp_file(path, encoding)
+                    copy_prefix(path, target, emitted, chunk_size, encoding)
+                if target is None:
+                    emitted += len(out)
+                else:
+                    target.write(out)
+                count += found
+                if final:
+                    break
+        if target is None:
+            return count
+        target.close()
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException as error:
+        if target is not None:
+            target.close()
+            os.unlink(tmp_path)
+        if isinstance(error, UnicodeError):
+            reason = getattr(error, "reason", error)
+            raise SkippedFile(f"not valid {encoding}: {reason}") from error
+        raise
+    return count
+
+
+def is_binary(head: bytes, encoding: str) -> bool:
+    """
+    Sprawdza czy plik jest binarny na podstawie pierwszego bloku. Bajt NUL nie oznacza
+    pliku binarnego, gdy kodowanie jest wielobajtowe lub plik zaczyna sie od BOM
+
+    Parameters
+    ----------
+    head : bytes
+        pierwszy blok pliku
+    encoding : str
+        kodowanie pliku
+    Returns
+    -------
+    bool
+        True gdy plik jest binarny
+    """
+    return b"\0" in head and not is_wide_encoding(encoding) \
+        and not head.startswith(UNICODE_BOMS)
+
+
+def is_wide_encoding(encoding: str) -> bool:
+    """
+    Sprawdza czy kodowanie zapisuje znaki ASCII z bajtami NUL (np. utf-16, utf-32)
+
+    Parameters
+    ----------
+    encoding : str
+        nazwa kodowania
+    Returns
+    -------
+    bool
+        True dla kodowan wielobajtowych
+    """
+    return b"\0" in "a".encode(encoding)
+
+
+def open_temp_file(path: str, encoding: str) -> Tuple[TextIO, str]:
+    """
+    Tworzy plik tymczasowy w katalogu pliku, aby os.replace byl atomowy
+
+    Parameters
+    ----------
+    path : str
+        adres zmienianego pliku
+    encoding : str
+        kodowanie pliku
+    Returns
+    -------
+    Tuple[TextIO, str]
+        otwarty plik tymczasowy oraz jego adres
+    """
+    directory, name = os.path.split(path)
+    handle, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    return open(handle, "w", encoding=encoding, newline=''), tmp_path
+
+
+def copy_prefix(path: str, target: TextIO, length: int, chunk_size: int, encoding: str):
+    """
+    Kopiuje do pliku tymczasowego poczatek pliku, ktory zostal przeczytany
+    przed pierwszym dopasowaniem
+
+    Parameters
+    ----------
+    path : str
+        adres zmienianego pliku
+    target : TextIO
+        plik tymczasowy
+    length : int
+        liczba znakow do skopiowania
+    chunk_size : int
+        rozmiar porcji czytanej z pliku
+    encoding : str
+        kodowanie pliku
+    """
+    with open(path, encoding=encoding, newline='') as source:
+        while length > 0:
+            chunk = source.read(min(chunk_size, length))
+            if not chunk:
+                break
+            target.write(chunk)
+            length -= len(chunk)
@@ -0,0 +1,122 @@
+"""
+Trwaly cache wynikow przeszukiwania plikow
+
+Dla kazdego pliku i szukanego klucza zapisywany jest rozmiar, mtime_ns oraz informacja
+czy klucz zostal znaleziony. Jesli plik nie zmienil sie od poprzedniego uruchomienia
+i nie zawieral szukanego ciagu znakow, nie jest ponownie czytany. Cache przechowywany
+jest w bazie SQLite w katalogu .resolver-cache. Najdawniej uzywane wpisy sa usuwane
+gdy liczba wpisow przekroczy max_entries.
+
+Definiuje klase ScanCache z ktorej korzysta skrypt resolver.py
+"""
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIRECTORY = ".resolver-cache"
+CACHE_FILE = "scan.sqlite"
+DEFAULT_MAX_ENTRIES = 1000000
+
+
+class ScanCache:
+    """
+    Cache wynikow przeszukiwania plikow, bezpieczny dla wielu watkow
+
+    Atrybuty
+    ----------
+    hits : int
+        liczba plikow pominietych dzieki cache
+    misses : int
+        liczba plikow ktore musialy zostac przeczytane
+    """
+
+    def __init__(self, directory: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.pending = []
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(directory, CACHE_FILE),
+                                          check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS scan ("
+                                "path TEXT, key TEXT, size INTEGER, mtime_ns INTEGER, "
+                                "found INTEGER, used REAL, PRIMARY KEY (path, key))")
+
+    def is_known_miss(self, path: str, key: str, stat: os.stat_result) -> bool:
+        """
+        Sprawdza czy niezmieniony plik nie zawieral szukanego klucza przy poprzednim
+        przeszukaniu
+
+        Parameters
+        ----------
+        path : str
+            adres pliku
+        key : str
+            szukany klucz
+        stat : os.stat_result
+            obecny stat pliku
+        Returns
+        -------
+        bool
+            True gdy plik mozna pominac
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns, found FROM scan WHERE path = ? AND key = ?",
+                (path, key)).fetchone()
+            if row is not None and row == (stat.st_size, stat.st_mtime_ns, 0):
+                self.hits += 1
+                self.pending.append((path, key, stat.st_size, stat.st_mtime_ns, 0))
+                return True
+            self.misses += 1
+            return False
+
+    def store(self, path: str, key: str, stat: os.stat_result, found: bool):
+        """
+        Zapamietuje wynik przeszukania pliku. Wpisy sa zapisywane do bazy przy close
+
+        Parameters
+        ----------
+        path : str
+            adres pliku
+        key : str
+            szukany klucz
+        stat : os.stat_result
+            stat pliku z momentu przeszukania
+        found : bool
+            czy klucz zostal znaleziony
+        """
+        with self.lock:
+            self.pending.append((path, key, stat.st_size, stat.st_mtime_ns, int(found)))
+
+    def close(self):
+        """
+        Zapisuje oczekujace wpisy, usuwa najdawniej uzywane wpisy ponad limit
+        i zamyka polaczenie z baza
+        """
+        with self.lock:
+            now = time.time()
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scan VALUES (?, ?, ?, ?, ?, ?)",
+                [entry + (now,) for entry in self.pending])
+            self.pending = []
+            self.connection.execute(
+                "DELETE FROM scan WHERE rowid IN (SELECT rowid FROM scan "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self.connection.commit()
+            self.connection.close()
+
+    def report(self) -> str:
+        """
+        Zwraca opis skutecznosci cache
+
+        Returns
+        -------
+        str
+            liczba trafien, chybien oraz procent trafien
+        """
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return f"Scan cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
@@ -0,0 +1,231 @@
+"""
+Wyszukiwanie plikow do przetworzenia w repozytorium
+
+Drzewo katalogow jest przechodzone jeden raz za pomoca os.scandir, a rozszerzenia
+wszystkich plikow sa sprawdzane w zbiorze. Katalog .git, katalogi ukryte oraz
+katalogi z listy ignorowanych nie sa przeszukiwane. Pliki sa zwracane leniwie,
+dzieki czemu przeszukiwanie ich zawartosci moze zaczac sie przed koncem przechodzenia.
+
+Alternatywnie (search_backend=git) kandydaci sa wyszukiwani przez git grep, ktory
+przeszukuje tylko pliki sledzone przez gita. Dla wyrazen regularnych oraz wzorcow
+zawierajacych znak nowej linii (git grep dziala na liniach) kandydatami sa wszystkie
+sledzone pliki z git ls-files.
+
+Przy ponownym przetwarzaniu (incremental=yes) kandydatami sa tylko pliki zmienione
+od zapamietanego commita, wedlug git diff --name-only.
+
+Definiuje funkcje z ktorych korzysta skrypt resolver.py
+"""
+import os
+from typing import Iterable, Iterator, List, Optional, Set
+
+from git import Git, GitCommandError
+
+DEFAULT_IGNORED_DIRS = ("build", "node_modules")
+SEARCH_BACKENDS = ("python", "git")
+
+
+def walk_files_with_extension(root: str, extensions: Iterable[str],
+                              ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS) -> Iterator[str]:
+    """
+    Zwraca leniwie pliki z podanymi rozszerzeniami, przechodzac drzewo katalogow jeden raz
+
+    Parameters
+    ----------
+    root : str
+        katalog od ktorego zaczynamy szukanie
+    extensions : Iterable[str]
+        rozszerzenia plikow bez kropki
+    ignored_dirs : Iterable[str]
+        nazwy katalogow ktore nie sa przeszukiwane
+    Returns
+    -------
+    Iterator[str]
+        adresy plikow z podanymi rozszerzeniami
+    """
+    extensions = set(extensions)
+    ignored_dirs = set(ignored_dirs)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ignored_dirs:
+                    subdirectories.append(entry.path)
+            elif has_extension(entry.name, extensions) and entry.is_file():
+                yield entry.path
+        stack.extend(reversed(subdirectories))
+
+
+def has_extension(name: str, extensions: Set[str]) -> bool:
+    """
+    Sprawdza czy nazwa pliku konczy sie jednym z rozszerzen, rowniez wieloczlonowym
+    (np. tar.gz)
+
+    Parameters
+    ----------
+    name : str
+        nazwa pliku
+    extensions : Set[str]
+        zbior rozszerzen bez kropki
+    Returns
+    -------
+    bool
+        czy plik ma jedno z rozszerzen
+    """
+    index = name.find('.')
+    while index != -1:
+        if name[index + 1:] in extensions:
+            return True
+        index = name.find('.', index + 1)
+    return False
+
+
+def git_candidate_files(root: str, extensions: Iterable[str], patterns: List[str],
+                        mode: str = "literal",
+                        ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS) -> List[str]:
+    """
+    Zwraca sledzone przez gita pliki, w ktorych moga wystepowac wzorce. Dla trybow
+    literal i word uzywa git grep, dla regex zwraca wszystkie sledzone pliki
+
+    Parameters
+    ----------
+    root : str
+        katalog glowny repozytorium
+    extensions : Iterable[str]
+        rozszerzenia plikow bez kropki
+    patterns : List[str]
+        wzorce do znalezienia
+    mode : str
+        tryb dopasowania: literal, word lub regex
+    ignored_dirs : Iterable[str]
+        nazwy katalogow ktore nie sa przeszukiwane
+    Returns
+    -------
+    List[str]
+        posortowane adresy plikow
+    """
+    if mode == "regex" or any("\n" in pattern for pattern in patterns):
+        return git_ls_files(root, extensions, ignored_dirs)
+    return git_grep_files_with_str(root, extensions, patterns, ignored_dirs, mode == "word")
+
+
+def git_ls_files(root: str, extensions: Iterable[str],
+                 ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS) -> List[str]:
+    """
+    Zwraca sledzone przez gita pliki z podanymi rozszerzeniami
+
+    Parameters
+    ----------
+    root : str
+        katalog glowny repozytorium
+    extensions : Iterable[str]
+        rozszerzenia plikow bez kropki
+    ignored_dirs : Iterable[str]
+        nazwy katalogow ktore nie sa przeszukiwane
+    Returns
+    -------
+    List[str]
+        posortowane adresy plikow
+    """
+    output = Git(root).ls_files("-z", "--", *git_pathspecs(extensions, ignored_dirs))
+    return sorted(os.path.join(root, path) for path in output.split("\0") if path)
+
+
+def git_changed_files(root: str, since: str, extensions: Iterable[str],
+                      ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS) -> Optional[List[str]]:
+    """
+    Zwraca pliki z podanymi rozszerzeniami dodane lub zmienione miedzy commitem since
+    a HEAD (git diff --name-only since HEAD). Gdy since nie jest przodkiem HEAD
+    (np. po force pushu albo w plytkim klonie) zwraca None
+
+    Parameters
+    ----------
+    root : str
+        katalog glowny repozytorium
+    since : str
+        sha commita od ktorego szukane sa zmiany
+    extensions : Iterable[str]
+        rozszerzenia plikow bez kropki
+    ignored_dirs : Iterable[str]
+        nazwy katalogow ktore nie sa przeszukiwane
+    Returns
+    -------
+    Optional[List[str]]
+        posortowane adresy plikow lub None
+    """
+    git = Git(root)
+    try:
+        git.merge_base("--is-ancestor", since, "HEAD")
+    except GitCommandError:
+        return None
+    output = git.diff("--name-only", "-z", "--diff-filter=ACMR", since, "HEAD", "--",
+                      *git_pathspecs(extensions, ignored_dirs))
+    return sorted(os.path.join(root, path) for path in output.split("\0") if path)
+
+
+def git_pathspecs(extensions: Iterable[str], ignored_dirs: Iterable[str]) -> List[str]:
+    """
+    Tworzy pathspece gita dla rozszerzen oraz wykluczonych katalogow
+
+    Parameters
+    ----------
+    extensions : Iterable[str]
+        rozszerzenia plikow bez kropki
+    ignored_dirs : Iterable[str]
+        nazwy katalogow ktore nie sa przeszukiwane
+    Returns
+    -------
+    List[str]
+        lista pathspecow
+    """
+    pathspecs = [f"*.{ext}" for ext in extensions]
+    return pathspecs + [f":(exclude,glob)**/{directory}/**" for directory in ignored_dirs]
+
+
+def git_grep_files_with_str(root: str, extensions: Iterable[str], patterns: Iterable[str],
+                            ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS,
+                            whole_words: bool = False) -> List[str]:
+    """
+    Zwraca sledzone przez gita pliki z podanymi rozszerzeniami, ktore zawieraja
+    ktorykolwiek z ciagow znakow. Wykorzystuje git grep -l -F, wiec pliki nie sa
+    czytane w pythonie.
+
+    Parameters
+    ----------
+    root : str
+        katalog glowny repozytorium
+    extensions : Iterable[str]
+        rozszerzenia plikow bez kropki
+    patterns : Iterable[str]
+        ciagi znakow do znalezienia
+    ignored_dirs : Iterable[str]
+        nazwy katalogow ktore nie sa przeszukiwane
+    whole_words : bool
+        czy ciagi znakow musza wystepowac jako cale slowa (git grep -w)
+    Returns
+    -------
+    List[str]
+        posortowane adresy plikow zawierajacych ciagi znakow
+
+    Raises
+    ------
+    GitCommandError
+        gdy git grep zakonczy sie bledem innym niz brak dopasowan
+    """
+    options = ["-l", "-z", "-F"] + (["-w"] if whole_words else [])
+    options += [argument for pattern in patterns for argument in ("-e", pattern)]
+    try:
+        output = Git(root).grep(*options, "--", *git_pathspecs(extensions, ignored_dirs))
+    except GitCommandError as error:
+        if error.status == 1:
+            return []
+        raise
+    return sorted(os.path.join(root, path) for path in output.split("\0") if path)
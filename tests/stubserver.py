@@ -0,0 +1,122 @@
+"""
+Lokalny serwer udajacy API bitbucketa, uzywany w testach
+
+Obsluguje GET /2.0/user/, stronicowane GET /2.0/workspaces/<ws>/members oraz
+POST /2.0/repositories/<ws>/<repo>/pullrequests. Pozwala wymusic bledy oraz
+odpowiedzi 429 (limit API) dla wybranych sciezek i zapamietuje wszystkie zapytania.
+"""
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class BitbucketStub:
+    """
+    Serwer testowy z danymi workspace
+
+    Atrybuty
+    ----------
+    members : list
+        lista par (uuid, display_name) czlonkow workspace
+    current_user : str
+        uuid zalogowanego uzytkownika
+    failures : dict
+        sciezka => liczba odpowiedzi 503 zanim zapytanie sie powiedzie
+    rate_limited : dict
+        sciezka => liczba odpowiedzi 429 z naglowkiem Retry-After zanim zapytanie sie powiedzie
+    retry_after : int
+        wartosc naglowka Retry-After w odpowiedziach 429
+    requests : list
+        lista (metoda, sciezka, naglowek Authorization) otrzymanych zapytan
+    pull_requests : list
+        lista (sciezka, json) utworzonych pull requestow
+    """
+
+    def __init__(self, members=(), current_user="{me}", max_pagelen=100):
+        self.members = list(members)
+        self.current_user = current_user
+        self.max_pagelen = max_pagelen
+        self.failures = {}
+        self.rate_limited = {}
+        self.retry_after = 1
+        self.requests = []
+        self.pull_requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/2.0"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.dispatch("GET")
+
+            def do_POST(self):
+                self.dispatch("POST")
+
+            def dispatch(self, method):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                with stub.lock:
+                    stub.requests.append((method, url.path, self.headers.get("Authorization")))
+                    if stub.failures.get(url.path, 0) > 0:
+                        stub.failures[url.path] -= 1
+                        return self.reply(503, {})
+                    if stub.rate_limited.get(url.path, 0) > 0:
+                        stub.rate_limited[url.path] -= 1
+                        return self.reply(429, {}, {"Retry-After": str(stub.retry_after)})
+                status, payload = stub.route(method, url.path, parse_qs(url.query), body)
+                self.reply(status, payload)
+
+            def reply(self, status, payload, headers=None):
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def route(self, method, path, query, body):
+        if method == "GET" and path == "/2.0/user/":
+            return 200, {"uuid": self.current_user}
+        if method == "GET" and path.endswith("/members"):
+            return 200, self.members_page(path, query)
+        if method == "POST" and path.endswith("/pullrequests"):
+            with self.lock:
+                self.pull_requests.append((path, body))
+            return 201, {"id": len(self.pull_requests)}
+        return 404, {}
+
+    def members_page(self, path, query):
+        pagelen = min(int(query.get("pagelen", ["10"])[0]), self.max_pagelen)
+        page = int(query.get("page", ["1"])[0])
+        values = [{"user": {"uuid": uuid, "display_name": name}}
+                  for uuid, name in self.members[(page - 1) * pagelen:page * pagelen]]
+        data = {"values": values, "page": page, "pagelen": pagelen, "size": len(self.members)}
+        if page < math.ceil(len(self.members) / pagelen):
+            data["next"] = f"{self.url}{path[len('/2.0'):]}?pagelen={pagelen}&page={page + 1}"
+        return data
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+import asyncbitbucket
+import bitbucketclient
+from credentials import BitbucketCredentials
+from tests.stubserver import BitbucketStub
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.stub = BitbucketStub().start()
+        self.credentials = BitbucketCredentials("user", "key")
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def batch(self, count):
+        return [asyncbitbucket.PullRequest("workspace", f"repo{i}", {"title": f"pr{i}"})
+                for i in range(count)]
+
+    def test_creates_all_pull_requests(self):
+        client = bitbucketclient.get_client(self.credentials, self.stub.url)
+        results = asyncio.run(
+            asyncbitbucket.AsyncBitbucketClient(client, 4).create_pull_requests(self.batch(10)))
+        self.assertEqual([201] * 10, [response.status_code for response in results])
+        created = sorted(path for path, _ in self.stub.pull_requests)
+        self.assertEqual(sorted(f"/2.0/repositories/workspace/repo{i}/pullrequests"
+                                for i in range(10)), created)
+
+    def test_waits_for_rate_limit(self):
+        self.stub.rate_limited["/2.0/repositories/workspace/repo0/pullrequests"] = 1
+        client = bitbucketclient.BitbucketClient(self.credentials, self.stub.url, retries=0)
+        start = time.monotonic()
+        results = asyncio.run(
+            asyncbitbucket.AsyncBitbucketClient(client, 2).create_pull_requests(self.batch(3)))
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+        self.assertEqual([201] * 3, [response.status_code for response in results])
+        self.assertEqual(3, len(self.stub.pull_requests))
+        client.close()
+
+    def test_calls_from_many_threads_share_one_loop(self):
+        api_url, bitbucketclient.API_URL = bitbucketclient.API_URL, self.stub.url
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(
+                    lambda pr: asyncbitbucket.create_pull_requests([pr], self.credentials)[0],
+                    self.batch(8)))
+        finally:
+            bitbucketclient.API_URL = api_url
+        self.assertEqual([201] * 8, [response.status_code for response in results])
+        self.assertEqual(8, len(self.stub.pull_requests))
+        self.assertIs(asyncbitbucket.get_loop(), asyncbitbucket.get_loop())
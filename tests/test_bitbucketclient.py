@@ -0,0 +1,42 @@
+from unittest import TestCase
+import bitbucketclient
+import uidsread
+from credentials import BitbucketCredentials
+from tests.stubserver import BitbucketStub
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.stub = BitbucketStub([("{me}", "Me"), ("{other}", "Other")]).start()
+        self.credentials = BitbucketCredentials("user", "key")
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def test_retries_server_errors(self):
+        self.stub.failures["/2.0/user/"] = 2
+        client = bitbucketclient.BitbucketClient(self.credentials, self.stub.url, backoff=0)
+        response = client.get(uidsread.API_USER)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, len(self.stub.requests))
+        self.assertTrue(self.stub.requests[0][2].startswith("Basic "))
+        client.close()
+
+    def test_does_not_retry_post_on_server_errors(self):
+        self.stub.failures["/2.0/repositories/workspace/repo/pullrequests"] = 1
+        client = bitbucketclient.BitbucketClient(self.credentials, self.stub.url, backoff=0)
+        response = client.post("repositories/workspace/repo/pullrequests", json={})
+        self.assertEqual(503, response.status_code)
+        self.assertEqual(1, len(self.stub.requests))
+        self.assertEqual([], self.stub.pull_requests)
+        client.close()
+
+    def test_uidsread_uses_shared_client(self):
+        client = bitbucketclient.get_client(self.credentials, self.stub.url)
+        self.assertIs(client, bitbucketclient.get_client(self.credentials, self.stub.url))
+        api_url, bitbucketclient.API_URL = bitbucketclient.API_URL, self.stub.url
+        try:
+            users = uidsread.get_users_for_given_workspace("workspace", self.credentials)
+        finally:
+            bitbucketclient.API_URL = api_url
+        self.assertEqual({"{other}": "Other"}, users)
@@ -0,0 +1,57 @@
+import contextlib
+import io
+import os
+import tempfile
+from unittest import TestCase
+from git import Repo
+import clones
+from repofixtures import create_origin
+
+
+def create_remote(directory, name):
+    work, origin = create_origin(directory, name + ".git",
+                                 {"module/build.gradle": "useJUnit", "README.md": "useJUnit",
+                                  "A.java": "class A {}"})
+    work.git.commit("--allow-empty", "-m", "second")
+    work.git.push("origin", "master")
+    with origin.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+    return "file://" + origin.working_dir
+
+
+class Test(TestCase):
+    def test_remote_name(self):
+        self.assertEqual("repo", clones.remote_name("git@bitbucket.org:workspace/repo.git"))
+        self.assertEqual("repo", clones.remote_name("https://bitbucket.org/workspace/repo/"))
+        self.assertEqual("repo", clones.remote_name("git@host:repo.git"))
+
+    def test_read_remote_urls_rejects_duplicate_names(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "remotes.txt")
+            with open(filename, "w") as file:
+                file.write("# team\nfile:///a/repo.git\nfile:///b/other.git\n")
+            self.assertEqual({"repo": "file:///a/repo.git", "other": "file:///b/other.git"},
+                             clones.read_remote_urls(filename))
+            with open(filename, "a") as file:
+                file.write("file:///b/repo\n")
+            with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+                clones.read_remote_urls(filename)
+
+    def test_clone_is_shallow_and_sparse(self):
+        with tempfile.TemporaryDirectory() as directory:
+            url = create_remote(directory, "alpha")
+            path = os.path.join(directory, "clones", "alpha")
+            clones.clone_repository(url, path, "master", ["gradle"])
+            repo = Repo(path)
+            self.assertEqual("true", repo.git.rev_parse("--is-shallow-repository"))
+            self.assertEqual(["second"], repo.git.log("--format=%s").split())
+            files = sorted(os.path.relpath(os.path.join(root, name), path)
+                           for root, dirs, names in os.walk(path) if ".git" not in root
+                           for name in names)
+            self.assertEqual([os.path.join("module", "build.gradle")], files)
+            self.assertEqual(["A.java", "README.md", "module/build.gradle"],
+                             repo.git.ls_files().split())
+            repo.close()
+            clones.remove_clone(path)
+            self.assertFalse(os.path.exists(path))
+            clones.remove_clone(path)
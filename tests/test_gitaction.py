@@ -1,5 +1,10 @@
 from unittest import TestCase
+from unittest import mock
+import asyncbitbucket
+import bitbucketclient
 import gitaction
+from credentials import BitbucketCredentials
+from tests.stubserver import BitbucketStub
 
 
 class Test(TestCase):
@@ -15,3 +20,21 @@ class Test(TestCase):
         self.assertEqual(expected, gitaction.create_pr_json("new_branch",
                                                             [{"uuid": "{139d650b-be36-4d62-8d69-49fec09a6057}"}],
                                                             "mytitle"))
+
+    def test_create_pr_request_uses_batch_client(self):
+        stub = BitbucketStub().start()
+        credentials = BitbucketCredentials("user", "key")
+        api_url, bitbucketclient.API_URL = bitbucketclient.API_URL, stub.url
+        try:
+            with mock.patch.object(asyncbitbucket, "create_pull_requests",
+                                   wraps=asyncbitbucket.create_pull_requests) as batch:
+                created = gitaction.create_pr_request({"title": "pr"}, "workspace", "repo",
+                                                      credentials)
+        finally:
+            bitbucketclient.API_URL = api_url
+            stub.stop()
+        self.assertTrue(created)
+        batch.assert_called_once_with(
+            [asyncbitbucket.PullRequest("workspace", "repo", {"title": "pr"})], credentials)
+        self.assertEqual([("/2.0/repositories/workspace/repo/pullrequests", {"title": "pr"})],
+                         stub.pull_requests)
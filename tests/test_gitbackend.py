@@ -0,0 +1,153 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from unittest import mock
+import git.cmd
+from git import Repo, GitCommandError
+import gitbackend
+from repofixtures import create_origin, create_repository
+
+
+class Test(TestCase):
+    def create_repo(self, directory):
+        return create_repository(directory, {"A.java": "useJUnit"})
+
+    def test_backends_create_the_same_commit(self):
+        trees = []
+        for backend in gitbackend.GIT_BACKENDS:
+            with tempfile.TemporaryDirectory() as directory:
+                self.create_repo(directory)
+                repo = gitbackend.open_repo(directory, backend)
+                gitbackend.prepare_branch(repo, backend, False, True, False, "master", "change")
+                changed = os.path.join(directory, "A.java")
+                with open(changed, "w") as file:
+                    file.write("junit")
+                gitbackend.commit_files(repo, backend, [changed], "msg")
+                repo = Repo(directory)
+                self.assertEqual("change", repo.active_branch.name)
+                self.assertEqual("msg", repo.head.commit.message.strip())
+                self.assertEqual(["init"], [commit.message.strip()
+                                            for commit in repo.head.commit.parents])
+                self.assertFalse(repo.is_dirty())
+                trees.append(repo.head.commit.tree.hexsha)
+        self.assertEqual(1, len(set(trees)))
+
+    def test_native_backend_starts_no_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.create_repo(directory)
+            repo = gitbackend.open_repo(directory, "native")
+            changed = os.path.join(directory, "A.java")
+            with open(changed, "w") as file:
+                file.write("junit")
+            with mock.patch.object(git.cmd, "safer_popen",
+                                   side_effect=git.cmd.safer_popen) as popen:
+                gitbackend.prepare_branch(repo, "native", False, True, False, "master", "change")
+                gitbackend.commit_files(repo, "native", [changed], "msg")
+            repo.close()
+            self.assertEqual(0, popen.call_count)
+
+    def test_native_backend_falls_back_to_cli_for_attributes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            repo = self.create_repo(directory)
+            os.makedirs(os.path.join(directory, "src"))
+            with open(os.path.join(directory, ".gitattributes"), "w") as file:
+                file.write("# line endings\n*.bin -text\n*.java text\n")
+            repo.git.add(".gitattributes")
+            repo.git.commit("-m", "attributes")
+            changed = os.path.join(directory, "src", "B.java")
+            with open(changed, "w", newline="") as file:
+                file.write("junit\r\n")
+            repo = gitbackend.open_repo(directory, "native")
+            self.assertTrue(gitbackend.needs_cli(repo, [changed]))
+            gitbackend.commit_files(repo, "native", [changed], "msg")
+            self.assertEqual("junit\n", repo.git.show("HEAD:src/B.java",
+                                                      strip_newline_in_stdout=False))
+            repo.close()
+
+    def test_native_backend_falls_back_to_cli_for_config(self):
+        with tempfile.TemporaryDirectory() as directory:
+            repo = self.create_repo(directory)
+            with open(os.path.join(directory, ".gitattributes"), "w") as file:
+                file.write("*.png binary -text\n")
+            changed = os.path.join(directory, "A.java")
+            self.assertFalse(gitbackend.needs_cli(repo, [changed]))
+            for section, option, value in (("commit", "gpgsign", "true"),
+                                           ("core", "autocrlf", "input")):
+                with repo.config_writer() as config:
+                    config.set_value(section, option, value)
+                self.assertTrue(gitbackend.needs_cli(repo, [changed]))
+                with repo.config_writer() as config:
+                    config.set_value(section, option, "false")
+                self.assertFalse(gitbackend.needs_cli(repo, [changed]))
+
+    def test_native_checkout_b_fails_for_existing_branch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            repo = self.create_repo(directory)
+            repo.create_head("change")
+            with self.assertRaises(GitCommandError):
+                gitbackend.create_and_checkout_branch(repo, "change")
+
+    def test_worktree_leaves_working_copy_untouched(self):
+        with tempfile.TemporaryDirectory() as directory:
+            work, origin = create_origin(directory, "project", {"A.java": "useJUnit"})
+            repo = Repo.clone_from(origin.working_dir, os.path.join(directory, "clone"))
+            with open(os.path.join(work.working_dir, "A.java"), "w") as file:
+                file.write("useJUnit fetched")
+            work.git.commit("-am", "second")
+            work.git.push("origin", "master")
+            repo.git.checkout("-b", "work")
+            with open(os.path.join(repo.working_dir, "A.java"), "w") as file:
+                file.write("uncommitted")
+            path = os.path.join(directory, "worktrees", "clone")
+            gitbackend.create_worktree(repo, path, "change", "master")
+            with open(os.path.join(path, "A.java")) as file:
+                self.assertEqual("useJUnit fetched", file.read())
+            worktree = Repo(path)
+            self.assertEqual("change", worktree.active_branch.name)
+            worktree.close()
+            gitbackend.remove_worktree(repo, path)
+            self.assertFalse(os.path.exists(path))
+            gitbackend.attach_worktree(repo, path, "change")
+            self.assertTrue(os.path.exists(os.path.join(path, "A.java")))
+            gitbackend.remove_worktree(repo, path)
+            self.assertEqual("work", repo.active_branch.name)
+            with open(os.path.join(repo.working_dir, "A.java")) as file:
+                self.assertEqual("uncommitted", file.read())
+            self.assertEqual(1, len(repo.git.worktree("list").splitlines()))
+            repo.close()
+
+    def test_worktree_operations_wait_for_repository_lock(self):
+        with tempfile.TemporaryDirectory() as directory:
+            create_origin(directory, "project", {"A.java": "useJUnit"})
+            repo = Repo.clone_from(os.path.join(directory, "origins", "project"),
+                                   os.path.join(directory, "clone"))
+            path = os.path.join(directory, "worktrees", "clone")
+            thread = threading.Thread(target=gitbackend.create_worktree,
+                                      args=(repo, path, "change", "master"))
+            with gitbackend.repository_lock(Repo(os.path.join(directory, "clone"))):
+                thread.start()
+                thread.join(0.5)
+                self.assertTrue(thread.is_alive())
+                self.assertFalse(os.path.exists(path))
+            thread.join()
+            self.assertTrue(os.path.exists(os.path.join(path, "A.java")))
+            gitbackend.remove_worktree(repo, path)
+            repo.close()
+
+    def test_fetch_then_fast_forward_instead_of_pull(self):
+        with tempfile.TemporaryDirectory() as directory:
+            work, origin = create_origin(directory, "project", {"A.java": "useJUnit"})
+            repo = Repo.clone_from(origin.working_dir, os.path.join(directory, "clone"))
+            work.git.commit("--allow-empty", "-m", "second")
+            work.git.push("origin", "master")
+            with mock.patch.object(git.cmd.Git, "execute",
+                                   side_effect=git.cmd.Git.execute, autospec=True) as execute:
+                gitbackend.fetch(repo, 30)
+            self.assertEqual(30, execute.call_args.kwargs["kill_after_timeout"])
+            self.assertEqual("init", repo.head.commit.message.strip())
+            gitbackend.prepare_branch(repo, "cli", False, True, True, "master", "change",
+                                      fetched=True)
+            self.assertEqual("second", repo.head.commit.message.strip())
+            self.assertEqual("change", repo.active_branch.name)
+            repo.close()
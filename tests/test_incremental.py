@@ -0,0 +1,29 @@
+import os
+import tempfile
+from unittest import TestCase
+import incremental
+
+
+class Test(TestCase):
+    def test_commits_are_kept_per_key_and_merged_on_save(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = incremental.ProcessedCommits(directory, "key")
+            second = incremental.ProcessedCommits(directory, "key")
+            first.record("alpha", "a1")
+            second.record("beta", "b1")
+            first.save()
+            second.save()
+            other = incremental.ProcessedCommits(directory, "other")
+            other.record("alpha", "o1")
+            other.save()
+            loaded = incremental.ProcessedCommits(directory, "key")
+            self.assertEqual("a1", loaded.get("alpha"))
+            self.assertEqual("b1", loaded.get("beta"))
+            self.assertIsNone(loaded.get("gamma"))
+            self.assertEqual("o1", incremental.ProcessedCommits(directory, "other").get("alpha"))
+
+    def test_damaged_file_gives_empty_state(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, incremental.PROCESSED_FILE), "w") as file:
+                file.write("{not json")
+            self.assertIsNone(incremental.ProcessedCommits(directory, "key").get("alpha"))
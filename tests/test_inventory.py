@@ -0,0 +1,38 @@
+import os
+import tempfile
+from unittest import TestCase
+import inventory
+
+
+class Test(TestCase):
+    def create_tree(self, directory):
+        for path in ("alpha/.git", "alpha/nested/.git", "group/beta/.git",
+                     "group/legacy-gamma/.git", "notrepo/src", ".hidden/delta/.git",
+                     ".resolver-cache"):
+            os.makedirs(os.path.join(directory, path))
+
+    def test_flat_listing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.create_tree(directory)
+            projects = inventory.list_repositories(directory, ignored=(".resolver-cache",))
+        self.assertEqual([".hidden", "alpha", "group", "notrepo"], projects)
+
+    def test_recursive_discovery_stops_at_repositories(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.create_tree(directory)
+            projects = inventory.list_repositories(directory, recursive=True, workers=2)
+        self.assertEqual(["alpha", "group/beta", "group/legacy-gamma"], projects)
+
+    def test_include_exclude_and_repositories_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.create_tree(directory)
+            projects = inventory.list_repositories(directory, recursive=True,
+                                                   include=["group/*"],
+                                                   exclude=["*/legacy-*"])
+            self.assertEqual(["group/beta"], projects)
+            repositories_file = os.path.join(directory, "repos.txt")
+            with open(repositories_file, "w") as file:
+                file.write("# subset\nalpha\n\ngroup/beta/  # team\n")
+            projects = inventory.list_repositories(directory, exclude=["alpha"],
+                                                   repositories_file=repositories_file)
+        self.assertEqual(["group/beta"], projects)
@@ -0,0 +1,47 @@
+import contextlib
+import io
+import os
+import tempfile
+from unittest import TestCase
+import journal
+
+
+class Test(TestCase):
+    def test_resume_reads_completed_stages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = journal.journal_filename(os.path.join(directory, "cache"), "key")
+            run = journal.Journal(filename, "key")
+            run.record("alpha", "discovery", proceed=True)
+            run.record("alpha", "rewrite", proceed=False, status="no-match")
+            run.close()
+            resumed = journal.Journal(filename, "key", resume=True)
+            resumed.record("beta", "discovery", proceed=True)
+            resumed.close()
+            self.assertEqual({"discovery", "rewrite"}, set(resumed.completed("alpha")))
+            self.assertEqual("no-match", resumed.completed("alpha")["rewrite"]["status"])
+            self.assertEqual({}, resumed.completed("beta"))
+            fresh = journal.Journal(filename, "key")
+            fresh.close()
+            self.assertEqual({}, journal.Journal(filename, "key", resume=True).completed("alpha"))
+
+    def test_resume_rejects_other_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = journal.journal_filename(directory, "key")
+            journal.Journal(filename, "key").close()
+            with self.assertRaises(SystemExit):
+                journal.Journal(filename, "other", resume=True)
+
+    def test_concurrent_runs_do_not_share_a_journal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = journal.Journal(journal.journal_filename(directory, "key"), "key")
+            first.record("alpha", "discovery", proceed=True)
+            other = journal.Journal(journal.journal_filename(directory, "other"), "other")
+            other.close()
+            with contextlib.redirect_stdout(io.StringIO()) as output, \
+                    self.assertRaises(SystemExit):
+                journal.Journal(journal.journal_filename(directory, "key"), "key")
+            self.assertIn("is used by another run", output.getvalue())
+            first.close()
+            resumed = journal.Journal(journal.journal_filename(directory, "key"), "key", True)
+            resumed.close()
+            self.assertEqual({"discovery"}, set(resumed.completed("alpha")))
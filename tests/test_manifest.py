@@ -0,0 +1,14 @@
+from unittest import TestCase
+import os
+import tempfile
+import manifest
+
+
+class Test(TestCase):
+    def test_write_and_read_manifest(self):
+        records = [{"project": "alpha", "files": {"A.java": 2}},
+                   {"project": "beta", "files": {}}]
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "manifest.jsonl")
+            manifest.write_manifest(filename, records)
+            self.assertEqual(records, manifest.read_manifest(filename))
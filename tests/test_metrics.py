@@ -0,0 +1,34 @@
+import json
+from unittest import TestCase
+import metrics
+
+
+class Test(TestCase):
+    def test_timers_and_counters(self):
+        registry = metrics.Metrics()
+        for _ in range(2):
+            with registry.timer("stage", stage="push"):
+                pass
+        with self.assertRaises(ValueError):
+            with registry.timer("stage", stage="commit"):
+                raise ValueError()
+        registry.increment("files_scanned", 3)
+        registry.increment("files_scanned", 2)
+        exported = json.loads(registry.to_json())
+        self.assertEqual([("commit", 1), ("push", 2)],
+                         [(timer["labels"]["stage"], timer["count"])
+                          for timer in exported["timers"]])
+        self.assertEqual([{"name": "files_scanned", "labels": {}, "value": 5}],
+                         exported["counters"])
+
+    def test_prometheus_format(self):
+        registry = metrics.Metrics()
+        registry.increment("api_calls", method="POST", status="201")
+        with registry.timer("create_pr_request"):
+            pass
+        lines = registry.to_prometheus().splitlines()
+        self.assertIn("# TYPE resolver_api_calls_total counter", lines)
+        self.assertIn('resolver_api_calls_total{method="POST",status="201"} 1', lines)
+        self.assertIn("resolver_create_pr_request_seconds_count 1", lines)
+        self.assertTrue(any(line.startswith("resolver_create_pr_request_seconds_sum ")
+                            for line in lines))
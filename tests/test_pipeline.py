@@ -0,0 +1,68 @@
+import threading
+import time
+from unittest import TestCase
+import pipeline
+
+
+class Test(TestCase):
+    def test_runs_all_stages(self):
+        done = []
+        stages = [pipeline.Stage("double", lambda item: item.append(item[0] * 2) or True, 2),
+                  pipeline.Stage("odd", lambda item: item[0] % 2 == 1, 3),
+                  pipeline.Stage("mark", lambda item: item.append("last") is None, 1)]
+        items = [[number] for number in range(10)]
+        pipeline.run_pipeline(items, stages, 2, done.append)
+        self.assertEqual(10, len(done))
+        for item in items:
+            expected = [item[0], item[0] * 2] + (["last"] if item[0] % 2 else [])
+            self.assertEqual(expected, item)
+
+    def test_bounded_queues_apply_backpressure(self):
+        started = []
+        in_flight = []
+        lock = threading.Lock()
+
+        def produce(item):
+            with lock:
+                started.append(item)
+                in_flight.append(len(started) - len(finished))
+            return True
+
+        finished = []
+
+        def consume(item):
+            time.sleep(0.01)
+            with lock:
+                finished.append(item)
+            return True
+
+        stages = [pipeline.Stage("produce", produce), pipeline.Stage("consume", consume)]
+        pipeline.run_pipeline(range(20), stages, 1)
+        self.assertEqual(20, len(finished))
+        self.assertLessEqual(max(in_flight), 4)
+
+    def test_reraises_stage_error_after_finishing(self):
+        done = []
+
+        def fail(item):
+            if item == 3:
+                raise ValueError("boom")
+            return True
+
+        with self.assertRaises(ValueError):
+            pipeline.run_pipeline(range(6), [pipeline.Stage("fail", fail, 2)], 1, done.append)
+        self.assertEqual(list(range(6)), sorted(done))
+
+    def test_error_in_on_done_does_not_hang(self):
+        done = []
+
+        def on_done(item):
+            if item == 0:
+                raise BrokenPipeError()
+            done.append(item)
+
+        stages = [pipeline.Stage("first", lambda item: item > 0, 1),
+                  pipeline.Stage("second", lambda item: True, 2)]
+        with self.assertRaises(BrokenPipeError):
+            pipeline.run_pipeline(range(4), stages, 1, on_done)
+        self.assertEqual([1, 2, 3], sorted(done))
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest import mock
+import bitbucketclient
+import ratelimit
+from credentials import BitbucketCredentials
+from tests.stubserver import BitbucketStub
+
+
+class Test(TestCase):
+    def test_paces_requests_when_budget_is_used(self):
+        bucket = ratelimit.TokenBucket(capacity=2, window=0.2)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_headers_reduce_budget_and_pause(self):
+        bucket = ratelimit.TokenBucket(capacity=100)
+        bucket.update(200, {"X-RateLimit-Limit": "50", "X-RateLimit-Remaining": "7"})
+        self.assertEqual(50, bucket.capacity)
+        self.assertAlmostEqual(7, bucket.tokens, places=2)
+        bucket.update(429, {"Retry-After": "30"})
+        self.assertGreater(bucket.paused_until, time.time() + 25)
+
+    def test_resumed_run_keeps_remaining_budget(self):
+        with tempfile.TemporaryDirectory() as directory:
+            state_file = os.path.join(directory, "ratelimit.json")
+            bucket = ratelimit.TokenBucket(capacity=100, state_file=state_file)
+            bucket.update(200, {"X-RateLimit-Remaining": "3"})
+            resumed = ratelimit.TokenBucket(capacity=100, state_file=state_file)
+        self.assertLess(resumed.tokens, 4)
+
+    def test_state_is_saved_on_pause_and_close_only(self):
+        with tempfile.TemporaryDirectory() as directory:
+            state_file = os.path.join(directory, "ratelimit.json")
+            bucket = ratelimit.TokenBucket(capacity=100, state_file=state_file)
+            with mock.patch.object(bucket, "save", wraps=bucket.save) as save:
+                for _ in range(50):
+                    bucket.update(200, {"X-RateLimit-Remaining": "90"})
+                self.assertEqual(1, save.call_count)
+                bucket.update(429, {"Retry-After": "30"})
+                self.assertEqual(2, save.call_count)
+                bucket.update(200, {"X-RateLimit-Remaining": "3"})
+                self.assertEqual(2, save.call_count)
+                bucket.close()
+                self.assertEqual(3, save.call_count)
+                bucket.close()
+                self.assertEqual(3, save.call_count)
+            resumed = ratelimit.TokenBucket(capacity=100, state_file=state_file)
+        self.assertLess(resumed.tokens, 4)
+
+    def test_client_waits_and_retries_rate_limited_request(self):
+        stub = BitbucketStub().start()
+        try:
+            stub.rate_limited["/2.0/user/"] = 1
+            client = bitbucketclient.BitbucketClient(BitbucketCredentials("user", "key"),
+                                                     stub.url)
+            start = time.monotonic()
+            response = client.get("/user/")
+            self.assertGreaterEqual(time.monotonic() - start, 1)
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(2, len(stub.requests))
+            client.close()
+        finally:
+            stub.stop()
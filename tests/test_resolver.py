@@ -1,14 +1,421 @@
 from unittest import TestCase
+import argparse
+import contextlib
+import cProfile
+import io
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
 import resolver
+import rewriter
+import bitbucketclient
+import incremental
+import journal
+import manifest
+from credentials import BitbucketCredentials
+from repofixtures import create_origin, create_repository, set_author
+from tests.test_clones import create_remote
+from tests.stubserver import BitbucketStub
+from git import Repo
 import os
 
 
+def create_clone(directory, project, content):
+    _, origin = create_origin(directory, project, {"A.java": content})
+    set_author(Repo.clone_from(origin.working_dir, os.path.join(directory, project)))
+    return origin
+
+
+def run_single_repository(directory, project, context):
+    job = resolver.create_repo_job(directory, project, context)
+    workers = {name: 1 for name, _ in resolver.get_repo_stages(context)}
+    options = resolver.PipelineOptions(workers, 1)
+    return resolver.process_repositories_pipeline([job], context, options)[0]
+
+
 class Test(TestCase):
     def test_get_files_with_extension(self):
         files = resolver.get_files_with_extension(os.getcwd(), ["exts"])
         self.assertEqual(1, len(files))
 
-    def test_find_files_with_str(self):
-        files = [os.getcwd() + '/text.exts']
-        files = resolver.find_files_with_str(files, "strings")
-        self.assertEqual(1, len(files))
+    def test_pipeline_skips_non_repo(self):
+        context = resolver.RunContext("msg", ["exts"], "master", rewriter.Replacer({"a": "b"}),
+                                      resolver.ClassWithFlags(False, False, False),
+                                      resolver.ScanOptions(), False)
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, "notrepo"))
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_single_repository(directory, "notrepo", context)
+        self.assertEqual("skipped", result.status)
+
+    def test_thread_output_capture(self):
+        stream = io.StringIO()
+        output = resolver.ThreadOutput(stream)
+        with output.capture() as buffer:
+            output.write("captured")
+        output.write("direct")
+        self.assertEqual("captured", buffer.getvalue())
+        self.assertEqual("direct", stream.getvalue())
+
+    def test_get_replacements(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, "config.txt")
+            table = os.path.join(directory, "table.tsv")
+            with open(config, "w") as file:
+                file.write("[PROPERTIES]\n[REPLACEMENTS]\nuseJUnitPlatform=junit\n")
+            with open(table, "w") as file:
+                file.write("Old Name\tNew Name\n")
+            properties = {"str_to_find": "a", "str_to_repl": "b", "replacements_file": table}
+            replacements = resolver.get_replacements(config, properties)
+        self.assertEqual({"a": "b", "useJUnitPlatform": "junit", "Old Name": "New Name"},
+                         replacements)
+
+    def test_plan_repository(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(False, False, False),
+                                      resolver.ScanOptions(), False)
+        with tempfile.TemporaryDirectory() as directory:
+            Repo.init(os.path.join(directory, "project"))
+            with open(os.path.join(directory, "project", "A.java"), "w") as file:
+                file.write("useJUnit useJUnit")
+            result = resolver.plan_repository(directory, "project", context)
+            with open(os.path.join(directory, "project", "A.java")) as file:
+                self.assertEqual("useJUnit useJUnit", file.read())
+        self.assertEqual("planned", result.status)
+        self.assertEqual({"A.java": 2}, result.record["files"])
+        self.assertEqual(2, result.record["occurrences"])
+        self.assertEqual(17, result.record["bytes"])
+
+    def test_manifest_is_rejected_for_different_replacement(self):
+        plan = resolver.RunContext("msg", ["java"], "master",
+                                   rewriter.Replacer({"useJUnit": "junit"}),
+                                   resolver.ClassWithFlags(False, False, False),
+                                   resolver.ScanOptions(), False)
+        apply = resolver.RunContext("msg", ["java"], "master",
+                                    rewriter.Replacer({"useJUnit": "junit5"}),
+                                    resolver.ClassWithFlags(False, False, False),
+                                    resolver.ScanOptions(), False)
+        self.assertEqual(plan.replacer.key, apply.replacer.key)
+        self.assertNotEqual(resolver.get_run_key(plan), resolver.get_run_key(apply))
+        with tempfile.TemporaryDirectory() as directory:
+            Repo.init(os.path.join(directory, "project"))
+            with open(os.path.join(directory, "project", "A.java"), "w") as file:
+                file.write("useJUnit")
+            filename = os.path.join(directory, "manifest.jsonl")
+            manifest.write_manifest(filename, [resolver.plan_repository(directory, "project",
+                                                                        plan).record])
+            self.assertIn("project", resolver.read_planned_files(filename, directory, plan))
+            with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+                resolver.read_planned_files(filename, directory, apply)
+
+    def test_bitbucket_settings_are_resolved_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            credentials_file = os.path.join(directory, "credentials")
+            with open(credentials_file, "w") as file:
+                file.write("[CREDENTIALS]\nappkey=key\nusername=user\n")
+            bitbucket = {"workspace": "ws", "branch": "new_branch", "reviewers": "{abc}",
+                         "bitbucket_credentials": credentials_file}
+            context = resolver.RunContext("msg", ["java"], "master",
+                                          rewriter.Replacer({"a": "b"}),
+                                          resolver.ClassWithFlags(False, False, False),
+                                          resolver.ScanOptions(), bitbucket)
+            settings = resolver.get_bitbucket_settings(context)
+            os.remove(credentials_file)
+            self.assertIs(settings, resolver.get_bitbucket_settings(context))
+        self.assertEqual([{"uuid": "{abc}"}], settings[0])
+        self.assertEqual("user", settings[1].username)
+
+    def test_pipeline_commits_and_pushes(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(False, False, False),
+                                      resolver.ScanOptions(), False)
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = []
+            for project in ("alpha", "beta", "gamma"):
+                create_clone(directory, project, "useJUnit" if project != "gamma" else "junit")
+                jobs.append(resolver.create_repo_job(directory, project, context))
+            options = resolver.PipelineOptions({"discovery": 2, "rewrite": 1, "commit": 1,
+                                                "push": 2, "pr": 1}, 1)
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = resolver.process_repositories_pipeline(jobs, context, options)
+            self.assertEqual(["changed", "changed", "no-match"],
+                             [result.status for result in results])
+            origin = Repo(os.path.join(directory, "origins", "alpha"))
+            self.assertEqual(["msg", "init"], origin.git.log("--all", "--format=%s").split())
+
+    def test_error_in_one_repository_does_not_stop_the_pipeline(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(False, False, False),
+                                      resolver.ScanOptions(), False)
+        with tempfile.TemporaryDirectory() as directory:
+            for project in ("alpha", "beta"):
+                create_clone(directory, project, "useJUnit")
+            jobs = [resolver.create_repo_job(directory, "alpha", context,
+                                             [os.path.join(directory, "alpha", "Gone.java")]),
+                    resolver.create_repo_job(directory, "beta", context)]
+            options = resolver.PipelineOptions({"discovery": 1, "rewrite": 1, "commit": 1,
+                                                "push": 1, "pr": 1}, 1)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                results = resolver.process_repositories_pipeline(jobs, context, options)
+            self.assertEqual(["failed", "changed"], [result.status for result in results])
+            self.assertIn("Stage rewrite failed in project alpha  FileNotFoundError",
+                          output.getvalue())
+
+    def test_resume_retries_only_failed_stage(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(False, False, False),
+                                      resolver.ScanOptions(), False)
+        with tempfile.TemporaryDirectory() as directory:
+            origin = Repo.init(os.path.join(directory, "origin"), bare=True)
+            repo = create_repository(os.path.join(directory, "project"), {"A.java": "useJUnit"})
+            filename = os.path.join(directory, "journal.jsonl")
+            context.run_journal = journal.Journal(filename, resolver.get_run_key(context))
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual("failed",
+                                 run_single_repository(directory, "project", context).status)
+            context.run_journal.close()
+            repo.create_remote("origin", origin.working_dir)
+            context.run_journal = journal.Journal(filename, resolver.get_run_key(context), True)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                result = run_single_repository(directory, "project", context)
+            context.run_journal.close()
+            self.assertEqual("changed", result.status)
+            self.assertEqual(1, result.matched)
+            self.assertIn("Stage commit already done", output.getvalue())
+            self.assertEqual(["msg", "init"], origin.git.log("--all", "--format=%s").split())
+
+    def test_remote_repositories_are_cloned_processed_and_removed(self):
+        identity = {"GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@example.com",
+                    "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@example.com"}
+        with tempfile.TemporaryDirectory() as directory:
+            urls = [create_remote(directory, name) for name in ("alpha", "beta", "skipped")]
+            remotes = os.path.join(directory, "remotes.txt")
+            with open(remotes, "w") as file:
+                file.write("\n".join(urls))
+            clone_directory = os.path.join(directory, "clones")
+            os.makedirs(clone_directory)
+            config = os.path.join(directory, "config.txt")
+            with open(config, "w") as file:
+                file.write(f"[PROPERTIES]\ncommit_message=msg\nstr_to_find=useJUnit\n"
+                           f"str_to_repl=junit\nmaster=master\nextensions=gradle\n"
+                           f"remote_repositories={remotes}\nexclude_repos=skipped\n"
+                           f"clone_jobs=2\nclone_directory={clone_directory}\n")
+            arguments = argparse.Namespace(properties=config, jobs=1, no_cache=False,
+                                           resume=False, plan=None, apply=None)
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                with mock.patch.dict(os.environ, identity), \
+                        contextlib.redirect_stdout(io.StringIO()):
+                    results = resolver.run_script(arguments)
+            finally:
+                os.chdir(cwd)
+            self.assertEqual([("alpha", "changed", 1), ("beta", "changed", 1)],
+                             [(result.project, result.status, result.matched)
+                              for result in results])
+            self.assertEqual([], os.listdir(clone_directory))
+            origin = Repo(os.path.join(directory, "origins", "alpha.git"))
+            self.assertEqual(["msg", "second", "init"],
+                             origin.git.log("master", "--format=%s").split())
+            self.assertEqual("junit", origin.git.show("master:module/build.gradle"))
+            self.assertEqual("useJUnit", origin.git.show("master:README.md"))
+
+    def test_worktree_mode_resumes_without_touching_working_copy(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(True, True, True),
+                                      resolver.ScanOptions(), {"branch": "change"})
+        with tempfile.TemporaryDirectory() as directory:
+            origin = create_clone(directory, "project", "useJUnit")
+            repo = Repo(os.path.join(directory, "project"))
+            repo.git.checkout("-b", "local")
+            with open(os.path.join(repo.working_dir, "A.java"), "w") as file:
+                file.write("useJUnit uncommitted")
+            repo.git.remote("set-url", "--push", "origin", os.path.join(directory, "missing"))
+            context.worktree_directory = os.path.join(directory, "worktrees")
+            filename = os.path.join(directory, "journal.jsonl")
+            context.run_journal = journal.Journal(filename, resolver.get_run_key(context))
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual("failed",
+                                 run_single_repository(directory, "project", context).status)
+            context.run_journal.close()
+            repo.git.remote("set-url", "--push", "origin", origin.working_dir)
+            context.run_journal = journal.Journal(filename, resolver.get_run_key(context), True)
+            with mock.patch.object(resolver, "process_bitbucket"), \
+                    contextlib.redirect_stdout(io.StringIO()) as output:
+                result = run_single_repository(directory, "project", context)
+            context.run_journal.close()
+            self.assertEqual("changed", result.status)
+            self.assertIn("Stage commit already done", output.getvalue())
+            self.assertEqual(["msg", "init"], origin.git.log("change", "--format=%s").split())
+            self.assertEqual("local", repo.active_branch.name)
+            with open(os.path.join(repo.working_dir, "A.java")) as file:
+                self.assertEqual("useJUnit uncommitted", file.read())
+            self.assertEqual([], os.listdir(context.worktree_directory))
+            self.assertEqual(1, len(repo.git.worktree("list").splitlines()))
+
+    def test_prefetch_skips_repositories_whose_fetch_failed(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(False, True, True),
+                                      resolver.ScanOptions(), False, prefetch=True)
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = []
+            for project in ("alpha", "beta"):
+                create_clone(directory, project, "useJUnit")
+                work = Repo(os.path.join(directory, "work", project))
+                work.git.commit("--allow-empty", "-m", "second")
+                work.git.push("origin", "master")
+                jobs.append(resolver.create_repo_job(directory, project, context))
+            Repo(os.path.join(directory, "beta")).git.remote(
+                "set-url", "origin", os.path.join(directory, "missing"))
+            options = resolver.PipelineOptions({"fetch": 2, "discovery": 1, "rewrite": 1,
+                                                "commit": 1, "push": 1, "pr": 1}, 1)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                results = resolver.process_repositories_pipeline(jobs, context, options)
+            self.assertEqual(["changed", "failed"], [result.status for result in results])
+            self.assertIn("Git command failed in project beta", output.getvalue())
+            origin = Repo(os.path.join(directory, "origins", "alpha"))
+            self.assertEqual(["msg", "second", "init"],
+                             origin.git.log("master", "--format=%s").split())
+
+    def two_phase_context(self, gate):
+        return resolver.RunContext("msg", ["java"], "master",
+                                   rewriter.Replacer({"useJUnit": "junit"}),
+                                   resolver.ClassWithFlags(False, False, False),
+                                   resolver.ScanOptions(), {"branch": "change"},
+                                   two_phase=True, validation_gate=gate,
+                                   validate_command="test ! -f BROKEN")
+
+    def test_two_phase_pushes_nothing_when_validation_fails(self):
+        context = self.two_phase_context("all")
+        options = resolver.PipelineOptions({"discovery": 2, "rewrite": 1, "commit": 1,
+                                            "validate": 2, "push": 2, "pr": 2}, 1)
+        with tempfile.TemporaryDirectory() as directory:
+            origins = [create_clone(directory, project, "useJUnit")
+                       for project in ("alpha", "beta")]
+            open(os.path.join(directory, "beta", "BROKEN"), "w").close()
+            jobs = [resolver.create_repo_job(directory, project, context)
+                    for project in ("alpha", "beta")]
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                results = resolver.process_repositories_two_phase(jobs, context, options)
+            self.assertEqual(["committed", "invalid"], [result.status for result in results])
+            self.assertIn("Validation failed in project beta", output.getvalue())
+            self.assertIn("nothing was pushed", output.getvalue())
+            self.assertEqual([[], []], [origin.git.branch("--list", "change").split()
+                                        for origin in origins])
+            self.assertEqual(["msg", "init"], Repo(os.path.join(directory, "alpha")).git.log(
+                "--format=%s").split())
+
+    def test_validation_timeout_marks_repository_invalid(self):
+        context = self.two_phase_context("all")
+        context.validate_command, context.validate_timeout = "sleep 30; true", 1
+        with tempfile.TemporaryDirectory() as directory:
+            job = resolver.RepoJob("alpha", directory, resolver.RepoResult("alpha", "committed"))
+            started = time.monotonic()
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                self.assertFalse(resolver.validate_repository(job, context))
+            self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual("invalid", job.result.status)
+        self.assertIn("Validation timed out in project alpha after 1 seconds", output.getvalue())
+
+    def test_two_phase_pushes_valid_repositories_and_creates_pull_requests_in_bulk(self):
+        context = self.two_phase_context("each")
+        options = resolver.PipelineOptions({"discovery": 2, "rewrite": 1, "commit": 1,
+                                            "validate": 2, "push": 2, "pr": 2}, 1)
+        context.bitbucket_settings = ([], BitbucketCredentials("user", "key"), "title",
+                                      "workspace", "change")
+        stub = BitbucketStub().start()
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(bitbucketclient, "API_URL", stub.url):
+            origins = {project: create_clone(directory, project, content)
+                       for project, content in (("alpha", "useJUnit"), ("beta", "useJUnit"),
+                                                ("gamma", "junit"))}
+            open(os.path.join(directory, "beta", "BROKEN"), "w").close()
+            jobs = [resolver.create_repo_job(directory, project, context)
+                    for project in origins]
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results = resolver.process_repositories_two_phase(jobs, context, options)
+            finally:
+                stub.stop()
+            self.assertEqual([("changed", "created"), ("invalid", ""), ("no-match", "")],
+                             [(result.status, result.pull_request) for result in results])
+            self.assertEqual(["msg", "init"],
+                             origins["alpha"].git.log("change", "--format=%s").split())
+            self.assertEqual([], origins["beta"].git.branch("--list", "change").split())
+            self.assertEqual(["/2.0/repositories/workspace/alpha/pullrequests"],
+                             [path for path, _ in stub.pull_requests])
+
+    def test_incremental_scans_only_files_changed_since_last_run(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(False, False, False),
+                                      resolver.ScanOptions(), False)
+        with tempfile.TemporaryDirectory() as directory:
+            create_clone(directory, "project", "useJUnit")
+            repo = Repo(os.path.join(directory, "project"))
+            context.processed = incremental.ProcessedCommits(directory, "key")
+            for name in ("B.java", "C.java"):
+                with open(os.path.join(repo.working_dir, name), "w") as file:
+                    file.write("useJUnit")
+                repo.git.add(name)
+                repo.git.commit("-m", name)
+                if name == "B.java":
+                    context.processed.record("project", repo.git.rev_parse("HEAD"))
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                result = run_single_repository(directory, "project", context)
+            self.assertIn("Scanning 1 files changed since", output.getvalue())
+            self.assertEqual(("changed", 1), (result.status, result.matched))
+            self.assertEqual(["C.java"], repo.git.show("--name-only", "--format=").split())
+            context.processed.record("project", "0" * 40)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                result = run_single_repository(directory, "project", context)
+            self.assertIn("is not an ancestor of HEAD", output.getvalue())
+            self.assertEqual(("changed", 2), (result.status, result.matched))
+
+    def test_only_repositories_without_matches_are_recorded(self):
+        context = resolver.RunContext("msg", ["java"], "master",
+                                      rewriter.Replacer({"useJUnit": "junit"}),
+                                      resolver.ClassWithFlags(False, False, False),
+                                      resolver.ScanOptions(), False)
+        with tempfile.TemporaryDirectory() as directory:
+            context.processed = incremental.ProcessedCommits(directory, "key")
+            jobs = [resolver.RepoJob(project, project, resolver.RepoResult(project, status),
+                                     base=project * 40)
+                    for project, status in (("a", "changed"), ("b", "no-match"),
+                                            ("c", "failed"))]
+            resolver.record_processed_commits(jobs, context)
+            self.assertEqual({"b": "b" * 40}, context.processed.recorded)
+
+    def test_profiled_thread_hook_is_removed_when_profiler_is_process_wide(self):
+        enable = cProfile.Profile.enable
+        main = threading.get_ident()
+
+        def enable_once(profile):
+            if threading.get_ident() != main:
+                raise ValueError("Another profiling tool is already active")
+            enable(profile)
+
+        hooks = []
+
+        def work():
+            def thread():
+                sum(range(3))
+                hooks.append(sys.getprofile())
+            worker = threading.Thread(target=thread)
+            worker.start()
+            worker.join()
+            return []
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(cProfile.Profile, "enable", enable_once), \
+                contextlib.redirect_stdout(io.StringIO()):
+            resolver.run_profiled(os.path.join(directory, "stats"), work)
+        self.assertEqual([None], hooks)
@@ -0,0 +1,123 @@
+from unittest import TestCase
+import os
+import tempfile
+import rewriter
+
+JUNIT = rewriter.Replacer({"useJUnit": "junit"})
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "file.txt")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content):
+        with open(self.file, "w", newline='') as file:
+            file.write(content)
+
+    def read(self):
+        with open(self.file, newline='') as file:
+            return file.read()
+
+    def test_rewrite_file(self):
+        self.write("useJUnit\r\nother useJUnit\n")
+        self.assertEqual(2, rewriter.rewrite_file(self.file, JUNIT))
+        self.assertEqual("junit\r\nother junit\n", self.read())
+
+    def test_rewrite_file_across_chunk_boundary(self):
+        content = "abcdefghij" * 3 + "abc"
+        for chunk_size in range(1, 12):
+            self.write(content)
+            self.assertEqual(3, rewriter.rewrite_file(self.file, rewriter.Replacer({"jab": "-"}),
+                                                              chunk_size))
+            self.assertEqual(content.replace("jab", "-"), self.read())
+
+    def test_unmatched_file_untouched(self):
+        self.write("nothing to see")
+        os.utime(self.file, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(0, rewriter.rewrite_file(self.file, JUNIT, chunk_size=3))
+        self.assertEqual(1_000_000_000, os.stat(self.file).st_mtime_ns)
+        self.assertEqual([], os.listdir(self.directory.name)[1:])
+
+    def test_find_files_with_str(self):
+        files = [os.path.join(os.path.dirname(__file__), "text.exts")]
+        result = rewriter.rewrite_files(files, rewriter.Replacer({"strings": "x"}), dry_run=True)
+        self.assertEqual(files, result.changed)
+
+    def test_rewrite_files(self):
+        self.write("x useJUnit")
+        self.assertEqual([self.file], rewriter.rewrite_files([self.file], JUNIT).changed)
+
+    def test_rewrite_files_parallel_is_sorted(self):
+        files = []
+        for name in ["c.txt", "a.txt", "b.txt", "d.txt"]:
+            path = os.path.join(self.directory.name, name)
+            with open(path, "w") as file:
+                file.write("useJUnit" if name != "d.txt" else "other")
+            files.append(path)
+        rewriter.LARGE_FILE_SIZE, large = 1, rewriter.LARGE_FILE_SIZE
+        try:
+            result = rewriter.rewrite_files(files, JUNIT, threads=3, processes=1)
+        finally:
+            rewriter.LARGE_FILE_SIZE = large
+        self.assertEqual(sorted(files[:3]), result.changed)
+
+    def test_multiple_replacements_in_one_pass(self):
+        content = "foo foobar bar barfoo " * 5
+        replacer = rewriter.Replacer({"foo": "1", "foobar": "2", "bar": "foo"})
+        for chunk_size in range(1, 10):
+            self.write(content)
+            self.assertEqual(25, rewriter.rewrite_file(self.file, replacer, chunk_size))
+            self.assertEqual("1 2 foo foo1 " * 5, self.read())
+
+    def test_word_mode(self):
+        content = "useJUnit useJUnitPlatform x_useJUnit (useJUnit)\nuseJUnit"
+        replacer = rewriter.Replacer({"useJUnit": "junit"}, "word")
+        for chunk_size in range(1, 12):
+            self.write(content)
+            self.assertEqual(3, rewriter.rewrite_file(self.file, replacer, chunk_size))
+            self.assertEqual("junit useJUnitPlatform x_useJUnit (junit)\njunit", self.read())
+
+    def test_regex_mode_with_group_references(self):
+        self.write("version = '1.2' name: foo")
+        replacer = rewriter.Replacer({r"version = '(\d+)\.(\d+)'": r"version = '\2.\1'",
+                                      r"name: (\w+)": r"name: \1-\g<0>"}, "regex")
+        self.assertEqual(2, rewriter.rewrite_file(self.file, replacer, chunk_size=2))
+        self.assertEqual("version = '2.1' name: foo-name: foo", self.read())
+
+    def test_binary_and_undecodable_files_are_skipped(self):
+        binary = os.path.join(self.directory.name, "binary.txt")
+        with open(binary, "wb") as file:
+            file.write(b"useJUnit\0")
+        self.write("useJUnit")
+        with open(self.file, "ab") as file:
+            file.write(b" caf\xe9")
+        result = rewriter.rewrite_files([self.file, binary], JUNIT, chunk_size=4)
+        self.assertEqual([], result.changed)
+        self.assertEqual({self.file, binary}, set(result.skipped))
+        self.assertEqual(["binary.txt", "file.txt"], sorted(os.listdir(self.directory.name)))
+        result = rewriter.rewrite_files([self.file], JUNIT, max_file_size=4)
+        self.assertEqual("larger than 4 bytes", result.skipped[self.file])
+
+    def test_encoding_is_preserved(self):
+        with open(self.file, "w", encoding="latin-1", newline='') as file:
+            file.write("caf\xe9 useJUnit\r\n")
+        self.assertEqual(1, rewriter.rewrite_file(self.file, JUNIT, encoding="latin-1"))
+        with open(self.file, "rb") as file:
+            self.assertEqual(b"caf\xe9 junit\r\n", file.read())
+
+    def test_utf16_files_are_not_binary(self):
+        for encoding in ("utf-16", "utf-16-le", "utf-32"):
+            with open(self.file, "w", encoding=encoding, newline='') as file:
+                file.write("caf\xe9 useJUnit\r\nuseJUnit")
+            result = rewriter.rewrite_files([self.file], JUNIT, chunk_size=4, encoding=encoding)
+            self.assertEqual(({}, [self.file]), (result.skipped, result.changed))
+            with open(self.file, encoding=encoding, newline='') as file:
+                self.assertEqual("caf\xe9 junit\r\njunit", file.read())
+        with open(self.file, "w", encoding="utf-16", newline='') as file:
+            file.write("useJUnit")
+        result = rewriter.rewrite_files([self.file], JUNIT)
+        self.assertIn("not valid utf-8", result.skipped[self.file])
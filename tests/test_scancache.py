@@ -0,0 +1,43 @@
+from unittest import TestCase
+import os
+import tempfile
+import scancache
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "file.txt")
+        with open(self.file, "w") as file:
+            file.write("content")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_known_miss_survives_reopen(self):
+        cache = scancache.ScanCache(self.directory.name)
+        cache.store(self.file, "useJUnit", os.stat(self.file), False)
+        cache.close()
+        cache = scancache.ScanCache(self.directory.name)
+        self.assertTrue(cache.is_known_miss(self.file, "useJUnit", os.stat(self.file)))
+        self.assertFalse(cache.is_known_miss(self.file, "other", os.stat(self.file)))
+        self.assertEqual("Scan cache: 1 hits, 1 misses (50.0% hit rate)", cache.report())
+        cache.close()
+
+    def test_changed_file_is_not_a_miss(self):
+        cache = scancache.ScanCache(self.directory.name)
+        cache.store(self.file, "useJUnit", os.stat(self.file), False)
+        with open(self.file, "a") as file:
+            file.write(" more")
+        self.assertFalse(cache.is_known_miss(self.file, "useJUnit", os.stat(self.file)))
+        cache.close()
+
+    def test_eviction(self):
+        cache = scancache.ScanCache(self.directory.name, max_entries=1)
+        cache.store(self.file, "a", os.stat(self.file), False)
+        cache.store(self.file, "b", os.stat(self.file), False)
+        cache.close()
+        cache = scancache.ScanCache(self.directory.name)
+        count = cache.connection.execute("SELECT COUNT(*) FROM scan").fetchone()[0]
+        cache.close()
+        self.assertEqual(1, count)
@@ -0,0 +1,77 @@
+from unittest import TestCase
+import os
+import tempfile
+import scanner
+from git import Repo
+
+
+class Test(TestCase):
+    def test_walk_files_with_extension(self):
+        with tempfile.TemporaryDirectory() as root:
+            for path in ["src/A.java", "src/b.xml", "build.gradle", "src/c.txt",
+                         ".git/x.java", "build/B.java", "node_modules/m.xml", "lib/d.tar.gz"]:
+                os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+                open(os.path.join(root, path), "w").close()
+            files = scanner.walk_files_with_extension(root, ["java", "xml", "gradle", "tar.gz"])
+            self.assertEqual(sorted(["src/A.java", "src/b.xml", "build.gradle", "lib/d.tar.gz"]),
+                             sorted(os.path.relpath(file, root) for file in files))
+
+    def test_has_extension(self):
+        self.assertTrue(scanner.has_extension("archive.tar.gz", {"gz"}))
+        self.assertFalse(scanner.has_extension("Ajava", {"java"}))
+
+    def test_git_grep_files_with_str(self):
+        with tempfile.TemporaryDirectory() as root:
+            repo = Repo.init(root)
+            for path, content in [("src/A.java", "useJUnit"), ("src/B.java", "other"),
+                                  ("build/C.java", "useJUnit"), ("D.txt", "useJUnit")]:
+                os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+                with open(os.path.join(root, path), "w") as file:
+                    file.write(content)
+            repo.index.add(["src/A.java", "src/B.java", "build/C.java", "D.txt"])
+            with open(os.path.join(root, "src/Untracked.java"), "w") as file:
+                file.write("useJUnit")
+            files = scanner.git_grep_files_with_str(root, ["java"], ["useJUnit"])
+            self.assertEqual([os.path.join(root, "src/A.java")], files)
+            files = scanner.git_grep_files_with_str(root, ["java"], ["missing", "other"])
+            self.assertEqual([os.path.join(root, "src/B.java")], files)
+            self.assertEqual([], scanner.git_grep_files_with_str(root, ["java"], ["missing"]))
+
+    def test_git_candidate_files_word_mode(self):
+        with tempfile.TemporaryDirectory() as root:
+            repo = Repo.init(root)
+            for path, content in [("A.java", "useJUnitPlatform"), ("B.java", "(useJUnit)")]:
+                with open(os.path.join(root, path), "w") as file:
+                    file.write(content)
+            repo.index.add(["A.java", "B.java"])
+            self.assertEqual([os.path.join(root, "B.java")],
+                             scanner.git_candidate_files(root, ["java"], ["useJUnit"], "word"))
+            self.assertEqual(2, len(scanner.git_candidate_files(root, ["java"], ["x"], "regex")))
+
+    def test_git_changed_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            repo = Repo.init(root)
+            with repo.config_writer() as config:
+                config.set_value("user", "name", "test")
+                config.set_value("user", "email", "test@example.com")
+
+            def commit(paths, message):
+                for path in paths:
+                    os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+                    with open(os.path.join(root, path), "w") as file:
+                        file.write(message)
+                repo.git.add(".")
+                repo.git.commit("-m", message)
+                return repo.head.commit.hexsha
+
+            since = commit(["src/A.java", "src/B.java", "C.txt"], "init")
+            commit(["src/B.java", "src/D.java", "build/E.java", "F.txt"], "second")
+            repo.git.rm("src/A.java")
+            repo.git.commit("-m", "remove")
+            files = scanner.git_changed_files(root, since, ["java"])
+            self.assertEqual(["src/B.java", "src/D.java"],
+                             [os.path.relpath(file, root) for file in files])
+            self.assertIsNone(scanner.git_changed_files(root, "0" * 40, ["java"]))
+            repo.git.checkout("--orphan", "other")
+            commit(["src/A.java"], "unrelated")
+            self.assertIsNone(scanner.git_changed_files(root, since, ["java"]))
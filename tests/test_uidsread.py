@@ -1,6 +1,10 @@
 from unittest import TestCase
+import bitbucketclient
 import uidsread
+import json
 import os
+import tempfile
+from tests.stubserver import BitbucketStub
 
 
 class Test(TestCase):
@@ -21,3 +25,35 @@ class Test(TestCase):
         file = 'reviewers.json'
         array = uidsread.get_json_array_from_file(file)
         self.assertEqual(expected, array)
+
+    def test_get_users_for_given_workspace_cached(self):
+        credentials = uidsread.BitbucketCredentials("user", "key")
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "members-workspace-user.json"), "w") as file:
+                json.dump({"{abc}": "Cached"}, file)
+            users = uidsread.get_users_for_given_workspace_cached("workspace", credentials,
+                                                                  directory, 3600)
+        self.assertEqual({"{abc}": "Cached"}, users)
+
+    def test_iter_workspace_members_follows_all_pages(self):
+        members = [(f"{{{index}}}", f"User {index}") for index in range(25)]
+        stub = BitbucketStub(members, current_user="{3}", max_pagelen=10).start()
+        credentials = uidsread.BitbucketCredentials("pages", "key")
+        api_url, bitbucketclient.API_URL = bitbucketclient.API_URL, stub.url
+        try:
+            users = uidsread.get_users_for_given_workspace("workspace", credentials)
+        finally:
+            bitbucketclient.API_URL = api_url
+            stub.stop()
+        self.assertEqual(24, len(users))
+        self.assertEqual([uuid for uuid, name in members if uuid != "{3}"], list(users))
+
+    def test_create_two_json_with_reviewers_streams_pairs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pairs = iter([("{a}", "Zażółć"), ("{b}", "B")])
+            uidsread.create_two_json_with_reviewers(pairs, directory)
+            with open(os.path.join(directory, 'usersMap.json')) as file:
+                self.assertEqual({"{a}": "Zażółć", "{b}": "B"}, json.load(file))
+            self.assertEqual([{"uuid": "{a}"}, {"uuid": "{b}"}],
+                             uidsread.get_json_array_from_file(
+                                 os.path.join(directory, 'reviewers.json')))
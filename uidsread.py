@@ -4,18 +4,26 @@
 
 Definiuje tez funkcje zwiazane z oidami i ich konwersja z czego korzystaja inne skrypty
 
+Czlonkowie workspace sa pobierani strona po stronie (z maksymalnym pagelen) i zwracani
+przez generator. Gdy pierwsza strona podaje calkowita liczbe czlonkow (size), kolejne
+strony pobierane sa rownolegle.
+
 """
 import argparse
 import json
 import os
-from typing import Dict, List
-
-import requests
-from requests.auth import HTTPBasicAuth
+import math
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
 
+import bitbucketclient
 from credentials import get_credentials_for_bitbucket, BitbucketCredentials
 
-API_USER = "https://api.bitbucket.org/2.0/user/"
+API_USER = "/user/"
+PAGE_LENGTH = 100
+PAGE_WORKERS = 4
 
 
 def execute_script():
@@ -28,7 +36,7 @@ def execute_script():
         bitbucket_credentials = get_credentials_for_bitbucket(arguments.cd)
     else:
         bitbucket_credentials = get_credentials_for_bitbucket()
-    users_map = get_users_for_given_workspace(arguments.ws, bitbucket_credentials)
+    users_map = iter_workspace_reviewers(arguments.ws, bitbucket_credentials)
     directory = arguments.directory
     if directory:
         create_two_json_with_reviewers(users_map, directory)
@@ -77,18 +85,146 @@ def get_users_for_given_workspace(workspace: str,
     Dict[str, str]
        slownik uzytkownik => uuid
     """
-    user_endpoint = f"https://api.bitbucket.org/2.0/workspaces/{workspace}/members"
-    request = requests.get(user_endpoint,
-                           auth=HTTPBasicAuth(credentials.username, credentials.appkey))
-    data = json.loads(request.content)
-    data = data['values']
-    users_map = dict()
-    for i in data:
-        user = i['user']
-        users_map[user['uuid']] = user['display_name']
+    return dict(iter_workspace_reviewers(workspace, credentials))
+
+
+def iter_workspace_reviewers(workspace: str,
+                             credentials: BitbucketCredentials) -> Iterator[Tuple[str, str]]:
+    """
+    Generator zwracajacy czlonkow workspace bez obecnego uzytkownika
+
+    Parameters
+    ----------
+    workspace: str
+        workspace do przeszukania
+    credentials: BitbucketCredentials
+        credentiale do bitbukceta
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+       pary uuid, nazwa uzytkownika
+    """
     current_user_uuid = get_uuid_for_current_user(credentials)
-    if current_user_uuid in users_map:
-        del users_map[current_user_uuid]
+    for uuid, display_name in iter_workspace_members(workspace, credentials):
+        if uuid != current_user_uuid:
+            yield uuid, display_name
+
+
+def iter_workspace_members(workspace: str,
+                           credentials: BitbucketCredentials) -> Iterator[Tuple[str, str]]:
+    """
+    Generator zwracajacy wszystkich czlonkow workspace ze wszystkich stron odpowiedzi
+
+    Parameters
+    ----------
+    workspace: str
+        workspace do przeszukania
+    credentials: BitbucketCredentials
+        credentiale do bitbukceta
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+       pary uuid, nazwa uzytkownika
+    """
+    client = bitbucketclient.get_client(credentials)
+    for page in iter_pages(client, f"/workspaces/{workspace}/members"):
+        for member in page['values']:
+            user = member['user']
+            yield user['uuid'], user['display_name']
+
+
+def iter_pages(client: bitbucketclient.BitbucketClient, path: str) -> Iterator[Dict]:
+    """
+    Generator zwracajacy kolejne strony stronicowanej odpowiedzi API. Gdy znana jest
+    liczba elementow (size), pozostale strony pobierane sa rownolegle, w przeciwnym
+    wypadku pobierane sa kolejno po linkach next
+
+    Parameters
+    ----------
+    client: BitbucketClient
+        klient API bitbucketa
+    path: str
+        sciezka zasobu
+    Returns
+    -------
+    Iterator[Dict]
+       strony odpowiedzi w kolejnosci
+    """
+    first = get_json(client, path, {"pagelen": PAGE_LENGTH})
+    yield first
+    if 'next' not in first:
+        return
+    if 'size' in first and 'pagelen' in first:
+        pagelen = first['pagelen']
+        pages = range(first.get('page', 1) + 1, math.ceil(first['size'] / pagelen) + 1)
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            yield from executor.map(
+                lambda page: get_json(client, path, {"pagelen": pagelen, "page": page}), pages)
+        return
+    next_page = first['next']
+    while next_page:
+        page = get_json(client, next_page)
+        yield page
+        next_page = page.get('next')
+
+
+def get_json(client: bitbucketclient.BitbucketClient, path: str, params: Dict = None) -> Dict:
+    """
+    Wykonuje zapytanie GET i zwraca sparsowana odpowiedz, zwraca blad dla statusu innego niz 2xx
+
+    Parameters
+    ----------
+    client: BitbucketClient
+        klient API bitbucketa
+    path: str
+        sciezka zasobu lub pelny adres
+    params: Dict
+        parametry zapytania
+    Returns
+    -------
+    Dict
+       sparsowana odpowiedz
+    """
+    request = client.get(path, params=params)
+    request.raise_for_status()
+    return json.loads(request.content)
+
+
+def get_users_for_given_workspace_cached(workspace: str, credentials: BitbucketCredentials,
+                                         directory: str, ttl: int) -> Dict[str, str]:
+    """
+    Funkcja zwraca slownik uuidow dla uzytkownikow workspace z pliku w podanym katalogu,
+    jesli jest mlodszy niz ttl sekund. W przeciwnym wypadku pobiera go przez
+    get_users_for_given_workspace i zapisuje do pliku.
+
+    Parameters
+    ----------
+    workspace: str
+        workspace do przeszukania
+    credentials: BitbucketCredentials
+        credentiale do bitbukceta
+    directory: str
+        katalog z plikami cache
+    ttl: int
+        czas waznosci pliku w sekundach
+    Returns
+    -------
+    Dict[str, str]
+       slownik uzytkownik => uuid
+    """
+    cache_file = os.path.join(directory, f"members-{workspace}-{credentials.username}.json")
+    try:
+        if time.time() - os.path.getmtime(cache_file) < ttl:
+            with open(cache_file) as file:
+                return json.load(file)
+    except (OSError, ValueError):
+        pass
+    users_map = get_users_for_given_workspace(workspace, credentials)
+    os.makedirs(directory, exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with open(handle, 'w') as file:
+        json.dump(users_map, file, ensure_ascii=False)
+    os.replace(tmp_path, cache_file)
     return users_map
 
 
@@ -106,7 +242,7 @@ def get_uuid_for_current_user(credentials: BitbucketCredentials) -> str:
     str
        uuid dla obecnego uzytkownika
     """
-    request = requests.get(API_USER, auth=HTTPBasicAuth(credentials.username, credentials.appkey))
+    request = bitbucketclient.get_client(credentials).get(API_USER)
     data = json.loads(request.content)
     return data['uuid']
 
@@ -130,23 +266,34 @@ def map_users_to_json_array(*users_uids) -> List[Dict[str, str]]:
     return result
 
 
-def create_two_json_with_reviewers(users_map: Dict[str, str], directory: str = os.getcwd()) -> None:
+def create_two_json_with_reviewers(users_map: Union[Dict[str, str], Iterable[Tuple[str, str]]],
+                                   directory: str = os.getcwd()) -> None:
     """
     Metoda tworzy dwa pliki json z reviewerami. Jeden plik jest w formacie
     ktory oczekuje api bitbucketa a drugi jest informacyjny dla uzytkownika.
-    Ktory username przypada do jakiego uida
+    Ktory username przypada do jakiego uida. Uzytkownicy sa zapisywani do obu
+    plikow na biezaco, wiec mozna podac generator.
 
     Parameters
     ----------
-    users_map : Dict[str, str]
-        mapa uzytkownikow username => oid
+    users_map : Union[Dict[str, str], Iterable[Tuple[str, str]]]
+        mapa uzytkownikow oid => username lub pary (oid, username)
     directory : str
         folder w ktorym beda zapisane pliki. Domyslnie katalog obecny.
     """
-    with open(os.path.join(directory, 'usersMap.json'), 'w') as file1:
-        json.dump(users_map, file1, ensure_ascii=False)
-    with open(os.path.join(directory, 'reviewers.json'), 'w') as file2:
-        json.dump(map_users_to_json_array(*users_map), file2, ensure_ascii=False)
+    if isinstance(users_map, dict):
+        users_map = users_map.items()
+    with open(os.path.join(directory, 'usersMap.json'), 'w') as file1, \
+            open(os.path.join(directory, 'reviewers.json'), 'w') as file2:
+        file1.write("{")
+        file2.write("[")
+        for index, (uuid, display_name) in enumerate(users_map):
+            separator = ", " if index else ""
+            file1.write(f"{separator}{json.dumps(uuid, ensure_ascii=False)}: "
+                        f"{json.dumps(display_name, ensure_ascii=False)}")
+            file2.write(separator + json.dumps({'uuid': uuid}, ensure_ascii=False))
+        file1.write("}")
+        file2.write("]")
 
 
 def get_json_array_from_file(filename: str) -> List[Dict[str, str]]: